@@ -1,11 +1,15 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from datetime import datetime, time
 import os
 import logging
 from models import db, BotStatus
+from schema import upgrade_schema
+from config_cache import notify_config_changed
+from log_writer import configure_logging
+from metrics import REGISTRY, CONTENT_TYPE
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -26,31 +30,30 @@ db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
 # Logging configuration
-logging.basicConfig(
-    filename='app.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-)
+configure_logging('app.log')
 
 # Define Models
 class ConfigModel(db.Model):
     __tablename__ = 'config'
     id = db.Column(db.Integer, primary_key=True)
-    symbol = db.Column(db.String(20), nullable=False, default='BTCINR')
+    symbol = db.Column(db.String(20), nullable=False, unique=True, default='BTCINR')
     session_start = db.Column(db.Time, nullable=False, default=time(8, 0, 0))
     session_end = db.Column(db.Time, nullable=False, default=time(5, 0, 0))
     sl_amount = db.Column(db.Float, nullable=False, default=25.0)
     tsl_step = db.Column(db.Float, nullable=False, default=10.0)
     trade_quantity = db.Column(db.Float, nullable=False, default=1000.0)
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
 
 class BotStatus(db.Model):
     __tablename__ = 'bot_status'
     id = db.Column(db.Integer, primary_key=True)
     running = db.Column(db.Boolean, nullable=False, default=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
 
-# Initialize the database and create tables if they don't exist
+# Bring an existing database up to the current models (new tables, columns
+# and constraints), then seed the Config and BotStatus rows
 with app.app_context():
-    db.create_all()
+    upgrade_schema(db.engine)
     # Initialize Config and BotStatus if not present
     if ConfigModel.query.first() is None:
         config = ConfigModel()
@@ -71,26 +74,43 @@ if not COINDCX_API_KEY or not COINDCX_API_SECRET:
 
 coindcx_client = CoinDCXClient(COINDCX_API_KEY, COINDCX_API_SECRET)
 
+# Markets listing shared by all requests, refreshed in the background
+from market_catalog import MarketCatalog
+market_catalog = MarketCatalog(
+    coindcx_client,
+    ttl=int(os.getenv('MARKETS_CACHE_TTL', 300)),
+    snapshot_path=os.getenv('MARKETS_SNAPSHOT_PATH', 'markets_snapshot.json'),
+)
+market_catalog.start()
+
 # Define Routes
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    config = ConfigModel.query.first()
+    configs = ConfigModel.query.order_by(ConfigModel.id).all()
+    config_id = request.values.get('config_id', type=int)
+    config = ConfigModel.query.get(config_id) if config_id else configs[0]
+    if config is None:
+        flash('Unknown market configuration.', 'danger')
+        return redirect(url_for('index'))
     status = BotStatus.query.first()
-    symbols = []
 
-    # Fetch all available spot market symbols from CoinDCX
+    # Available spot market symbols from the cached CoinDCX catalog
     try:
-        markets = coindcx_client.get_markets()
-        symbols = [market['market'] for market in markets if market['status'] == 'active']
+        market_catalog.ensure_loaded()
     except Exception as e:
         logging.error(f"Error fetching symbols from CoinDCX: {e}")
         flash('Error fetching symbols from CoinDCX. Please try again later.', 'danger')
+    symbols = market_catalog.active_symbols()
 
     if request.method == 'POST':
         # Update Config
         selected_symbol = request.form.get('symbol', '').upper()
-        if selected_symbol:
+        if selected_symbol and selected_symbol != config.symbol:
+            if ConfigModel.query.filter_by(symbol=selected_symbol).first():
+                flash(f'{selected_symbol} is already configured.', 'danger')
+                return redirect(url_for('index', config_id=config.id))
             config.symbol = selected_symbol
+        config.enabled = request.form.get('enabled') == 'on'
 
         try:
             session_start = datetime.strptime(request.form.get('session_start'), '%H:%M').time()
@@ -99,7 +119,7 @@ def index():
             config.session_end = session_end
         except ValueError:
             flash('Invalid time format. Use HH:MM (24-hour).', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('index', config_id=config.id))
 
         try:
             config.sl_amount = float(request.form.get('sl_amount', 25.0))
@@ -107,19 +127,38 @@ def index():
             config.trade_quantity = float(request.form.get('trade_quantity', 1000.0))
         except ValueError:
             flash('SL, TSL steps, and Trade Quantity must be numeric.', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('index', config_id=config.id))
 
+        notify_config_changed(db.session, status)
         db.session.commit()
         flash('Configuration updated successfully.', 'success')
-        return redirect(url_for('index'))
+        return redirect(url_for('index', config_id=config.id))
+
+    return render_template('index.html', config=config, configs=configs, status=status, symbols=symbols)
 
-    return render_template('index.html', config=config, status=status, symbols=symbols)
+@app.route('/markets/add', methods=['POST'])
+def add_market():
+    symbol = request.form.get('symbol', '').upper()
+    if not symbol:
+        flash('Select a symbol to add.', 'danger')
+        return redirect(url_for('index'))
+    existing = ConfigModel.query.filter_by(symbol=symbol).first()
+    if existing:
+        flash(f'{symbol} is already configured.', 'warning')
+        return redirect(url_for('index', config_id=existing.id))
+    config = ConfigModel(symbol=symbol)
+    db.session.add(config)
+    notify_config_changed(db.session, BotStatus.query.first())
+    db.session.commit()
+    flash(f'{symbol} added.', 'success')
+    return redirect(url_for('index', config_id=config.id))
 
 @app.route('/start', methods=['POST'])
 def start_bot():
     status = BotStatus.query.first()
     if not status.running:
         status.running = True
+        notify_config_changed(db.session, status)
         db.session.commit()
         flash('Bot started.', 'success')
     else:
@@ -131,12 +170,18 @@ def stop_bot():
     status = BotStatus.query.first()
     if status.running:
         status.running = False
+        notify_config_changed(db.session, status)
         db.session.commit()
         flash('Bot stopped.', 'success')
     else:
         flash('Bot is not running.', 'warning')
     return redirect(url_for('index'))
 
+@app.route('/metrics')
+def metrics():
+    # This process's CoinDCX call metrics; the trading worker serves its own on METRICS_PORT
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,290 @@
+# async_bot.py
+import os
+import asyncio
+import time
+import logging
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+from async_coindcx_client import AsyncCoinDCXClient
+from config_cache import ConfigCache
+from log_writer import configure_logging
+from market_state import MarketState
+from order_journal import FILLED_STATUSES
+from portfolio import Portfolio
+from rate_limiter import RequestRateLimiter, PRIORITY_PROTECTIVE, PRIORITY_TRADING
+from scheduler import next_session_change_in, session_changes
+from schema import upgrade_schema
+from strategy import (
+    entry_quantity, entry_signal, stop_loss_prices, stop_distance, supports_trailing, get_current_time,
+    BUFFER_AMOUNT,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+configure_logging('bot.log')
+
+# CoinDCX API credentials
+COINDCX_API_KEY = os.getenv('COINDCX_API_KEY')
+COINDCX_API_SECRET = os.getenv('COINDCX_API_SECRET')
+
+# Database configuration
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+TICK_INTERVAL = 60  # Seconds between ticks while the bot is running
+IDLE_INTERVAL = 5  # Seconds between status checks while the bot is stopped
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 8))  # Requests per second across all markets
+
+
+async def _nothing():
+    return None
+
+
+class AsyncTradingEngine:
+    # Event-loop version of bot.main. Each tick fetches the order book, open
+    # orders and the SL order status concurrently, so tick latency is bounded
+    # by the slowest of the three calls instead of their sum. All enabled
+    # markets tick concurrently; the client's rate limiter paces their requests.
+    # Entries are sized from the INR amount and checked against a Portfolio
+    # as in TradingEngine; balances are refreshed here with the async client.
+
+    def __init__(self, client, config_cache, portfolio=None):
+        self.client = client
+        self.config_cache = config_cache
+        self.portfolio = portfolio
+        self.markets = {}
+
+    async def refresh_balances(self):
+        if self.portfolio is None or not self.portfolio.stale():
+            return
+        started = time.monotonic()
+        try:
+            self.portfolio.update(await self.client.get_account_balance(), started)
+        except Exception as e:
+            logging.error(f"Error refreshing balances: {e}")
+
+    def sync_markets(self, configs):
+        wanted = {config.symbol: config for config in configs}
+        for symbol in list(self.markets):
+            if symbol not in wanted:
+                del self.markets[symbol]
+        for symbol, config in wanted.items():
+            if symbol in self.markets:
+                self.markets[symbol].config = config
+            else:
+                self.markets[symbol] = MarketState(config)
+        return list(self.markets.values())
+
+    async def _safe(self, coro, default, description):
+        try:
+            return await coro
+        except Exception as e:
+            logging.error(f"Error fetching {description}: {e}")
+            return default
+
+    async def place_order(self, market, side, order_type, price, quantity, stop_price=None, priority=PRIORITY_TRADING):
+        try:
+            response = await self.client.place_order(
+                market=market,
+                side=side,
+                order_type=order_type,
+                price=price,
+                quantity=quantity,
+                stop_price=stop_price,
+                priority=priority
+            )
+            if response.get('status') == 'success':
+                order_id = response.get('data', {}).get('order_id')
+                logging.info(f"Placed {side} {order_type} order: {order_id} at price {price}, quantity {quantity}")
+                return order_id
+            else:
+                logging.error(f"Failed to place order: {response}")
+                return None
+        except Exception as e:
+            logging.error(f"Error placing order: {e}")
+            return None
+
+    async def cancel_order(self, order_id):
+        try:
+            response = await self.client.cancel_order(order_id=order_id)
+            if response.get('status') == 'success':
+                logging.info(f"Cancelled order: {order_id}")
+                return True
+            else:
+                logging.error(f"Failed to cancel order {order_id}: {response}")
+                return False
+        except Exception as e:
+            logging.error(f"Error cancelling order {order_id}: {e}")
+            return False
+
+    async def set_stop_loss_with_buffer(self, config, entry_price, side, quantity, buffer_amount, atr=None):
+        stop_price, limit_price, sl_side = stop_loss_prices(entry_price, side, stop_distance(config.sl_amount, atr), buffer_amount)
+
+        # Stop Limit order, retried once, then a market order as fallback
+        for attempt in range(2):
+            order_id = await self.place_order(
+                market=config.symbol,
+                side=sl_side,
+                order_type='stop-limit',
+                price=limit_price,
+                quantity=quantity,
+                stop_price=stop_price,
+                priority=PRIORITY_PROTECTIVE
+            )
+            if order_id:
+                logging.info(f"Stop Limit order placed: Order ID = {order_id}, Stop Price = {stop_price}, Limit Price = {limit_price}")
+                return order_id
+            logging.warning(f"Failed to place Stop Limit order (attempt {attempt + 1}).")
+
+        order_id = await self.place_order(
+            market=config.symbol,
+            side=sl_side,
+            order_type='market',
+            price=None,  # Market order doesn't require price
+            quantity=quantity,
+            priority=PRIORITY_PROTECTIVE
+        )
+        if order_id:
+            logging.info(f"Stop Market order placed: Order ID = {order_id}")
+        else:
+            logging.error("Failed to place Stop Market order.")
+        return order_id
+
+    async def tick(self, state):
+        config = state.config
+        symbol = config.symbol
+
+        order_book, open_orders, sl_details = await asyncio.gather(
+            self.client.get_order_book(market=symbol),
+            self._safe(self.client.get_open_orders(market=symbol), [], 'open orders'),
+            self._safe(self.client.get_order_details(order_id=state.sl_order_id), None, 'SL order details')
+            if state.sl_order_id else _nothing(),
+        )
+        last_price = float(order_book['last_traded_price'])
+        state.indicators.update(time.time(), last_price)
+
+        # Stop loss status was fetched for the SL order that existed before this tick
+        if sl_details and sl_details.get('status') in FILLED_STATUSES:
+            logging.info(f"Stop loss order executed: {state.sl_order_id}")
+            state.reset_stop_loss()
+
+        previous_low = state.lowest_price
+        previous_high = state.update_extremes(last_price)
+
+        signal = entry_signal(last_price, open_orders, vwap=state.indicators.vwap.value)
+        if signal:
+            side, entry_price = signal
+            quantity = entry_quantity(config.trade_quantity, entry_price)
+            if self.portfolio is not None and not self.portfolio.allow(symbol, side, entry_price, quantity):
+                return
+            order_id = await self.place_order(
+                market=symbol, side=side, order_type='limit', price=entry_price, quantity=quantity
+            )
+            if order_id:
+                if self.portfolio is not None:
+                    self.portfolio.reserve(symbol, side, entry_price, quantity)
+                state.sl_order_id = await self.set_stop_loss_with_buffer(
+                    config, last_price, side, quantity, buffer_amount=BUFFER_AMOUNT, atr=state.indicators.atr.value
+                )
+                state.tsl_triggered = False
+                return
+
+        # Trailing Stop Loss: move the SL up on a new high for a buy position,
+        # down on a new low for a sell position (the SL is on the other side)
+        if state.sl_order_id and sl_details and not state.tsl_triggered and supports_trailing(symbol):
+            side = 'buy' if sl_details.get('side') == 'sell' else 'sell'
+            if ((side == 'buy' and previous_high is not None and last_price > previous_high)
+                    or (side == 'sell' and previous_low is not None and last_price < previous_low)):
+                # Move the quantity the current stop covers
+                quantity = float(sl_details.get('total_quantity') or sl_details.get('quantity') or 0)
+                if not quantity:
+                    quantity = entry_quantity(config.trade_quantity, last_price)
+                if await self.cancel_order(state.sl_order_id):
+                    new_order_id = await self.set_stop_loss_with_buffer(
+                        config, last_price, side, quantity, buffer_amount=BUFFER_AMOUNT, atr=state.indicators.atr.value
+                    )
+                    if new_order_id:
+                        state.sl_order_id = new_order_id
+                        state.tsl_triggered = True
+                        logging.info(f"Trailing Stop Loss updated for {symbol}: New SL Order ID = {state.sl_order_id}")
+
+    async def close_session(self, states):
+        # Session closed for these markets: fetch their open orders
+        # concurrently, then cancel the entries in one bulk request. Stop
+        # losses stay on the book to protect open positions.
+        open_orders = await asyncio.gather(*(
+            self._safe(self.client.get_open_orders(market=state.symbol), [], 'open orders') for state in states
+        ))
+        stops = {state.sl_order_id for state in states}
+        order_ids = [order['order_id'] for orders in open_orders for order in orders
+                     if order['order_id'] not in stops and order.get('order_type') != 'stop-limit']
+        if not order_ids:
+            return
+        try:
+            response = await self.client.cancel_orders(order_ids)
+            if response.get('status') in ('success', 200):
+                logging.info(f"Cancelled {len(order_ids)} orders: {order_ids}")
+                return
+            logging.error(f"Bulk cancel of {order_ids} failed: {response}")
+        except Exception as e:
+            logging.error(f"Error cancelling orders {order_ids}: {e}")
+        await asyncio.gather(*(self.cancel_order(order_id) for order_id in order_ids))
+
+    async def run_market(self, state):
+        try:
+            await self.tick(state)
+        except Exception as e:
+            logging.error(f"Unexpected error in {state.symbol}: {e}")
+
+    async def run(self):
+        while True:
+            try:
+                configs, status = self.config_cache.get()
+
+                if not status.running:
+                    await asyncio.to_thread(self.config_cache.wait_for_change, status.version, IDLE_INTERVAL)
+                    continue
+
+                states = self.sync_markets(configs)
+                opened, closed = session_changes(states, get_current_time())
+                if closed:
+                    logging.info(f"Session closed for {', '.join(state.symbol for state in closed)}")
+                    await self.close_session(closed)
+                for state in opened:
+                    logging.info(f"Session opened for {state.symbol}")
+                # Markets out of session cost no requests until they open again
+                if any(state.in_session for state in states):
+                    await self.refresh_balances()
+                await asyncio.gather(*(self.run_market(state) for state in states if state.in_session))
+
+                # Sleep until the next tick or the next session open / close, whichever is first
+                await asyncio.sleep(min(TICK_INTERVAL, next_session_change_in(states, get_current_time())))
+
+            except Exception as e:
+                logging.error(f"Unexpected error: {e}")
+                await asyncio.sleep(IDLE_INTERVAL)
+
+
+async def main():
+    engine = create_engine(DATABASE_URL)
+    upgrade_schema(engine)
+    config_cache = ConfigCache(engine)
+    config_cache.start()
+    async with AsyncCoinDCXClient(
+        COINDCX_API_KEY,
+        COINDCX_API_SECRET,
+        rate_limiter=RequestRateLimiter(rate=(API_RATE_LIMIT, API_RATE_LIMIT * 2)),
+        pool_size=int(os.getenv('COINDCX_POOL_SIZE', 10)),
+        connect_timeout=float(os.getenv('COINDCX_CONNECT_TIMEOUT', 3.05)),
+        read_timeout=float(os.getenv('COINDCX_READ_TIMEOUT', 10)),
+    ) as client:
+        portfolio = Portfolio(client, refresh_interval=float(os.getenv('BALANCE_REFRESH_INTERVAL', 30)),
+                              max_exposure=float(os.getenv('MAX_EXPOSURE_INR', 0)))
+        await AsyncTradingEngine(client, config_cache, portfolio=portfolio).run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
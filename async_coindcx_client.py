@@ -0,0 +1,163 @@
+# async_coindcx_client.py
+import asyncio
+import time
+
+import aiohttp
+
+from coindcx_client import BaseCoinDCXClient, json_dumps, json_loads
+from metrics import API_QUEUE_WAIT, observe_request
+from rate_limiter import PRIORITY_PROTECTIVE, PRIORITY_TRADING, PRIORITY_MARKET_DATA
+
+
+class AsyncCoinDCXClient(BaseCoinDCXClient):
+    # Coroutine twin of CoinDCXClient: same method names and return values,
+    # backed by a single aiohttp session so concurrent calls share one pool.
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, api_key, api_secret, base_url=None, pool_size=10, connect_timeout=3.05,
+                 read_timeout=10, max_retries=3, backoff_factor=0.3, rate_limiter=None):
+        super().__init__(api_key, api_secret, base_url, rate_limiter)
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.session = None
+
+    def _get_session(self):
+        # aiohttp sessions must be created inside a running event loop
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            headers = {k: v for k, v in self._get_headers().items() if v is not None}
+            self.session = aiohttp.ClientSession(connector=connector, headers=headers, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _get(self, endpoint, url, params=None, priority=PRIORITY_MARKET_DATA, signed=False):
+        # Same policy as the blocking client: only idempotent GETs are retried
+        API_QUEUE_WAIT.labels(endpoint).observe(await self.rate_limiter.acquire_async(endpoint, priority))
+        headers = None
+        if signed:
+            query, headers = self._sign_query(params)
+            url, params = f"{url}?{query}", None
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            failed = True
+            try:
+                async with self._get_session().get(url, params=params, headers=headers) as response:
+                    if response.status in self.RETRY_STATUSES and attempt < self.max_retries:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status)
+                    failed = response.status >= 400
+                    return json_loads(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+            finally:
+                observe_request(endpoint, started, failed)
+
+    async def _post(self, endpoint, url, params, priority=PRIORITY_TRADING, signed=False):
+        API_QUEUE_WAIT.labels(endpoint).observe(await self.rate_limiter.acquire_async(endpoint, priority))
+        if signed:
+            body, headers = self._sign_body(params)
+        else:
+            body, headers = json_dumps(params), None
+        started = time.perf_counter()
+        failed = True
+        try:
+            async with self._get_session().post(url, data=body, headers=headers) as response:
+                failed = response.status >= 400
+                return json_loads(await response.read())
+        finally:
+            observe_request(endpoint, started, failed)
+
+    async def get_markets(self):
+        url = f"{self.BASE_URL}/exchange/v1/markets"
+        return await self._get('markets', url)
+
+    async def get_markets_details(self):
+        url = f"{self.BASE_URL}/exchange/v1/markets_details"
+        return await self._get('markets_details', url)
+
+    async def get_order_book(self, market):
+        url = f"{self.BASE_URL}/exchange/v1/order_book"
+        params = {'market': market}
+        return await self._get('order_book', url, params=params)
+
+    async def get_account_balance(self):
+        url = f"{self.BASE_URL}/exchange/v1/account_balance"
+        params = {}
+        return await self._get('account_balance', url, params=params, signed=True)
+
+    async def place_order(self, market, side, order_type, price, quantity, stop_price=None, priority=PRIORITY_TRADING):
+        url = f"{self.BASE_URL}/exchange/v1/place_order"
+        params = self._order_params(market, side, order_type, price, quantity, stop_price)
+        return await self._post('place_order', url, params, signed=True, priority=priority)
+
+    async def cancel_order(self, order_id, priority=PRIORITY_PROTECTIVE):
+        url = f"{self.BASE_URL}/exchange/v1/cancel_order"
+        params = {'order_id': order_id}
+        return await self._post('cancel_order', url, params, signed=True, priority=priority)
+
+    async def cancel_orders(self, order_ids, priority=PRIORITY_PROTECTIVE):
+        # Bulk cancel of many orders, in any market, in one request
+        url = f"{self.BASE_URL}/exchange/v1/orders/cancel_by_ids"
+        params = {'ids': list(order_ids)}
+        return await self._post('cancel_orders', url, params, signed=True, priority=priority)
+
+    async def get_open_orders(self, market):
+        url = f"{self.BASE_URL}/exchange/v1/open_orders"
+        params = {'market': market}
+        return await self._get('open_orders', url, params=params, signed=True, priority=PRIORITY_TRADING)
+
+    async def get_order_details(self, order_id):
+        url = f"{self.BASE_URL}/exchange/v1/order_details"
+        params = {'order_id': order_id}
+        return await self._get('order_details', url, params=params, signed=True, priority=PRIORITY_TRADING)
+
+    async def get_orders_status(self, order_ids):
+        # Bulk status lookup for many orders in one request
+        url = f"{self.BASE_URL}/exchange/v1/orders/status_multiple"
+        params = {'ids': list(order_ids)}
+        return await self._post('orders_status', url, params, signed=True, priority=PRIORITY_TRADING)
+
+    async def _attempt(self, call, *args):
+        try:
+            return await call(*args)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    async def cancel_replace(self, order_id, market, side, order_type, price, quantity, stop_price=None,
+                             priority=PRIORITY_PROTECTIVE):
+        # Same contract as CoinDCXClient.cancel_replace
+        cancel_response, place_response = await asyncio.gather(
+            self._attempt(self.cancel_order, order_id, priority),
+            self._attempt(self.place_order, market, side, order_type, price, quantity, stop_price, priority),
+        )
+        cancelled = cancel_response.get('status') == 'success'
+        placed = place_response.get('status') == 'success'
+        if cancelled and not placed:
+            place_response = await self._attempt(self.place_order, market, side, order_type, price, quantity,
+                                                 stop_price, priority)
+        elif placed and not cancelled:
+            new_order_id = place_response.get('data', {}).get('order_id')
+            withdrawn = await self._attempt(self.cancel_order, new_order_id, priority)
+            place_response = {
+                'status': 'error',
+                'message': f"Cancel of {order_id} failed; replacement {new_order_id} withdrawn",
+                'withdrawn': withdrawn.get('status') == 'success',
+                'data': {'order_id': new_order_id},
+            }
+        return cancel_response, place_response
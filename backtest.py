@@ -0,0 +1,560 @@
+# backtest.py
+import argparse
+import logging
+import os
+from datetime import datetime, time as dtime
+
+import numpy as np
+import pandas as pd
+
+import strategy
+from market_state import MarketState
+from portfolio import Portfolio, split_symbol
+from recorder import TickArchive
+from strategy import entry_quantity, in_session_mask, supports_trailing, BUFFER_AMOUNT
+from trader import TradingEngine
+
+TIME_COLUMNS = ('timestamp', 'time', 'ts', 'T', 'date')
+PRICE_COLUMNS = ('price', 'p', 'last_traded_price', 'last_price', 'close')
+VOLUME_COLUMNS = ('volume', 'quantity', 'q', 'size')
+SYMBOL_COLUMNS = ('symbol', 'market')
+INITIAL_CASH = 100000.0  # Simulated INR balance entries are checked against
+
+
+class BacktestConfig:
+    # Stand-in for a models.Config row
+    def __init__(self, symbol='BTCINR', session_start=dtime(8, 0), session_end=dtime(5, 0),
+                 sl_amount=25.0, tsl_step=10.0, trade_quantity=1000.0):
+        self.symbol = symbol
+        self.session_start = session_start
+        self.session_end = session_end
+        self.sl_amount = sl_amount
+        self.tsl_step = tsl_step  # Carried like Config.tsl_step; trailing moves use sl_amount / ATR
+        self.trade_quantity = trade_quantity
+        self.enabled = True
+
+    def for_symbol(self, symbol):
+        return BacktestConfig(symbol, self.session_start, self.session_end, self.sl_amount,
+                              self.tsl_step, self.trade_quantity)
+
+
+class SimulatedExchange:
+    # Matches orders against replayed prices behind the CoinDCXClient method
+    # surface, so TradingEngine runs unmodified. Resting limit orders fill at
+    # their limit; orders marketable on arrival (and market orders) fill at the
+    # current price. Stop-limit orders become limit orders once triggered.
+
+    def __init__(self, fee_rate=0.0, initial_cash=0.0):
+        self.fee_rate = fee_rate
+        self.cash = initial_cash
+        self.positions = {}
+        self.prices = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.fills = []
+        self.now = 0.0
+        self.index = 0
+        self.next_id = 1
+
+    def set_market_price(self, market, timestamp, price, index=0):
+        self.now = timestamp
+        self.index = index
+        self.prices[market] = price
+        for order in list(self.open_orders.get(market, ())):
+            self._match(order, price, resting=True)
+
+    def has_open_orders(self, market):
+        return bool(self.open_orders.get(market))
+
+    def _match(self, order, price, resting):
+        if not order['triggered']:
+            stop = order['stop_price']
+            if (order['side'] == 'sell' and price <= stop) or (order['side'] == 'buy' and price >= stop):
+                order['triggered'] = True
+                resting = False  # Becomes a fresh limit order at the trigger price
+            else:
+                return
+        limit = order['price']
+        if order['side'] == 'buy' and price <= limit:
+            self._fill(order, limit if resting else price)
+        elif order['side'] == 'sell' and price >= limit:
+            self._fill(order, limit if resting else price)
+
+    def _fill(self, order, price):
+        quantity = order['quantity']
+        value = price * quantity
+        fee = value * self.fee_rate
+        market = order['market']
+        if order['side'] == 'buy':
+            self.positions[market] = self.positions.get(market, 0.0) + quantity
+            self.cash -= value + fee
+        else:
+            self.positions[market] = self.positions.get(market, 0.0) - quantity
+            self.cash += value - fee
+        order['status'] = 'filled'
+        order['avg_price'] = price
+        order['filled_quantity'] = quantity
+        self.open_orders[market].remove(order)
+        self.fills.append((self.index, self.now, market, order['side'], order['order_type'],
+                           price, quantity, fee, self.positions[market], self.cash, order['order_id']))
+
+    # CoinDCXClient surface
+
+    def get_markets(self):
+        return list(self.prices)
+
+    def get_markets_details(self):
+        details = []
+        for market in self.prices:
+            base, quote = split_symbol(market)
+            details.append({
+                'coindcx_name': market,
+                'symbol': market,
+                'status': 'active',
+                'base_currency_short_name': quote,
+                'target_currency_short_name': base,
+                'base_currency_precision': 2,
+                'target_currency_precision': 6,
+                'step': 0.000001,
+                'min_quantity': 0.000001,
+                'pair': f"I-{base}_{quote}",
+            })
+        return details
+
+    def get_order_book(self, market):
+        return {'bids': {}, 'asks': {}, 'last_traded_price': str(self.prices[market])}
+
+    def get_account_balance(self):
+        # Open orders lock what they could spend: quote for buys, coins for sells
+        locked = {'INR': 0.0}
+        for market, orders in self.open_orders.items():
+            base = split_symbol(market)[0]
+            for order in orders:
+                if order['side'] == 'buy':
+                    locked['INR'] += (order['price'] or 0.0) * order['quantity']
+                else:
+                    locked[base] = locked.get(base, 0.0) + order['quantity']
+        held = {'INR': self.cash}
+        for market, position in self.positions.items():
+            base = split_symbol(market)[0]
+            held[base] = held.get(base, 0.0) + position
+        return [{'currency': currency, 'available_balance': amount - locked.get(currency, 0.0),
+                 'locked_balance': locked.get(currency, 0.0)} for currency, amount in held.items()]
+
+    def place_order(self, market, side, order_type, price, quantity, stop_price=None, priority=None):
+        order_id = f"sim-{self.next_id}"
+        self.next_id += 1
+        order = {
+            'order_id': order_id,
+            'market': market,
+            'side': side,
+            'order_type': order_type,
+            'price': float(price) if price is not None else None,
+            'stop_price': float(stop_price) if stop_price else None,
+            'quantity': float(quantity),
+            'status': 'open',
+            'triggered': order_type != 'stop-limit',
+            'filled_quantity': 0.0,
+            'created_at': self.now,
+        }
+        self.orders[order_id] = order
+        self.open_orders.setdefault(market, []).append(order)
+        current = self.prices[market]
+        if order_type == 'market':
+            self._fill(order, current)
+        else:
+            self._match(order, current, resting=False)
+        return {'status': 'success', 'data': {'order_id': order_id}}
+
+    def cancel_order(self, order_id, priority=None):
+        order = self.orders.get(order_id)
+        if order is None or order['status'] != 'open':
+            return {'status': 'error', 'message': f"order {order_id} is not open"}
+        order['status'] = 'cancelled'
+        self.open_orders[order['market']].remove(order)
+        return {'status': 'success'}
+
+    def cancel_orders(self, order_ids, priority=None):
+        for order_id in order_ids:
+            self.cancel_order(order_id)
+        return {'status': 'success'}
+
+    def cancel_replace(self, order_id, market, side, order_type, price, quantity, stop_price=None, priority=None):
+        cancel_response = self.cancel_order(order_id)
+        if cancel_response.get('status') != 'success':
+            return cancel_response, {'status': 'error', 'message': 'not placed: cancel failed'}
+        return cancel_response, self.place_order(market, side, order_type, price, quantity, stop_price)
+
+    def get_open_orders(self, market):
+        return [dict(order) for order in self.open_orders.get(market, ())]
+
+    def get_order_details(self, order_id):
+        order = self.orders.get(order_id)
+        return dict(order) if order is not None else None
+
+    def get_orders_status(self, order_ids):
+        return [dict(self.orders[order_id]) for order_id in order_ids if order_id in self.orders]
+
+    def trigger_bounds(self, market):
+        # Price levels at which any resting order could change state: the
+        # next tick with price <= low or >= high is an event
+        low, high = -np.inf, np.inf
+        for order in self.open_orders.get(market, ()):
+            level = order['price'] if order['triggered'] else order['stop_price']
+            if order['side'] == 'buy' and order['triggered']:
+                low = max(low, level)
+            elif order['side'] == 'buy':
+                high = min(high, level)
+            elif order['triggered']:
+                high = min(high, level)
+            else:
+                low = max(low, level)
+        return low, high
+
+
+class _Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+
+class ReplayIndicators:
+    # Drop-in for IndicatorSet during replay. ATR and VWAP for every tick are
+    # computed up front with NumPy/pandas; seek() exposes the values as of a
+    # tick with the same semantics as the live incremental indicators.
+
+    def __init__(self, atr_values, vwap_values):
+        self.atr = _Value()
+        self.vwap = _Value()
+        self.ema = _Value()
+        self.atr_values = atr_values
+        self.vwap_values = vwap_values
+
+    @classmethod
+    def compute(cls, timestamps, prices, volumes, interval=60, atr_period=14, vwap_anchor=86400):
+        return cls(cls._atr(timestamps, prices, interval, atr_period),
+                   cls._vwap(timestamps, prices, volumes, vwap_anchor))
+
+    @staticmethod
+    def _atr(timestamps, prices, interval, period):
+        bar_ids = np.floor(timestamps / interval)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bar_ids)) + 1))
+        ends = np.concatenate((starts[1:], [len(prices)]))
+        high = np.maximum.reduceat(prices, starts)
+        low = np.minimum.reduceat(prices, starts)
+        close = prices[ends - 1]
+        true_range = high - low
+        if len(close) > 1:
+            prev_close = close[:-1]
+            true_range[1:] = np.maximum.reduce([high[1:] - low[1:], np.abs(high[1:] - prev_close),
+                                                np.abs(low[1:] - prev_close)])
+        atr_bars = np.full(len(close), np.nan)
+        if len(true_range) >= period:
+            seeded = np.concatenate(([true_range[:period].mean()], true_range[period:]))
+            atr_bars[period - 1:] = pd.Series(seeded).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+        # A tick sees the ATR of the last bar closed before its own bar
+        bar_of_tick = np.repeat(np.arange(len(starts)), ends - starts)
+        atr_ticks = np.full(len(prices), np.nan)
+        has_prev = bar_of_tick > 0
+        atr_ticks[has_prev] = atr_bars[bar_of_tick[has_prev] - 1]
+        return atr_ticks
+
+    @staticmethod
+    def _vwap(timestamps, prices, volumes, anchor):
+        cum_pv = np.cumsum(prices * volumes)
+        cum_v = np.cumsum(volumes)
+        anchor_ids = np.floor(timestamps / anchor)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(anchor_ids)) + 1))
+        lengths = np.diff(np.concatenate((starts, [len(prices)])))
+        base_pv = np.repeat(np.concatenate(([0.0], cum_pv))[starts], lengths)
+        base_v = np.repeat(np.concatenate(([0.0], cum_v))[starts], lengths)
+        volume = cum_v - base_v
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(volume > 0, (cum_pv - base_pv) / volume, np.nan)
+
+    def seek(self, index):
+        atr = self.atr_values[index]
+        vwap = self.vwap_values[index]
+        self.atr.value = None if np.isnan(atr) else float(atr)
+        self.vwap.value = None if np.isnan(vwap) else float(vwap)
+
+
+class BacktestResult:
+    def __init__(self, symbol, timestamps, prices, fills, events, initial_cash=0.0):
+        self.symbol = symbol
+        self.timestamps = timestamps
+        self.fills = fills
+        self.events = events
+        self.equity = self._equity_curve(prices, fills, initial_cash)
+        peak = np.maximum.accumulate(self.equity) if len(self.equity) else self.equity
+        self.drawdown = peak - self.equity
+        self.pnl = float(self.equity[-1]) if len(self.equity) else 0.0
+        self.max_drawdown = float(self.drawdown.max()) if len(self.drawdown) else 0.0
+
+    @staticmethod
+    def _equity_curve(prices, fills, initial_cash=0.0):
+        # Cash and position are constant between fills, so mark-to-market
+        # equity for every tick is a step lookup plus one multiply. Equity is
+        # the gain over the starting balance.
+        if not fills:
+            return np.zeros(len(prices))
+        fill_index = np.array([fill[0] for fill in fills])
+        position = np.array([fill[8] for fill in fills])
+        cash = np.array([fill[9] for fill in fills])
+        step = np.searchsorted(fill_index, np.arange(len(prices)), side='right') - 1
+        filled = step >= 0
+        equity = np.zeros(len(prices))
+        equity[filled] = cash[step[filled]] - initial_cash + position[step[filled]] * prices[filled]
+        return equity
+
+    def summary(self):
+        return {
+            'symbol': self.symbol,
+            'ticks': len(self.timestamps),
+            'events': self.events,
+            'fills': len(self.fills),
+            'pnl': self.pnl,
+            'max_drawdown': self.max_drawdown,
+        }
+
+
+def load_ticks(path, symbol=None):
+    # Read a CSV or Parquet file of trades, candles or top-of-book snapshots.
+    # Returns {symbol: (timestamps, prices, volumes)} with timestamps in epoch seconds.
+    if path.endswith('.parquet'):
+        # Parquet needs pyarrow, which the bot and web dynos do not install
+        try:
+            frame = pd.read_parquet(path)
+        except ImportError as e:
+            raise ImportError(f"{path}: reading Parquet needs pyarrow (pip install pyarrow==12.0.1) or fastparquet") from e
+    else:
+        frame = pd.read_csv(path)
+
+    time_column = next((c for c in TIME_COLUMNS if c in frame.columns), None)
+    if time_column is None:
+        raise ValueError(f"{path}: no timestamp column (expected one of {TIME_COLUMNS})")
+    times = frame[time_column]
+    if pd.api.types.is_numeric_dtype(times):
+        timestamps = times.to_numpy(dtype=np.float64)
+        if len(timestamps) and np.nanmax(timestamps) > 1e11:
+            timestamps = timestamps / 1000.0  # Milliseconds
+    else:
+        timestamps = pd.to_datetime(times, utc=True).astype('int64').to_numpy() / 1e9
+
+    price_column = next((c for c in PRICE_COLUMNS if c in frame.columns), None)
+    if price_column is not None:
+        prices = frame[price_column].to_numpy(dtype=np.float64)
+    elif 'bid' in frame.columns and 'ask' in frame.columns:
+        prices = (frame['bid'].to_numpy(dtype=np.float64) + frame['ask'].to_numpy(dtype=np.float64)) / 2
+    else:
+        raise ValueError(f"{path}: no price column (expected one of {PRICE_COLUMNS} or bid/ask)")
+
+    volume_column = next((c for c in VOLUME_COLUMNS if c in frame.columns), None)
+    volumes = frame[volume_column].to_numpy(dtype=np.float64) if volume_column else np.zeros(len(prices))
+
+    symbol_column = next((c for c in SYMBOL_COLUMNS if c in frame.columns), None)
+    if symbol_column is not None and symbol is None:
+        symbols = frame[symbol_column].to_numpy()
+    else:
+        symbols = np.full(len(prices), symbol or os.path.splitext(os.path.basename(path))[0], dtype=object)
+
+    data = {}
+    for name in pd.unique(symbols):
+        selected = symbols == name
+        order = np.argsort(timestamps[selected], kind='stable')
+        data[str(name)] = (timestamps[selected][order], prices[selected][order], volumes[selected][order])
+    return data
+
+
+def _next_event(prices, start, end, low, high):
+    # First index in [start, end) whose price is <= low or >= high, else end.
+    # Scans in growing chunks so quiet stretches cost a few vectorised compares.
+    chunk = 256
+    while start < end:
+        stop = min(start + chunk, end)
+        window = prices[start:stop]
+        hits = np.flatnonzero((window <= low) | (window >= high))
+        if len(hits):
+            return start + int(hits[0])
+        start = stop
+        chunk *= 4
+    return end
+
+
+def _entry_allowed(portfolio, symbol, side, price, amount):
+    return portfolio.check(symbol, side, price, entry_quantity(amount, price)) is None
+
+
+def run_backtest(symbol, timestamps, prices, volumes, config, fee_rate=0.0, indicator_interval=60,
+                 buffer_amount=BUFFER_AMOUNT, indicators=None, initial_cash=INITIAL_CASH):
+    # Replay one market through TradingEngine.tick, visiting only ticks where
+    # the strategy or a resting order could act. Skipped ticks still update
+    # the price extremes the trailing stop relies on. Pass precomputed
+    # ReplayIndicators to reuse them across runs over the same data.
+    # Entries are sized and checked against the simulated balance the same
+    # way the live bot checks its account.
+    exchange = SimulatedExchange(fee_rate=fee_rate, initial_cash=initial_cash)
+    portfolio = Portfolio(exchange)
+    portfolio.refresh()
+    engine = TradingEngine(exchange, buffer_amount=buffer_amount, portfolio=portfolio)
+    state = MarketState(config)
+    if indicators is None:
+        indicators = ReplayIndicators.compute(timestamps, prices, volumes, interval=indicator_interval)
+    state.indicators = indicators
+    trailing = supports_trailing(symbol)
+
+    n = len(prices)
+    in_session = in_session_mask(timestamps % 86400, config)
+    boundaries = np.concatenate((np.flatnonzero(np.diff(in_session)) + 1, [n]))
+    events = 0
+    i = 0
+    while i < n:
+        segment_end = int(boundaries[np.searchsorted(boundaries, i, side='right')])
+        exchange.set_market_price(symbol, timestamps[i], prices[i], i)
+        events += 1
+
+        engine.poll_orders()
+        if not in_session[i]:
+            if state.in_session is not False:
+                engine.close_session([state])
+                state.in_session = False
+            # Only resting stop losses can act until the session reopens
+            low, high = exchange.trigger_bounds(symbol)
+            i = _next_event(prices, i + 1, segment_end, low, high) if exchange.has_open_orders(symbol) else segment_end
+            continue
+        state.in_session = True
+
+        indicators.seek(i)
+        portfolio.refresh_pending()
+        engine.tick(state, prices[i])
+        if (engine.journal.has_open_orders(symbol) != exchange.has_open_orders(symbol) or engine.order_events
+                or state.unprotected):
+            # A fill the engine has not acted on yet, or a position whose stop
+            # must be re-placed; the live bot acts on its next tick
+            i += 1
+            continue
+
+        low, high = exchange.trigger_bounds(symbol)
+        if not exchange.has_open_orders(symbol):
+            # An entry signal only matters if the balance check would let the entry through
+            portfolio.refresh_pending()
+            if _entry_allowed(portfolio, symbol, 'buy', strategy.BUY_THRESHOLD, config.trade_quantity):
+                low = max(low, strategy.BUY_THRESHOLD)
+            if _entry_allowed(portfolio, symbol, 'sell', strategy.SELL_THRESHOLD, config.trade_quantity):
+                high = min(high, strategy.SELL_THRESHOLD)
+        if trailing and state.sl_order_id and not state.tsl_triggered:
+            # The next new high (long) or low (short) moves the stop
+            side = engine.position_side(state)
+            if side == 'buy' and state.highest_price is not None:
+                high = min(high, np.nextafter(state.highest_price, np.inf))
+            elif side == 'sell' and state.lowest_price is not None:
+                low = max(low, np.nextafter(state.lowest_price, -np.inf))
+        following = _next_event(prices, i + 1, segment_end, low, high)
+        if following > i + 1:
+            skipped = prices[i + 1:following]
+            state.update_extremes(float(skipped.max()))
+            state.update_extremes(float(skipped.min()))
+        i = following
+
+    return BacktestResult(symbol, timestamps, prices, exchange.fills, events, initial_cash)
+
+
+def combined_summary(results):
+    # Portfolio view: each market's equity carried forward onto a merged clock
+    if not results:
+        return {'pnl': 0.0, 'max_drawdown': 0.0, 'fills': 0}
+    clock = np.unique(np.concatenate([r.timestamps for r in results]))
+    total = np.zeros(len(clock))
+    for r in results:
+        step = np.searchsorted(r.timestamps, clock, side='right') - 1
+        seen = step >= 0
+        total[seen] += r.equity[step[seen]]
+    drawdown = np.maximum.accumulate(total) - total
+    return {
+        'pnl': float(total[-1]),
+        'max_drawdown': float(drawdown.max()),
+        'fills': sum(len(r.fills) for r in results),
+    }
+
+
+def run_files(paths, config, fee_rate=0.0, indicator_interval=60, buffer_amount=BUFFER_AMOUNT,
+              initial_cash=INITIAL_CASH):
+    results = []
+    for path in paths:
+        for symbol, (timestamps, prices, volumes) in load_ticks(path).items():
+            results.append(run_backtest(symbol, timestamps, prices, volumes, config.for_symbol(symbol),
+                                        fee_rate=fee_rate, indicator_interval=indicator_interval,
+                                        buffer_amount=buffer_amount, initial_cash=initial_cash))
+    return results
+
+
+def run_archive(root, config, symbols=None, start=None, end=None, fee_rate=0.0, indicator_interval=60,
+                buffer_amount=BUFFER_AMOUNT, initial_cash=INITIAL_CASH):
+    # Replay what the live bot recorded (see recorder.TickRecorder)
+    archive = TickArchive(root)
+    symbols = symbols or sorted(set(archive.symbols('trades')) | set(archive.symbols('ticks')))
+    results = []
+    for symbol in symbols:
+        timestamps, prices, volumes = archive.series(symbol, start, end)
+        if len(timestamps):
+            results.append(run_backtest(symbol, timestamps, prices, volumes, config.for_symbol(symbol),
+                                        fee_rate=fee_rate, indicator_interval=indicator_interval,
+                                        buffer_amount=buffer_amount, initial_cash=initial_cash))
+    return results
+
+
+def write_fills(results, path):
+    rows = [fill[1:] for r in results for fill in r.fills]
+    columns = ['timestamp', 'market', 'side', 'order_type', 'price', 'quantity', 'fee', 'position', 'cash', 'order_id']
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False)
+
+
+def _parse_time(value):
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded market data through the bot strategy.')
+    parser.add_argument('paths', nargs='*', help='CSV or Parquet files of trades, candles or book snapshots')
+    parser.add_argument('--archive', help='Replay a RECORD_DIR tick archive instead of files')
+    parser.add_argument('--symbols', help='Comma-separated symbols to take from the archive (default: all)')
+    parser.add_argument('--start', help='Archive range start, YYYY-MM-DD[ HH:MM] UTC')
+    parser.add_argument('--end', help='Archive range end (exclusive)')
+    parser.add_argument('--session-start', type=_parse_time, default=dtime(8, 0))
+    parser.add_argument('--session-end', type=_parse_time, default=dtime(5, 0))
+    parser.add_argument('--sl-amount', type=float, default=25.0)
+    parser.add_argument('--trade-quantity', type=float, default=1000.0, help='INR per entry')
+    parser.add_argument('--initial-cash', type=float, default=INITIAL_CASH, help='Simulated INR balance per market')
+    parser.add_argument('--buffer-amount', type=float, default=BUFFER_AMOUNT)
+    parser.add_argument('--fee-rate', type=float, default=0.0)
+    parser.add_argument('--indicator-interval', type=int, default=60)
+    parser.add_argument('--fills-out', help='Write every simulated fill to this CSV')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+    config = BacktestConfig(session_start=args.session_start, session_end=args.session_end,
+                            sl_amount=args.sl_amount, trade_quantity=args.trade_quantity)
+    if not args.paths and not args.archive:
+        parser.error('give data files or --archive')
+    results = run_files(args.paths, config, fee_rate=args.fee_rate, indicator_interval=args.indicator_interval,
+                        buffer_amount=args.buffer_amount, initial_cash=args.initial_cash)
+    if args.archive:
+        symbols = args.symbols.split(',') if args.symbols else None
+        results += run_archive(args.archive, config, symbols, args.start, args.end, fee_rate=args.fee_rate,
+                               indicator_interval=args.indicator_interval, buffer_amount=args.buffer_amount,
+                               initial_cash=args.initial_cash)
+
+    print(f"{'symbol':<14}{'ticks':>10}{'events':>10}{'fills':>8}{'pnl':>16}{'max_dd':>16}")
+    for r in results:
+        s = r.summary()
+        print(f"{s['symbol']:<14}{s['ticks']:>10}{s['events']:>10}{s['fills']:>8}{s['pnl']:>16.2f}{s['max_drawdown']:>16.2f}")
+    total = combined_summary(results)
+    print(f"{'TOTAL':<14}{'':>10}{'':>10}{total['fills']:>8}{total['pnl']:>16.2f}{total['max_drawdown']:>16.2f}")
+
+    if args.fills_out:
+        write_fills(results, args.fills_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+# benchmarks.py
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+import numpy as np
+
+from backtest import BacktestConfig
+import coindcx_client
+from coindcx_client import CoinDCXClient
+from fake_exchange import FakeCoinDCX
+from market_state import MarketState
+from rate_limiter import RequestRateLimiter
+from trader import TradingEngine
+
+RESULTS_PATH = 'benchmark_results.json'
+REGRESSION_THRESHOLD = 0.2  # Flag metrics that got more than 20% worse
+SUITES = ('signing', 'calls', 'ticks', 'sl')
+
+
+def _latency_summary(samples):
+    # Milliseconds: mean and tail percentiles of a list of durations in seconds
+    values = np.asarray(samples) * 1000
+    if not len(values):
+        return {}
+    return {
+        'count': int(len(values)),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+    }
+
+
+def _client(fake, rate_limit=None, pool_size=10):
+    # Unthrottled by default so the numbers measure the client and the
+    # engine, not the token buckets; pass rate_limit to bench with them
+    if rate_limit:
+        limiter = RequestRateLimiter(rate=(rate_limit, rate_limit * 2))
+    else:
+        limiter = RequestRateLimiter(rate=(1e9, 1e9), endpoint_limits={})
+    return CoinDCXClient('bench-key', 'bench-secret', base_url=fake.base_url, rate_limiter=limiter, pool_size=pool_size)
+
+
+def _timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _per_call_us(call, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def bench_signing(iterations=20000, requests=500):
+    # CPU cost of preparing a signed order request, against the naive path of
+    # keying a new HMAC and serializing the params twice; then the whole
+    # client-side cost of a request in CPU time on the calling thread
+    client = CoinDCXClient('bench-key', 'bench-secret')
+    secret = client.api_secret.encode('utf-8')
+    order = client._order_params('BTCINR', 'buy', 'limit', 1500.0, 1.0, 1490.0)
+    orders = [dict(order, order_id=f"sim-{i}", status='open', filled_quantity=0.0) for i in range(50)]
+    encoded = json.dumps(orders).encode('utf-8')
+
+    def naive_sign():
+        params = dict(order, timestamp=int(time.time()))
+        params['signature'] = hmac.new(secret, urlencode(params).encode('utf-8'), hashlib.sha256).hexdigest()
+        return json.dumps(params).encode('utf-8')
+
+    results = {
+        'json_backend': 'orjson' if coindcx_client.orjson is not None else 'json',
+        'naive_sign_us': _per_call_us(naive_sign, iterations),
+        'sign_body_us': _per_call_us(lambda: client._sign_body(dict(order)), iterations),
+        'sign_query_us': _per_call_us(lambda: client._sign_query({'market': 'BTCINR'}), iterations),
+        'stdlib_decode_us': _per_call_us(lambda: json.loads(encoded), iterations // 10),
+        'decode_us': _per_call_us(lambda: coindcx_client.json_loads(encoded), iterations // 10),
+    }
+    client.close()
+
+    with FakeCoinDCX(prices={'BTCINR': 1500.0}) as fake:
+        client = _client(fake)
+        try:
+            client.get_order_book('BTCINR')
+            cpu_started = time.thread_time()
+            for _ in range(requests):
+                client.place_order('BTCINR', 'buy', 'limit', 100.0, 1.0)
+            results['cpu_per_place_order_us'] = (time.thread_time() - cpu_started) / requests * 1e6
+        finally:
+            client.close()
+    return results
+
+
+def bench_call_overhead(calls=200, latency=0.0, rate_limit=None, warmup=10):
+    # Round trip of each client method against the fake. With latency=0 this
+    # is the client's own cost plus loopback HTTP.
+    market = 'BTCINR'
+    with FakeCoinDCX(prices={market: 1500.0}, latency=latency) as fake:
+        client = _client(fake, rate_limit)
+        try:
+            _timed(lambda: client.get_order_book(market), warmup)
+            # Resting far below the market so each order stays open to be cancelled
+            order_ids = []
+
+            def place():
+                response = client.place_order(market, 'buy', 'limit', 100.0, 1.0)
+                order_ids.append(response['data']['order_id'])
+
+            results = {'place_order': _latency_summary(_timed(place, calls))}
+            probe = order_ids[0]
+            results['markets'] = _latency_summary(_timed(client.get_markets, calls))
+            results['markets_details'] = _latency_summary(_timed(client.get_markets_details, calls))
+            results['order_book'] = _latency_summary(_timed(lambda: client.get_order_book(market), calls))
+            results['account_balance'] = _latency_summary(_timed(client.get_account_balance, calls))
+            results['open_orders'] = _latency_summary(_timed(lambda: client.get_open_orders(market), calls))
+            results['order_details'] = _latency_summary(_timed(lambda: client.get_order_details(probe), calls))
+            results['orders_status'] = _latency_summary(_timed(lambda: client.get_orders_status(order_ids[:50]), calls))
+            pending = list(order_ids)
+            results['cancel_order'] = _latency_summary(_timed(lambda: client.cancel_order(pending.pop()), calls))
+        finally:
+            client.close()
+    return results
+
+
+def bench_tick_throughput(markets=4, ticks=2000, latency=0.0, order_poll_interval=0.0, rate_limit=None, seed=1):
+    # The bot loop's work per pass: one bulk order poll, then a tick for every
+    # market, with prices random-walking across the strategy's entry levels
+    # so orders are placed, filled and protected along the way
+    rng = random.Random(seed)
+    symbols = [f"BTC{i}INR" for i in range(markets)]
+    prices = {symbol: 1500.0 for symbol in symbols}
+    with FakeCoinDCX(prices=prices, latency=latency) as fake:
+        client = _client(fake, rate_limit)
+        engine = TradingEngine(client, order_poll_interval=order_poll_interval)
+        states = [MarketState(BacktestConfig(symbol, trade_quantity=1.0)) for symbol in symbols]
+        samples = []
+        started = time.perf_counter()
+        try:
+            for step in range(ticks):
+                now = time.time()
+                for state in states:
+                    price = min(2100.0, max(900.0, prices[state.symbol] + rng.gauss(0, 150)))
+                    prices[state.symbol] = price
+                    fake.set_price(state.symbol, price)
+                    state.indicators.update(now, price, 1.0)
+                engine.poll_orders()
+                for state in states:
+                    tick_started = time.perf_counter()
+                    engine.tick(state, prices[state.symbol])
+                    samples.append(time.perf_counter() - tick_started)
+            elapsed = time.perf_counter() - started
+        finally:
+            engine.trailing.shutdown()
+            client.close()
+        requests = fake.stats()['requests']
+    return {
+        'markets': markets,
+        'ticks': len(samples),
+        'ticks_per_second': len(samples) / elapsed,
+        'requests': sum(requests.values()),
+        'requests_per_tick': sum(requests.values()) / len(samples),
+        'tick': _latency_summary(samples),
+    }
+
+
+def bench_sl_replacement(markets=8, moves=20, latency=0.02, load_threads=4, rate_limit=None):
+    # Trailing-stop moves for many markets at once while other threads keep
+    # the client busy with market-data reads. Reports the unprotected window
+    # (old stop cancelled until its replacement is acknowledged) per move.
+    symbols = [f"BTC{i}INR" for i in range(markets)]
+    with FakeCoinDCX(prices={symbol: 1500.0 for symbol in symbols}, latency=latency) as fake:
+        client = _client(fake, rate_limit, pool_size=max(10, markets + load_threads))
+        engine = TradingEngine(client, background_trailing=True)
+        states = []
+        for symbol in symbols:
+            state = MarketState(BacktestConfig(symbol, trade_quantity=1.0))
+            state.sl_order_id = engine.set_stop_loss_with_buffer(state.config, 1500.0, 'buy', 1.0,
+                                                                 buffer_amount=engine.buffer_amount)
+            states.append(state)
+
+        stop = threading.Event()
+        load_counts = [0] * load_threads
+
+        def load(index):
+            while not stop.is_set():
+                client.get_order_book(symbols[index % markets])
+                load_counts[index] += 1
+
+        threads = [threading.Thread(target=load, args=(i,), daemon=True) for i in range(load_threads)]
+        for thread in threads:
+            thread.start()
+        rounds = []
+        started = time.perf_counter()
+        try:
+            for move in range(1, moves + 1):
+                round_started = time.perf_counter()
+                for state in states:
+                    engine.trailing.trail(state, 1500.0 + move, 'buy', 1.0)
+                while engine.trailing.in_flight:
+                    time.sleep(0.001)
+                rounds.append(time.perf_counter() - round_started)
+                for state in states:
+                    engine.trailing.collect(state)
+                    state.tsl_triggered = False
+            elapsed = time.perf_counter() - started
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            engine.trailing.shutdown()
+            client.close()
+
+    stats = engine.trailing.stats()
+    per_market = stats['markets'].values()
+    total_moves = sum(m['moves'] for m in per_market)
+    return {
+        'markets': markets,
+        'moves': total_moves,
+        'coalesced': stats['coalesced'],
+        'unprotected_avg_ms': sum(m['unprotected_avg_ms'] * m['moves'] for m in per_market) / max(total_moves, 1),
+        'unprotected_max_ms': max((m['unprotected_max_ms'] for m in per_market), default=0.0),
+        'round': _latency_summary(rounds),
+        'load_requests_per_second': sum(load_counts) / elapsed,
+        'lost_stops': sum(1 for state in states if state.sl_order_id is None),
+    }
+
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def _higher_is_better(name):
+    return name.endswith('per_second')
+
+
+def _is_timing(name):
+    return name.endswith('_ms') or name.endswith('_us')
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    # (metric, baseline, current, relative change, regressed) for every timing
+    # or throughput metric present in both runs
+    rows = []
+    old = _flatten(baseline)
+    for name, value in _flatten(current).items():
+        if name not in old or not (_is_timing(name) or _higher_is_better(name)) or not old[name]:
+            continue
+        change = (value - old[name]) / old[name]
+        worse = -change if _higher_is_better(name) else change
+        rows.append((name, old[name], value, change, worse > threshold))
+    return rows
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_run(results, settings, path=RESULTS_PATH):
+    # Appends to the history file so later runs can compare against it
+    runs = load_runs(path)
+    run = {
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'settings': settings,
+        'results': results,
+    }
+    runs.append(run)
+    with open(path, 'w') as f:
+        json.dump(runs, f, indent=2)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CoinDCX client and trading loop against a local fake exchange.')
+    parser.add_argument('--only', default=','.join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument('--iterations', type=int, default=20000, help='Repetitions of each signing micro-benchmark')
+    parser.add_argument('--calls', type=int, default=200, help='Calls per endpoint')
+    parser.add_argument('--ticks', type=int, default=1000, help='Loop passes in the tick benchmark')
+    parser.add_argument('--markets', type=int, default=4)
+    parser.add_argument('--moves', type=int, default=20, help='Trailing-stop moves per market')
+    parser.add_argument('--load-threads', type=int, default=4, help='Concurrent market-data readers during SL moves')
+    parser.add_argument('--latency', type=float, default=0.0, help='Fake exchange response delay (seconds)')
+    parser.add_argument('--sl-latency', type=float, default=0.02, help='Fake exchange delay during SL moves (seconds)')
+    parser.add_argument('--rate-limit', type=float, help='Run through the request rate limiter at this many requests/s')
+    parser.add_argument('--output', default=RESULTS_PATH, help='History file results are appended to')
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if a metric regressed against the last run')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+    suites = [name.strip() for name in args.only.split(',') if name.strip()]
+    results = {}
+    if 'signing' in suites:
+        results['signing'] = bench_signing(args.iterations)
+        s = results['signing']
+        print(f"signing ({s['json_backend']})  naive {s['naive_sign_us']:.2f} us  body {s['sign_body_us']:.2f} us  "
+              f"query {s['sign_query_us']:.2f} us  decode {s['decode_us']:.2f} us (stdlib {s['stdlib_decode_us']:.2f})  "
+              f"cpu/place_order {s['cpu_per_place_order_us']:.0f} us")
+    if 'calls' in suites:
+        results['calls'] = bench_call_overhead(args.calls, args.latency, args.rate_limit)
+        for endpoint, s in results['calls'].items():
+            print(f"{endpoint:<16} mean {s['mean_ms']:8.3f} ms  p50 {s['p50_ms']:8.3f}  p99 {s['p99_ms']:8.3f}")
+    if 'ticks' in suites:
+        results['ticks'] = bench_tick_throughput(args.markets, args.ticks, args.latency, rate_limit=args.rate_limit)
+        t = results['ticks']
+        print(f"ticks            {t['ticks_per_second']:10.1f} ticks/s  p99 {t['tick']['p99_ms']:8.3f} ms  "
+              f"{t['requests_per_tick']:.3f} requests/tick")
+    if 'sl' in suites:
+        results['sl'] = bench_sl_replacement(args.markets, args.moves, args.sl_latency, args.load_threads, args.rate_limit)
+        s = results['sl']
+        print(f"sl replacement   unprotected avg {s['unprotected_avg_ms']:8.3f} ms  max {s['unprotected_max_ms']:8.3f} ms  "
+              f"round p99 {s['round']['p99_ms']:8.3f} ms  load {s['load_requests_per_second']:.0f} req/s")
+
+    previous = load_runs(args.output)
+    regressed = []
+    if previous:
+        baseline = previous[-1]
+        print(f"\nAgainst {baseline['timestamp']} ({baseline.get('revision') or 'unknown revision'}):")
+        for name, old, new, change, worse in compare(results, baseline['results']):
+            flag = '  REGRESSION' if worse else ''
+            print(f"  {name:<36}{old:12.3f} -> {new:12.3f}  {change:+7.1%}{flag}")
+            if worse:
+                regressed.append(name)
+
+    if not args.no_save:
+        settings = {k: v for k, v in vars(args).items() if k not in ('output', 'no_save', 'fail_on_regression')}
+        save_run(results, settings, args.output)
+    if regressed and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,313 +2,308 @@
 import os
 import time
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
 
-import pandas as pd
-from ta.volatility import AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
 from dotenv import load_dotenv
 from coindcx_client import CoinDCXClient
-from models import db, Config, BotStatus
+from market_catalog import MarketCatalog
+from log_writer import configure_logging
+from market_feed import MarketFeed, SocketIOTransport
+from metrics import (
+    LOG_DROPPED,
+    LOOP_LATENCY,
+    OPEN_ORDERS,
+    OWNED_MARKETS,
+    RATE_LIMIT_QUEUED,
+    REGISTRY,
+    SHARD_LEADER,
+    TICK_ERRORS,
+    TICK_LATENCY,
+    start_http_server,
+)
+from rate_limiter import RequestRateLimiter
+from recorder import TickRecorder
+from scheduler import MarketScheduler
+from schema import upgrade_schema
+from sharding import ShardCoordinator
+from config_cache import ConfigCache
+from order_book import OrderBook
+from order_journal import OrderJournal
+from portfolio import Portfolio
+from strategy import get_current_time
+from trader import TradingEngine
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import db, BotStatus
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    filename='bot.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(message)s',
-)
+# Configure logging: JSON lines written by a background thread
+log_handler, log_writer = configure_logging('bot.log')
 
 # CoinDCX API credentials
 COINDCX_API_KEY = os.getenv('COINDCX_API_KEY')
 COINDCX_API_SECRET = os.getenv('COINDCX_API_SECRET')
 
+# Request budget shared by every market traded by this worker
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 8))  # Requests per second
+
 # Initialize CoinDCX Client
-coindcx_client = CoinDCXClient(COINDCX_API_KEY, COINDCX_API_SECRET)
+coindcx_client = CoinDCXClient(
+    COINDCX_API_KEY,
+    COINDCX_API_SECRET,
+    rate_limiter=RequestRateLimiter(rate=(API_RATE_LIMIT, API_RATE_LIMIT * 2)),
+    pool_size=int(os.getenv('COINDCX_POOL_SIZE', 10)),
+    connect_timeout=float(os.getenv('COINDCX_CONNECT_TIMEOUT', 3.05)),
+    read_timeout=float(os.getenv('COINDCX_READ_TIMEOUT', 10)),
+)
+
+# Market rules (tick size, min quantity, stream pair), shared with the web app's snapshot
+market_catalog = MarketCatalog(
+    coindcx_client,
+    ttl=int(os.getenv('MARKETS_CACHE_TTL', 300)),
+    snapshot_path=os.getenv('MARKETS_SNAPSHOT_PATH', 'markets_snapshot.json'),
+)
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
 engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-session = Session()
+config_cache = ConfigCache(engine, poll_interval=float(os.getenv('CONFIG_POLL_INTERVAL', 0.5)))
+
+# Orders and SL state survive restarts in the journal tables
+order_journal = OrderJournal(engine)
+
+# Markets are split across every running worker through lease rows in the
+# database, so scaling the worker dyno adds capacity instead of duplicate orders.
+# SHARDING=off makes this worker trade every enabled market on its own.
+SHARDING = os.getenv('SHARDING', 'on') != 'off'
+coordinator = ShardCoordinator(
+    engine,
+    lambda: [config.symbol for config in config_cache.get()[0]],
+    lease_ttl=float(os.getenv('SHARD_LEASE_TTL', 15)),
+    heartbeat_interval=float(os.getenv('SHARD_HEARTBEAT_INTERVAL', 5)),
+) if SHARDING else None
+
+# Balances cached for the pre-trade check; MAX_EXPOSURE_INR=0 disables the per-market cap
+portfolio = Portfolio(
+    coindcx_client,
+    market_catalog,
+    refresh_interval=float(os.getenv('BALANCE_REFRESH_INTERVAL', 30)),
+    max_exposure=float(os.getenv('MAX_EXPOSURE_INR', 0)),
+)
 
-# Global Variables for SL and TSL
-sl_order_id = None
-tsl_triggered = False
-highest_price = None
-lowest_price = None
+# Order handling and strategy, shared with the backtester
+ORDER_POLL_INTERVAL = float(os.getenv('ORDER_POLL_INTERVAL', 1.0))  # Seconds between bulk order status polls
+trader = TradingEngine(coindcx_client, market_catalog, journal=order_journal, order_poll_interval=ORDER_POLL_INTERVAL,
+                       background_trailing=True, portfolio=portfolio, coordinator=coordinator)
 
+# Market data: 'socket' streams from the CoinDCX websocket, 'off' polls REST
+MARKET_FEED = os.getenv('MARKET_FEED', 'socket')
+FEED_STALE_SECONDS = 30  # Fall back to REST if the stream has been quiet this long
+MIN_TICK_INTERVAL = float(os.getenv('MIN_TICK_INTERVAL', 1.0))  # Coalesce bursts of stream events
+POLL_INTERVAL = 60  # Seconds between ticks without a stream
+market_feed = None
+order_books = {}  # Polled REST snapshots, parsed into reusable OrderBooks
 
-def get_current_time():
-    return datetime.utcnow()
+# Archive of every price, top of book and trade seen; RECORD_DIR unset disables it
+RECORD_DIR = os.getenv('RECORD_DIR')
+recorder = TickRecorder(RECORD_DIR, flush_interval=float(os.getenv('RECORD_FLUSH_INTERVAL', 1.0))) if RECORD_DIR else None
 
+# Prometheus-style /metrics for this worker; 0 disables the listener
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
 
-def is_within_session(current_time, config):
-    session_start = current_time.replace(hour=config.session_start.hour, minute=config.session_start.minute,
-                                        second=config.session_start.second, microsecond=0)
-    session_end = session_start + timedelta(hours=21)  # 21 hours session
-    # Handle session crossing midnight
-    if session_end.day > session_start.day:
-        if current_time >= session_start or current_time < session_end:
-            return True
-    else:
-        if session_start <= current_time < session_end:
-            return True
-    return False
 
-
-def fetch_market_data(symbol):
-    try:
-        order_book = coindcx_client.get_order_book(market=symbol)
-        bids = order_book['bids']
-        asks = order_book['asks']
-        last_price = float(order_book['last_traded_price'])
-        return last_price, bids, asks
-    except Exception as e:
-        logging.error(f"Error fetching market data: {e}")
-        raise
+def collect_metrics():
+    if coordinator is not None:
+        OWNED_MARKETS.set(len(coordinator.owned_markets()))
+        SHARD_LEADER.set(1 if coordinator.is_leader else 0)
+    RATE_LIMIT_QUEUED.set(coindcx_client.rate_limiter.stats()['queued'])
+    OPEN_ORDERS.set(len(order_journal.tracked_ids()))
+    LOG_DROPPED.set(log_handler.dropped)
 
 
-def fetch_account_balance():
+def start_metrics_server():
+    if not METRICS_PORT:
+        return
+    REGISTRY.add_collector(collect_metrics)
     try:
-        balance = coindcx_client.get_account_balance()
-        # Extract INR balance
-        inr_balance = next((item for item in balance if item['currency'] == 'INR'), None)
-        if inr_balance:
-            return float(inr_balance['available_balance'])
-        return 0.0
+        start_http_server(METRICS_PORT)
     except Exception as e:
-        logging.error(f"Error fetching account balance: {e}")
-        return 0.0
+        logging.error(f"Metrics listener unavailable on port {METRICS_PORT}: {e}")
 
 
-def place_order(market, side, order_type, price, quantity, stop_price=None):
+def start_market_feed():
+    global market_feed
+    if MARKET_FEED == 'off':
+        return
     try:
-        response = coindcx_client.place_order(
-            market=market,
-            side=side,
-            order_type=order_type,
-            price=price,
-            quantity=quantity,
-            stop_price=stop_price
-        )
-        if response.get('status') == 'success':
-            order_id = response.get('data', {}).get('order_id')
-            logging.info(f"Placed {side} {order_type} order: {order_id} at price {price}, quantity {quantity}")
-            return order_id
-        else:
-            logging.error(f"Failed to place order: {response}")
-            return None
+        market_feed = MarketFeed(SocketIOTransport(), client=coindcx_client)
+        market_feed.start()
     except Exception as e:
-        logging.error(f"Error placing order: {e}")
-        return None
+        logging.error(f"Market feed unavailable, falling back to REST polling: {e}")
+        market_feed = None
 
 
-def cancel_order(order_id):
-    try:
-        response = coindcx_client.cancel_order(order_id=order_id)
-        if response.get('status') == 'success':
-            logging.info(f"Cancelled order: {order_id}")
-            return True
-        else:
-            logging.error(f"Failed to cancel order {order_id}: {response}")
-            return False
-    except Exception as e:
-        logging.error(f"Error cancelling order {order_id}: {e}")
-        return False
+def ensure_subscribed(symbols):
+    if market_feed is None:
+        return
+    for symbol in symbols:
+        if symbol not in market_feed.books:
+            info = market_catalog.get(symbol)
+            market_feed.subscribe(symbol, info.pair if info is not None else None)
 
 
-def get_open_orders(market):
+def fetch_market_data(symbol):
+    if market_feed is not None and market_feed.is_fresh(symbol, FEED_STALE_SECONDS):
+        return market_feed.get_market_data(symbol)
     try:
-        open_orders = coindcx_client.get_open_orders(market=market)
-        return open_orders
+        order_book = coindcx_client.get_order_book(market=symbol)
+        book = order_books.get(symbol)
+        if book is None:
+            book = order_books[symbol] = OrderBook(symbol)
+        book.apply_snapshot(order_book)
+        last_price = float(order_book['last_traded_price'])
+        return last_price, book
     except Exception as e:
-        logging.error(f"Error fetching open orders: {e}")
-        return []
+        logging.error("Error fetching market data: %s", e, extra={'market': symbol})
+        raise
 
 
-def get_order_details(order_id):
-    try:
-        order_details = coindcx_client.get_order_details(order_id=order_id)
-        return order_details
-    except Exception as e:
-        logging.error(f"Error fetching order details for {order_id}: {e}")
-        return None
+def run_market_tick(state):
+    with TICK_LATENCY.labels(state.symbol).time():
+        streamed = market_feed is not None and market_feed.is_fresh(state.symbol, FEED_STALE_SECONDS)
+        last_price, book = fetch_market_data(state.symbol)
+        if recorder is not None:
+            recorder.record_book(state.symbol, time.time(), last_price, book)
+        if not streamed:
+            # Streamed trades feed the indicators directly; polled prices carry no volume
+            state.indicators.update(time.time(), last_price)
+        trader.tick(state, last_price)
+
+
+def sync_shard(scheduler, managed, configs):
+    # Follow lease changes: hand lost markets over, load taken-over ones from
+    # the journal and settle them against the exchange. Returns the configs
+    # this worker should trade. A lost market's lease is only released once
+    # it has been handed over here.
+    owned = set(coordinator.claim_owned())
+    for symbol in managed - owned:
+        state = scheduler.markets.get(symbol)
+        if state is not None:
+            trader.release_market(state)
+        coordinator.ack_released(symbol)
+        logging.info(f"Handed over {symbol}")
+    for symbol in sorted(owned - managed):
+        order_journal.load_market(symbol)
+        order_journal.reconcile(coindcx_client, [symbol])
+    managed.clear()
+    managed.update(owned)
+    return [config for config in configs if config.symbol in owned]
 
 
-def set_stop_loss_with_buffer(entry_price, side, quantity, buffer_amount):
+def main():
+    scheduler = MarketScheduler(feed=market_feed, poll_interval=POLL_INTERVAL, min_tick_interval=MIN_TICK_INTERVAL,
+                                on_added=order_journal.restore)
+    managed = set()  # Markets this worker holds leases for, when sharded
+
+    def record_trade(symbol, timestamp, price, quantity):
+        if recorder is not None:
+            recorder.record_trade(symbol, timestamp, price, quantity)
+        state = scheduler.markets.get(symbol)
+        if state is not None:
+            state.indicators.update(timestamp, price, quantity)
+
+    # Config edits, lease changes and order updates (e.g. a stop replaced by
+    # a background trailing move) wake the loop at once
+    config_cache.on_change(scheduler.signal)
+    order_journal.on_update(lambda record, previous_status: scheduler.signal())
+    if coordinator is not None:
+        coordinator.on_change(scheduler.signal)
+
+    start_metrics_server()
+    if recorder is not None:
+        recorder.start()
+    # Tables and columns added since the database was created, before anything reads them
+    upgrade_schema(engine)
+    config_cache.start()
+    # Settle the journal against the exchange before any market ticks. A
+    # sharded worker does this per market as it takes each one over.
+    if coordinator is None:
+        order_journal.start()
+        configs, _ = config_cache.get()
+        order_journal.reconcile(coindcx_client, [config.symbol for config in configs])
+    else:
+        order_journal.start(markets=[])
+        coordinator.start()
+    market_catalog.start()
     try:
-        if side == 'buy':
-            # For buy positions, SL is below the entry price
-            stop_price = entry_price - config.sl_amount
-            limit_price = stop_price - buffer_amount  # Buffer below stop price
-            sl_side = 'sell'
-        else:
-            # For sell positions, SL is above the entry price
-            stop_price = entry_price + config.sl_amount
-            limit_price = stop_price + buffer_amount  # Buffer above stop price
-            sl_side = 'buy'
-
-        # Attempt to place Stop Limit order
-        order_id = place_order(
-            market=config.symbol,
-            side=sl_side,
-            order_type='stop-limit',
-            price=limit_price,
-            quantity=quantity,
-            stop_price=stop_price
-        )
-
-        if order_id:
-            logging.info(f"Stop Limit order placed: Order ID = {order_id}, Stop Price = {stop_price}, Limit Price = {limit_price}")
-            return order_id
-        else:
-            logging.warning("Failed to place Stop Limit order. Retrying once.")
-            # Retry once
-            order_id = place_order(
-                market=config.symbol,
-                side=sl_side,
-                order_type='stop-limit',
-                price=limit_price,
-                quantity=quantity,
-                stop_price=stop_price
-            )
-            if order_id:
-                logging.info(f"Stop Limit order placed on retry: Order ID = {order_id}, Stop Price = {stop_price}, Limit Price = {limit_price}")
-                return order_id
-            else:
-                logging.warning("Failed to place Stop Limit order on retry. Placing Stop Market order.")
-                # Place Stop Market order as fallback
-                order_id = place_order(
-                    market=config.symbol,
-                    side=sl_side,
-                    order_type='market',
-                    price=None,  # Market order doesn't require price
-                    quantity=quantity
-                )
-                if order_id:
-                    logging.info(f"Stop Market order placed: Order ID = {order_id}")
-                    return order_id
-                else:
-                    logging.error("Failed to place Stop Market order.")
-                    return None
+        market_catalog.ensure_loaded()
     except Exception as e:
-        logging.error(f"Error setting stop-loss with buffer: {e}")
-        return None
-
-
-def main():
-    global sl_order_id, tsl_triggered, highest_price, lowest_price
-
-    highest_price = None
-    lowest_price = None
+        logging.error(f"Error loading market catalog: {e}")
+    portfolio.start()
+    start_market_feed()
+    if market_feed is not None:
+        scheduler.feed = market_feed
+        market_feed.on_trade(record_trade)
+        market_feed.on_update(scheduler.feed_updated)
 
     while True:
         try:
-            # Fetch current config and bot status
-            config = session.query(Config).first()
-            status = session.query(BotStatus).first()
+            # Current config and bot status, served from memory
+            configs, status = config_cache.get()
 
             if not status.running:
-                time.sleep(5)
+                # Wake as soon as the dashboard starts the bot
+                portfolio.set_active(False)
+                config_cache.wait_for_change(status.version, timeout=5)
                 continue
 
-            SYMBOL = config.symbol
-            SL_AMOUNT = config.sl_amount
-            TSL_STEP = config.tsl_step
-            TRADE_QUANTITY = config.trade_quantity  # In INR
-
-            current_time = get_current_time()
-            if is_within_session(current_time, config):
-                last_price, bids, asks = fetch_market_data(SYMBOL)
-
-                # Initialize highest and lowest price trackers
-                if highest_price is None or last_price > highest_price:
-                    highest_price = last_price
-                if lowest_price is None or last_price < lowest_price:
-                    lowest_price = last_price
-
-                # Example Strategy: Simple Price Threshold
-                BUY_THRESHOLD = 1000  # Example value; adjust as needed
-                SELL_THRESHOLD = 2000  # Example value; adjust as needed
-
-                open_orders = get_open_orders(SYMBOL)
-                current_position = False  # Spot trading on CoinDCX doesn't track positions like futures
-
-                # Example: Place Buy Order
-                if last_price <= BUY_THRESHOLD and not open_orders:
-                    order_id = place_order(
-                        market=SYMBOL,
-                        side='buy',
-                        order_type='limit',
-                        price=BUY_THRESHOLD,
-                        quantity=TRADE_QUANTITY
-                    )
-                    if order_id:
-                        sl_order_id = set_stop_loss_with_buffer(last_price, 'buy', TRADE_QUANTITY, buffer_amount=0.5)
-                        tsl_triggered = False  # Reset TSL trigger
-
-                # Example: Place Sell Order
-                elif last_price >= SELL_THRESHOLD and not open_orders:
-                    order_id = place_order(
-                        market=SYMBOL,
-                        side='sell',
-                        order_type='limit',
-                        price=SELL_THRESHOLD,
-                        quantity=TRADE_QUANTITY
-                    )
-                    if order_id:
-                        sl_order_id = set_stop_loss_with_buffer(last_price, 'sell', TRADE_QUANTITY, buffer_amount=0.5)
-                        tsl_triggered = False  # Reset TSL trigger
-
-                # Manage Trailing Stop Loss
-                if sl_order_id:
-                    order_details = get_order_details(sl_order_id)
-                    if order_details and order_details.get('status') == 'executed':
-                        logging.info(f"Stop loss order executed: {sl_order_id}")
-                        sl_order_id = None  # Reset after execution
-                        highest_price = None
-                        lowest_price = None
-                        tsl_triggered = False
-
-                # Implement Trailing Stop Loss Logic
-                # (This is a simplified example; adapt based on actual strategy)
-                if sl_order_id and not tsl_triggered:
-                    if config.symbol.startswith('BTC') or config.symbol.startswith('ETH'):
-                        # For buy positions: adjust SL upwards as price increases
-                        if last_price > highest_price:
-                            new_stop_price = last_price - config.tsl_step
-                            new_limit_price = new_stop_price - 0.5  # Buffer remains at $0.5
-                            # Attempt to cancel existing SL order
-                            if cancel_order(sl_order_id):
-                                # Place new SL order with updated prices
-                                new_order_id = set_stop_loss_with_buffer(last_price, 'buy', TRADE_QUANTITY, buffer_amount=0.5)
-                                if new_order_id:
-                                    sl_order_id = new_order_id
-                                    tsl_triggered = True
-                                    logging.info(f"Trailing Stop Loss updated: New SL Order ID = {sl_order_id}")
-                    # Implement similar logic for sell positions if applicable
-
-            else:
-                # Outside trading session; cancel all open orders
-                open_orders = get_open_orders(SYMBOL)
-                for order in open_orders:
-                    cancel_order(order['order_id'])
-
-            # Sleep for a defined interval before next iteration
-            time.sleep(60)  # Check every minute
+            loop_started = time.perf_counter()
+            if coordinator is not None:
+                configs = sync_shard(scheduler, managed, configs)
+            states = scheduler.sync(configs)
+
+            # Session opens and closes fire once, at the time computed for them
+            opened, closed = scheduler.session_changes(get_current_time())
+            if closed:
+                logging.info(f"Session closed for {', '.join(state.symbol for state in closed)}")
+                trader.close_session(closed)
+            for state in opened:
+                logging.info(f"Session opened for {state.symbol}")
+                scheduler.wake(state.symbol)
+            ensure_subscribed([state.symbol for state in states if state.in_session])
+
+            # One status request for all tracked orders; markets with fills tick
+            # now. Stop losses resting out of session are checked on reopen,
+            # and balances are not refreshed until then.
+            in_session = any(state.in_session for state in states)
+            portfolio.set_active(in_session)
+            if in_session:
+                trader.poll_orders()
+            for symbol in list(trader.order_events):
+                scheduler.wake(symbol)
+
+            # Serve every due (in-session) market once, round-robin, then wait
+            # for the next one or the next session change
+            for state in scheduler.due_markets():
+                if coordinator is not None and not coordinator.owns(state.symbol):
+                    continue  # Lost since sync_shard; handed over on the next pass
+                try:
+                    run_market_tick(state)
+                except Exception as e:
+                    TICK_ERRORS.labels(state.symbol).inc()
+                    logging.error("Unexpected error in %s: %s", state.symbol, e, extra={'market': state.symbol})
+                scheduler.mark_ticked(state)
+
+            LOOP_LATENCY.observe(time.perf_counter() - loop_started)
+            # Block until the next due market, session change or order status
+            # poll (orders are only polled in session), or a config, lease or
+            # stream wake-up
+            scheduler.wait(max_wait=trader.next_poll_in() if in_session else None)
 
         except Exception as e:
-            logging.error(f"Unexpected error: {e}")
+            logging.error("Unexpected error: %s", e)
             time.sleep(5)  # Wait before retrying
             continue
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,26 +1,58 @@
 # coindcx_client.py
 import hmac
 import hashlib
+import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlencode
 
+from metrics import API_QUEUE_WAIT, observe_request
+from rate_limiter import RequestRateLimiter, PRIORITY_PROTECTIVE, PRIORITY_TRADING, PRIORITY_MARKET_DATA
+
+try:
+    import orjson  # Optional: several times faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj):
+    # Compact JSON as bytes, exactly what is signed and sent
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
-class CoinDCXClient:
+class BaseCoinDCXClient:
     BASE_URL = 'https://api.coindcx.com'
 
-    def __init__(self, api_key, api_secret):
+    def __init__(self, api_key, api_secret, base_url=None, rate_limiter=None):
         self.api_key = api_key
         self.api_secret = api_secret
+        # Keyed once; each signature copies this state instead of re-deriving
+        # the HMAC key schedule from the secret
+        self._hmac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha256) if api_secret else None
+        if base_url:
+            self.BASE_URL = base_url.rstrip('/')
+        # Pass a shared RequestRateLimiter to pool budgets across clients
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RequestRateLimiter()
 
-    def _generate_signature(self, params):
-        query_string = urlencode(params)
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+    def _generate_signature(self, payload):
+        # payload: the exact bytes that go on the wire
+        if self._hmac is None:
+            raise ValueError('CoinDCX API secret is not configured')
+        mac = self._hmac.copy()
+        mac.update(payload)
+        return mac.hexdigest()
 
     def _get_headers(self):
         return {
@@ -28,76 +60,191 @@ class CoinDCXClient:
             'Content-Type': 'application/json'
         }
 
-    def get_markets(self):
-        url = f"{self.BASE_URL}/exchange/v1/markets"
-        response = requests.get(url, headers=self._get_headers())
-        return response.json()
+    def _sign_body(self, params):
+        # Serialize once: the JSON body is both what is signed and what is sent.
+        # The signature travels in the X-AUTH-SIGNATURE header.
+        params['timestamp'] = int(time.time())
+        body = json_dumps(params)
+        return body, {'X-AUTH-SIGNATURE': self._generate_signature(body)}
 
-    def get_order_book(self, market):
-        url = f"{self.BASE_URL}/exchange/v1/order_book"
-        params = {'market': market}
-        response = requests.get(url, headers=self._get_headers(), params=params)
-        return response.json()
+    def _sign_query(self, params):
+        # GET variant: the signed bytes are the query string itself
+        params['timestamp'] = int(time.time())
+        query = urlencode(params)
+        return query, {'X-AUTH-SIGNATURE': self._generate_signature(query.encode('utf-8'))}
 
-    def get_account_balance(self):
-        url = f"{self.BASE_URL}/exchange/v1/account_balance"
-        timestamp = int(time.time())
-        params = {'timestamp': timestamp}
-        signature = self._generate_signature(params)
-        params['signature'] = signature
-        response = requests.get(url, headers=self._get_headers(), params=params)
-        return response.json()
-
-    def place_order(self, market, side, order_type, price, quantity, stop_price=None):
-        url = f"{self.BASE_URL}/exchange/v1/place_order"
-        timestamp = int(time.time())
+    def _order_params(self, market, side, order_type, price, quantity, stop_price=None):
         params = {
             'market': market,
             'side': side,
             'type': order_type,
             'price': str(price),
             'quantity': str(quantity),
-            'timestamp': timestamp
         }
         if stop_price:
             params['stop_price'] = str(stop_price)
-        signature = self._generate_signature(params)
-        params['signature'] = signature
-        response = requests.post(url, headers=self._get_headers(), json=params)
-        return response.json()
+        return params
+
+
+class CoinDCXClient(BaseCoinDCXClient):
+
+    def __init__(self, api_key, api_secret, base_url=None, pool_size=10, connect_timeout=3.05,
+                 read_timeout=10, max_retries=3, backoff_factor=0.3, rate_limiter=None):
+        super().__init__(api_key, api_secret, base_url, rate_limiter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = self._build_session(pool_size, max_retries, backoff_factor)
+        self.executor = None
+
+    def _build_session(self, pool_size, max_retries, backoff_factor):
+        # Keep-alive connection pool shared by every call on this client.
+        # Only idempotent GETs are retried; order placement and cancels are
+        # never replayed automatically since a retry could double an order.
+        # A read timeout is not retried either: it surfaces as ReadTimeout
+        # after read_timeout instead of stalling the caller several times over.
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=False,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({k: v for k, v in self._get_headers().items() if v is not None})
+        return session
 
-    def cancel_order(self, order_id):
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _get(self, endpoint, url, params=None, priority=PRIORITY_MARKET_DATA, signed=False):
+        API_QUEUE_WAIT.labels(endpoint).observe(self.rate_limiter.acquire(endpoint, priority))
+        # Sign after queueing so the timestamp is fresh when the request leaves
+        headers = None
+        if signed:
+            query, headers = self._sign_query(params)
+            url, params = f"{url}?{query}", None
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            failed = response.status_code >= 400
+            return json_loads(response.content)
+        finally:
+            observe_request(endpoint, started, failed)
+
+    def _post(self, endpoint, url, params, priority=PRIORITY_TRADING, signed=False):
+        API_QUEUE_WAIT.labels(endpoint).observe(self.rate_limiter.acquire(endpoint, priority))
+        if signed:
+            body, headers = self._sign_body(params)
+        else:
+            body, headers = json_dumps(params), None
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
+            failed = response.status_code >= 400
+            return json_loads(response.content)
+        finally:
+            observe_request(endpoint, started, failed)
+
+    def get_markets(self):
+        # Market names only
+        url = f"{self.BASE_URL}/exchange/v1/markets"
+        return self._get('markets', url)
+
+    def get_markets_details(self):
+        # Every market with its currencies, precisions, step, limits and stream pair
+        url = f"{self.BASE_URL}/exchange/v1/markets_details"
+        return self._get('markets_details', url)
+
+    def get_order_book(self, market):
+        url = f"{self.BASE_URL}/exchange/v1/order_book"
+        params = {'market': market}
+        return self._get('order_book', url, params=params)
+
+    def get_account_balance(self):
+        url = f"{self.BASE_URL}/exchange/v1/account_balance"
+        params = {}
+        return self._get('account_balance', url, params=params, signed=True)
+
+    def place_order(self, market, side, order_type, price, quantity, stop_price=None, priority=PRIORITY_TRADING):
+        url = f"{self.BASE_URL}/exchange/v1/place_order"
+        params = self._order_params(market, side, order_type, price, quantity, stop_price)
+        return self._post('place_order', url, params, signed=True, priority=priority)
+
+    def cancel_order(self, order_id, priority=PRIORITY_PROTECTIVE):
         url = f"{self.BASE_URL}/exchange/v1/cancel_order"
-        timestamp = int(time.time())
-        params = {
-            'order_id': order_id,
-            'timestamp': timestamp
-        }
-        signature = self._generate_signature(params)
-        params['signature'] = signature
-        response = requests.post(url, headers=self._get_headers(), json=params)
-        return response.json()
+        params = {'order_id': order_id}
+        return self._post('cancel_order', url, params, signed=True, priority=priority)
+
+    def cancel_orders(self, order_ids, priority=PRIORITY_PROTECTIVE):
+        # Bulk cancel of many orders, in any market, in one request
+        url = f"{self.BASE_URL}/exchange/v1/orders/cancel_by_ids"
+        params = {'ids': list(order_ids)}
+        return self._post('cancel_orders', url, params, signed=True, priority=priority)
 
     def get_open_orders(self, market):
         url = f"{self.BASE_URL}/exchange/v1/open_orders"
-        timestamp = int(time.time())
-        params = {
-            'market': market,
-            'timestamp': timestamp
-        }
-        signature = self._generate_signature(params)
-        params['signature'] = signature
-        response = requests.get(url, headers=self._get_headers(), params=params)
-        return response.json()
+        params = {'market': market}
+        return self._get('open_orders', url, params=params, signed=True, priority=PRIORITY_TRADING)
 
     def get_order_details(self, order_id):
         url = f"{self.BASE_URL}/exchange/v1/order_details"
-        timestamp = int(time.time())
-        params = {
-            'order_id': order_id,
-            'timestamp': timestamp
-        }
-        signature = self._generate_signature(params)
-        params['signature'] = signature
-        response = requests.get(url, headers=self._get_headers(), params=params)
-        return response.json()
\ No newline at end of file
+        params = {'order_id': order_id}
+        return self._get('order_details', url, params=params, signed=True, priority=PRIORITY_TRADING)
+
+    def get_orders_status(self, order_ids):
+        # Bulk status lookup for many orders in one request
+        url = f"{self.BASE_URL}/exchange/v1/orders/status_multiple"
+        params = {'ids': list(order_ids)}
+        return self._post('orders_status', url, params, signed=True, priority=PRIORITY_TRADING)
+
+    def _attempt(self, call, *args):
+        try:
+            return call(*args)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def cancel_replace(self, order_id, market, side, order_type, price, quantity, stop_price=None,
+                       priority=PRIORITY_PROTECTIVE):
+        # Cancel `order_id` and place its replacement with both requests in
+        # flight at once rather than one round trip after the other. Returns
+        # (cancel_response, place_response).
+        # - A replacement rejected while the old order still held the balance
+        #   is placed again once the cancel is confirmed.
+        # - If the cancel failed (the old order may have filled), a replacement
+        #   that went through is withdrawn so the position is not covered twice.
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cancel-replace')
+        cancel = self.executor.submit(self._attempt, self.cancel_order, order_id, priority)
+        place = self.executor.submit(self._attempt, self.place_order, market, side, order_type, price, quantity,
+                                     stop_price, priority)
+        cancel_response = cancel.result()
+        place_response = place.result()
+        cancelled = cancel_response.get('status') == 'success'
+        placed = place_response.get('status') == 'success'
+        if cancelled and not placed:
+            place_response = self._attempt(self.place_order, market, side, order_type, price, quantity, stop_price, priority)
+        elif placed and not cancelled:
+            new_order_id = place_response.get('data', {}).get('order_id')
+            withdrawn = self._attempt(self.cancel_order, new_order_id, priority)
+            place_response = {
+                'status': 'error',
+                'message': f"Cancel of {order_id} failed; replacement {new_order_id} withdrawn",
+                'withdrawn': withdrawn.get('status') == 'success',
+                'data': {'order_id': new_order_id},
+            }
+        return cancel_response, place_response
@@ -0,0 +1,154 @@
+# config_cache.py
+import logging
+import select
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from models import Config, BotStatus
+
+CONFIG_CHANNEL = 'config_changed'
+
+
+def notify_config_changed(session, status):
+    # Call from any handler that edits Config/BotStatus, before committing.
+    # Bumps the version the workers compare against and, on Postgres, queues
+    # a NOTIFY that is delivered when the transaction commits.
+    status.version = type(status).version + 1  # Incremented in SQL, safe across web workers
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text("SELECT pg_notify(:channel, '')"), {'channel': CONFIG_CHANNEL})
+
+
+class ConfigCache:
+    # In-process copy of the enabled Config rows and BotStatus. The hot loop
+    # reads from memory; a background thread reloads when the version column
+    # moves (LISTEN/NOTIFY on Postgres, a cheap version poll elsewhere), when
+    # the TTL expires, or after invalidate().
+
+    def __init__(self, engine, poll_interval=0.5, ttl=300):
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self.configs = []
+        self.status = None
+        self.version = None
+        self.loaded_at = 0.0
+        self.condition = threading.Condition()
+        self.stale = threading.Event()
+        self.listeners = []
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.reload()
+        self.running = True
+        target = self._listen if self.engine.dialect.name == 'postgresql' else self._poll
+        self.thread = threading.Thread(target=target, name='config-cache', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.stale.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def get(self):
+        with self.condition:
+            return self.configs, self.status
+
+    def invalidate(self):
+        self.stale.set()
+
+    def on_change(self, callback):
+        # callback() after a reload that moved the version, on the reload thread
+        self.listeners.append(callback)
+
+    def reload(self):
+        with self.Session() as session:
+            configs = session.query(Config).filter(Config.enabled.is_(True)).order_by(Config.id).all()
+            status = session.query(BotStatus).first()
+            session.expunge_all()
+        with self.condition:
+            changed = self.version is not None and status.version != self.version
+            self.configs = configs
+            self.status = status
+            self.version = status.version
+            self.loaded_at = time.monotonic()
+            self.condition.notify_all()
+        if changed:
+            logging.info(f"Configuration reloaded at version {self.version}")
+            for callback in self.listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Error in configuration listener: {e}")
+
+    def wait_for_change(self, version, timeout):
+        # Block until the cached version differs from `version`
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.version == version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.version
+
+    def _read_version(self):
+        with self.engine.connect() as connection:
+            return connection.execute(text("SELECT version FROM bot_status ORDER BY id LIMIT 1")).scalar()
+
+    def _due(self):
+        return self.stale.is_set() or time.monotonic() - self.loaded_at >= self.ttl
+
+    def _safe_reload(self):
+        self.stale.clear()
+        try:
+            self.reload()
+        except Exception as e:
+            logging.error(f"Error reloading configuration: {e}")
+            self.stale.set()
+
+    def _poll(self):
+        # SQLite (and any other backend without NOTIFY): poll the version column
+        while self.running:
+            self.stale.wait(self.poll_interval)
+            if not self.running:
+                break
+            try:
+                if self._read_version() != self.version:
+                    self.stale.set()
+            except Exception as e:
+                logging.error(f"Error polling configuration version: {e}")
+            if self._due():
+                self._safe_reload()
+
+    def _listen(self):
+        # Postgres: block on LISTEN so edits arrive within milliseconds
+        while self.running:
+            try:
+                connection = self.engine.raw_connection()
+                connection.detach()  # Dedicated autocommit connection, never returned to the pool
+                try:
+                    dbapi_connection = connection.dbapi_connection
+                    dbapi_connection.set_isolation_level(0)  # autocommit, required for LISTEN
+                    cursor = dbapi_connection.cursor()
+                    cursor.execute(f"LISTEN {CONFIG_CHANNEL}")
+                    # Catch anything committed before LISTEN took effect
+                    self.stale.set()
+                    while self.running:
+                        if self._due():
+                            self._safe_reload()
+                        if select.select([dbapi_connection], [], [], self.poll_interval) != ([], [], []):
+                            dbapi_connection.poll()
+                            if dbapi_connection.notifies:
+                                dbapi_connection.notifies.clear()
+                                self.stale.set()
+                finally:
+                    connection.close()
+            except Exception as e:
+                logging.error(f"Configuration listener error: {e}")
+                time.sleep(self.poll_interval)
@@ -0,0 +1,190 @@
+# fake_exchange.py
+import json
+import logging
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from backtest import SimulatedExchange
+
+# Path -> (endpoint name as used by the client's rate limiter, HTTP method)
+ROUTES = {
+    '/exchange/v1/markets': ('markets', 'GET'),
+    '/exchange/v1/markets_details': ('markets_details', 'GET'),
+    '/exchange/v1/order_book': ('order_book', 'GET'),
+    '/exchange/v1/account_balance': ('account_balance', 'GET'),
+    '/exchange/v1/open_orders': ('open_orders', 'GET'),
+    '/exchange/v1/order_details': ('order_details', 'GET'),
+    '/exchange/v1/place_order': ('place_order', 'POST'),
+    '/exchange/v1/cancel_order': ('cancel_order', 'POST'),
+    '/exchange/v1/orders/status_multiple': ('orders_status', 'POST'),
+    '/exchange/v1/orders/cancel_by_ids': ('cancel_orders', 'POST'),
+}
+
+
+class FakeCoinDCX:
+    # Local stand-in for the CoinDCX REST API, served over HTTP from a daemon
+    # thread so CoinDCXClient / AsyncCoinDCXClient run unmodified against it
+    # (pass base_url). Orders are matched by backtest.SimulatedExchange
+    # against prices set with set_price().
+    #
+    # latency / jitter: seconds added to every response (uniform jitter on top)
+    # endpoint_latency: per-endpoint override of latency
+    # error_rate: fraction of requests answered with error_status
+    # endpoint_errors: per-endpoint override of error_rate
+    # Settings may be changed while the server runs.
+
+    def __init__(self, prices=None, initial_cash=1e9, fee_rate=0.0, latency=0.0, jitter=0.0, endpoint_latency=None,
+                 error_rate=0.0, endpoint_errors=None, error_status=500, seed=None):
+        self.exchange = SimulatedExchange(fee_rate=fee_rate, initial_cash=initial_cash)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.jitter = jitter
+        self.endpoint_latency = dict(endpoint_latency or {})
+        self.error_rate = error_rate
+        self.endpoint_errors = dict(endpoint_errors or {})
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.requests = {}
+        self.errors = {}
+        self.server = None
+        self.thread = None
+        for market, price in (prices or {}).items():
+            self.set_price(market, price)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host='127.0.0.1', port=0):
+        handler = type('FakeCoinDCXHandler', (_FakeHandler,), {'fake': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-coindcx', daemon=True)
+        self.thread.start()
+        logging.info(f"Fake CoinDCX listening on {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def set_price(self, market, price):
+        # Moves the market and fills any resting orders the price crosses
+        with self.lock:
+            self.exchange.set_market_price(market, time.time(), float(price))
+
+    def stats(self):
+        with self.lock:
+            return {'requests': dict(self.requests), 'errors': dict(self.errors)}
+
+    def _delay(self, endpoint):
+        delay = self.endpoint_latency.get(endpoint, self.latency)
+        if self.jitter:
+            delay += self.random.uniform(0, self.jitter)
+        return delay
+
+    def _fails(self, endpoint):
+        rate = self.endpoint_errors.get(endpoint, self.error_rate)
+        return rate > 0 and self.random.random() < rate
+
+    def handle(self, endpoint, params):
+        # Returns (status, body) for one request
+        delay = self._delay(endpoint)
+        if delay > 0:
+            time.sleep(delay)
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if self._fails(endpoint):
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                return self.error_status, {'status': 'error', 'message': 'injected failure'}
+            return 200, self._dispatch(endpoint, params)
+
+    def _dispatch(self, endpoint, params):
+        exchange = self.exchange
+        if endpoint == 'markets':
+            return exchange.get_markets()
+        if endpoint == 'markets_details':
+            return exchange.get_markets_details()
+        if endpoint == 'order_book':
+            market = params.get('market')
+            if market not in exchange.prices:
+                return {'status': 'error', 'message': f"unknown market {market}"}
+            price = exchange.prices[market]
+            book = exchange.get_order_book(market)
+            book['bids'] = {str(round(price * 0.999, 8)): '1.0'}
+            book['asks'] = {str(round(price * 1.001, 8)): '1.0'}
+            return book
+        if endpoint == 'account_balance':
+            return exchange.get_account_balance()
+        if endpoint == 'open_orders':
+            return exchange.get_open_orders(params.get('market'))
+        if endpoint == 'order_details':
+            return exchange.get_order_details(params.get('order_id')) or {'status': 'error', 'message': 'not found'}
+        if endpoint == 'place_order':
+            if params.get('market') not in exchange.prices:
+                return {'status': 'error', 'message': f"unknown market {params.get('market')}"}
+            price = params.get('price')
+            return exchange.place_order(params['market'], params['side'], params['type'],
+                                        float(price) if price not in (None, 'None') else None,
+                                        params['quantity'], params.get('stop_price'))
+        if endpoint == 'cancel_order':
+            return exchange.cancel_order(params.get('order_id'))
+        if endpoint == 'cancel_orders':
+            return exchange.cancel_orders(params.get('ids') or [])
+        if endpoint == 'orders_status':
+            return exchange.get_orders_status(params.get('ids') or [])
+        return {'status': 'error', 'message': f"unsupported endpoint {endpoint}"}
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API behind the client's pool
+    fake = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, delayed
+        # ACKs add ~40 ms to every response and swamp what is being measured
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _serve(self, method):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path)
+        if method == 'POST':
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            params = json.loads(raw) if raw else {}
+        else:
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if route is None or route[1] != method:
+            status, body = 404, {'status': 'error', 'message': f"no route for {method} {url.path}"}
+        else:
+            status, body = self.fake.handle(route[0], params)
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_POST(self):
+        self._serve('POST')
+
+    def log_message(self, format, *args):
+        pass
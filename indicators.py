@@ -0,0 +1,142 @@
+# indicators.py
+import math
+
+import numpy as np
+
+# Column layout of CandleBuffer.data
+START, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+class CandleBuffer:
+    # Fixed-size ring buffer of OHLCV bars built from ticks. Memory is
+    # allocated once; the oldest bar is overwritten when the buffer is full.
+
+    def __init__(self, interval=60, size=500):
+        self.interval = interval
+        self.size = size
+        self.data = np.zeros((size, 6), dtype=np.float64)
+        self.head = -1  # Row of the bar currently being built
+        self.count = 0
+
+    def update(self, timestamp, price, volume=0.0):
+        # Returns the bar that was closed by this tick (a row copy), or None
+        bar_start = timestamp - timestamp % self.interval
+        closed = None
+        if self.count == 0 or bar_start > self.data[self.head, START]:
+            if self.count:
+                closed = self.data[self.head].copy()
+            self.head = (self.head + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+            row = self.data[self.head]
+            row[START] = bar_start
+            row[OPEN] = row[HIGH] = row[LOW] = row[CLOSE] = price
+            row[VOLUME] = volume
+        else:
+            row = self.data[self.head]
+            if price > row[HIGH]:
+                row[HIGH] = price
+            if price < row[LOW]:
+                row[LOW] = price
+            row[CLOSE] = price
+            row[VOLUME] += volume
+        return closed
+
+    @property
+    def current(self):
+        return self.data[self.head] if self.count else None
+
+    def last(self, n=None):
+        # The most recent n bars in chronological order (copy), for analysis
+        n = self.count if n is None else min(n, self.count)
+        end = self.head + 1
+        start = end - n
+        if start >= 0:
+            return self.data[start:end].copy()
+        return np.concatenate((self.data[start:], self.data[:end]))
+
+
+class ATR:
+    # Wilder's Average True Range, updated once per closed bar
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self.prev_close = None
+        self.seed_sum = 0.0
+        self.seed_count = 0
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        if self.value is None:
+            self.seed_sum += true_range
+            self.seed_count += 1
+            if self.seed_count == self.period:
+                self.value = self.seed_sum / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+
+class EMA:
+    def __init__(self, period=20):
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, price):
+        if self.value is None:
+            self.value = price
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class VWAP:
+    # Volume-weighted average price anchored to `anchor` seconds (a UTC day by
+    # default), updated per tick from traded volume
+
+    def __init__(self, anchor=86400):
+        self.anchor = anchor
+        self.anchor_start = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def update(self, timestamp, price, volume):
+        anchor_start = timestamp - timestamp % self.anchor
+        if anchor_start != self.anchor_start:
+            self.anchor_start = anchor_start
+            self.price_volume = 0.0
+            self.volume = 0.0
+        if volume > 0:
+            self.price_volume += price * volume
+            self.volume += volume
+
+    @property
+    def value(self):
+        return self.price_volume / self.volume if self.volume else None
+
+
+class IndicatorSet:
+    # Per-market indicator stage: ticks in, O(1) work per tick/bar, latest
+    # values out. Bars are only used for ATR/EMA; VWAP follows every trade.
+
+    def __init__(self, interval=60, size=500, atr_period=14, ema_period=20, vwap_anchor=86400):
+        self.candles = CandleBuffer(interval, size)
+        self.atr = ATR(atr_period)
+        self.ema = EMA(ema_period)
+        self.vwap = VWAP(vwap_anchor)
+
+    def update(self, timestamp, price, volume=0.0):
+        if not math.isfinite(price):
+            return
+        closed = self.candles.update(timestamp, price, volume)
+        if closed is not None:
+            self.atr.update(closed[HIGH], closed[LOW], closed[CLOSE])
+            self.ema.update(closed[CLOSE])
+        self.vwap.update(timestamp, price, volume)
+
+    def snapshot(self):
+        return {'atr': self.atr.value, 'ema': self.ema.value, 'vwap': self.vwap.value}
@@ -0,0 +1,159 @@
+# log_writer.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+# Attributes every LogRecord has; anything else was passed via extra= and is
+# written as a field of the JSON line
+STANDARD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+_STOP = object()
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line: time, level, logger, thread, message, any
+    # extra= fields (order_id, price, latency_ms, ...) and the traceback if any
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    # Enqueues the LogRecord untouched. The stock QueueHandler formats the
+    # message in the calling thread; here %-formatting, JSON encoding and the
+    # file write all happen on the writer thread. A full queue drops the
+    # record instead of blocking the trading loop.
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    # Writes a batch of records with one write/flush and checks for rotation
+    # once per batch rather than formatting every record twice to size it
+
+    def write_batch(self, records):
+        lines = []
+        for record in records:
+            if record.levelno < self.level:
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write('\n'.join(lines) + '\n')
+            self.stream.flush()
+            if self.maxBytes > 0 and self.stream.tell() >= self.maxBytes:
+                self.doRollover()
+        finally:
+            self.release()
+
+
+class BackgroundLogWriter:
+    # Drains the log queue on a daemon thread, up to batch_size records per write
+
+    def __init__(self, log_queue, handler, batch_size=256, flush_interval=0.2):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # Flush what is queued and close the file
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join(timeout=5)
+        self.thread = None
+        self.handler.close()
+
+    def _run(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stopping = record is _STOP
+            batch = [] if stopping else [record]
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                else:
+                    batch.append(record)
+            if batch:
+                self.handler.write_batch(batch)
+            if stopping:
+                return
+
+
+def configure_logging(filename, level=logging.INFO, max_bytes=None, backup_count=None, queue_size=None,
+                      text_format=None):
+    # Replace the process's log handlers with a bounded queue feeding a
+    # background writer. LOG_MAX_BYTES / LOG_BACKUP_COUNT control rotation,
+    # LOG_QUEUE_SIZE the queue bound and LOG_FORMAT=text restores plain lines.
+    max_bytes = int(os.getenv('LOG_MAX_BYTES', 50 * 1024 * 1024)) if max_bytes is None else max_bytes
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', 5)) if backup_count is None else backup_count
+    queue_size = int(os.getenv('LOG_QUEUE_SIZE', 10000)) if queue_size is None else queue_size
+    if text_format is None:
+        text_format = os.getenv('LOG_FORMAT', 'json') == 'text'
+
+    file_handler = BatchRotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    file_handler.setLevel(level)
+    if text_format:
+        file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    else:
+        file_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DeferredQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    writer = BackgroundLogWriter(log_queue, file_handler)
+    writer.start()
+    atexit.register(writer.stop)
+    return queue_handler, writer
@@ -0,0 +1,165 @@
+# market_catalog.py
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+
+class MarketInfo:
+    # Trading rules for one market, parsed once from its markets_details entry
+    __slots__ = ('symbol', 'pair', 'status', 'base_currency', 'quote_currency', 'tick_size', 'quantity_step',
+                 'min_quantity', 'max_quantity', 'min_notional', 'price_precision', 'quantity_precision')
+
+    def __init__(self, market):
+        self.symbol = market.get('market') or market.get('coindcx_name') or market.get('symbol')
+        self.pair = market.get('pair')
+        self.status = market.get('status')
+        # CoinDCX calls the traded coin the target and the pricing currency the base
+        self.base_currency = market.get('target_currency_short_name')
+        self.quote_currency = market.get('base_currency_short_name')
+        self.price_precision = _int_or_none(market.get('base_currency_precision'))
+        self.quantity_precision = _int_or_none(market.get('target_currency_precision'))
+        self.tick_size = _float_or_none(market.get('tick_size'))
+        if self.tick_size is None and self.price_precision is not None:
+            self.tick_size = 10 ** -self.price_precision
+        self.quantity_step = _float_or_none(market.get('step'))
+        if self.quantity_step is None and self.quantity_precision is not None:
+            self.quantity_step = 10 ** -self.quantity_precision
+        self.min_quantity = _float_or_none(market.get('min_quantity'))
+        self.max_quantity = _float_or_none(market.get('max_quantity'))
+        self.min_notional = _float_or_none(market.get('min_notional'))
+
+    @property
+    def active(self):
+        return self.status == 'active'
+
+    def round_price(self, price):
+        if price is None or not self.tick_size:
+            return price
+        return round(round(price / self.tick_size) * self.tick_size, self.price_precision or 8)
+
+    def round_quantity(self, quantity):
+        # Always round quantities down so we never exceed what we meant to trade
+        if not self.quantity_step:
+            return quantity
+        steps = math.floor(quantity / self.quantity_step + 1e-9)
+        return round(steps * self.quantity_step, self.quantity_precision or 8)
+
+    def validate(self, price, quantity):
+        # Returns an error message, or None when the order fits the market rules
+        if not self.active:
+            return f"market {self.symbol} is {self.status}"
+        if self.min_quantity is not None and quantity < self.min_quantity:
+            return f"quantity {quantity} below minimum {self.min_quantity}"
+        if self.max_quantity is not None and quantity > self.max_quantity:
+            return f"quantity {quantity} above maximum {self.max_quantity}"
+        if price is not None and self.min_notional is not None and price * quantity < self.min_notional:
+            return f"order value {price * quantity} below minimum {self.min_notional}"
+        return None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _float_or_none(value):
+    return float(value) if value not in (None, '') else None
+
+
+def _int_or_none(value):
+    return int(value) if value not in (None, '') else None
+
+
+class MarketCatalog:
+    # Shared cache of the exchange's markets_details listing. Refreshed in the
+    # background every `ttl` seconds; an optional JSON snapshot on disk lets a
+    # freshly started process serve the catalog before its first refresh.
+
+    def __init__(self, client, ttl=300, snapshot_path=None):
+        self.client = client
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.markets = {}
+        self.active = []
+        self.loaded_at = None
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.load_snapshot()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='market-catalog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        # Refresh immediately unless the snapshot is still fresh
+        if self.loaded_at is not None:
+            time.sleep(max(0, self.ttl - (time.time() - self.loaded_at)))
+        while self.running:
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing market catalog: {e}")
+            time.sleep(self.ttl)
+
+    def _install(self, markets, loaded_at):
+        infos = {}
+        for market in markets:
+            if isinstance(market, dict):
+                info = MarketInfo(market)
+                if info.symbol:
+                    infos[info.symbol] = info
+        if not infos:
+            logging.error(f"Market catalog is empty: none of the {len(markets)} entries are market details")
+        active = sorted(symbol for symbol, info in infos.items() if info.active)
+        with self.lock:
+            self.markets = infos
+            self.active = active
+            self.loaded_at = loaded_at
+
+    def refresh(self):
+        # /markets only lists names; the trading rules are in markets_details
+        markets = self.client.get_markets_details()
+        self._install(markets, time.time())
+        self.save_snapshot(markets)
+        logging.info(f"Market catalog refreshed: {len(self.active)} active markets")
+
+    def load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            self._install(snapshot['markets'], snapshot['saved_at'])
+            return True
+        except Exception as e:
+            logging.error(f"Error loading market snapshot {self.snapshot_path}: {e}")
+            return False
+
+    def save_snapshot(self, markets):
+        if not self.snapshot_path:
+            return
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'saved_at': time.time(), 'markets': markets}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logging.error(f"Error saving market snapshot {self.snapshot_path}: {e}")
+
+    def ensure_loaded(self):
+        # Blocking refresh for callers that cannot work with an empty catalog
+        if self.loaded_at is None:
+            self.refresh()
+
+    def active_symbols(self):
+        return self.active
+
+    def get(self, symbol):
+        return self.markets.get(symbol)
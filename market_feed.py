@@ -0,0 +1,265 @@
+# market_feed.py
+import json
+import queue
+import logging
+import threading
+import time
+
+from order_book import OrderBook
+
+COINDCX_STREAM_URL = 'wss://stream.coindcx.com'
+
+
+class FeedTransport:
+    # Source of raw market events. recv() returns (event, data) or None when
+    # nothing arrived within the timeout. Implementations must be thread-safe
+    # between subscribe() and recv().
+
+    def connect(self):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        raise NotImplementedError
+
+    def recv(self, timeout=1.0):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FakeTransport(FeedTransport):
+    # In-process feed for tests and local runs: push() events, the feed reads them
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.channels = set()
+
+    def connect(self):
+        pass
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+
+    def push(self, event, data):
+        self.events.put((event, data))
+
+    def recv(self, timeout=1.0):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SocketIOTransport(FeedTransport):
+    # CoinDCX public stream (Socket.IO). Incoming events are queued by the
+    # socketio callback thread and drained by MarketFeed's reader thread.
+    EVENTS = ('depth-update', 'new-trade')
+
+    def __init__(self, url=COINDCX_STREAM_URL):
+        import socketio
+
+        self.url = url
+        self.events = queue.Queue()
+        self.channels = set()
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on('connect', self._on_connect)
+        for event in self.EVENTS:
+            self.sio.on(event, self._make_handler(event))
+
+    def _make_handler(self, event):
+        def handler(payload):
+            data = payload.get('data', payload) if isinstance(payload, dict) else payload
+            if isinstance(data, str):
+                data = json.loads(data)
+            self.events.put((event, data))
+        return handler
+
+    def _on_connect(self):
+        # Re-join every channel after (re)connects
+        for channel in list(self.channels):
+            self.sio.emit('join', {'channelName': channel})
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'])
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+        if self.sio.connected:
+            self.sio.emit('join', {'channelName': channel})
+
+    def recv(self, timeout=1.0):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.sio.disconnect()
+
+
+class MarketFeed:
+    # Push-based market data. Keeps a compact OrderBook and last traded
+    # price per symbol, seeded from one REST snapshot and then maintained from
+    # incremental depth and trade events.
+
+    def __init__(self, transport, client=None):
+        self.transport = transport
+        self.client = client
+        self.books = {}
+        self.last_prices = {}
+        self.updated_at = {}
+        self.sequence = {}
+        self.version = 0
+        self.channels = {}
+        self.callbacks = []
+        self.trade_callbacks = []
+        self.update_callbacks = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        self.transport.connect()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='market-feed', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.transport.close()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def on_tick(self, callback):
+        # callback(symbol, last_price) runs on the feed thread; keep it cheap
+        self.callbacks.append(callback)
+
+    def on_trade(self, callback):
+        # callback(symbol, timestamp, price, quantity) for every trade print, on the feed thread
+        self.trade_callbacks.append(callback)
+
+    def on_update(self, callback):
+        # callback(symbol) after every book or price change, on the feed thread
+        # with the feed locked; keep it to setting a flag
+        self.update_callbacks.append(callback)
+
+    def subscribe(self, symbol, channel=None):
+        channel = channel or symbol
+        with self.condition:
+            if symbol in self.books:
+                return
+            self.books[symbol] = OrderBook(symbol)
+            self.sequence[symbol] = 0
+            self.channels[channel] = symbol
+        if self.client is not None:
+            try:
+                self.apply_snapshot(symbol, self.client.get_order_book(market=symbol))
+            except Exception as e:
+                logging.error(f"Error seeding order book for {symbol}: {e}")
+        self.transport.subscribe(channel)
+
+    def _run(self):
+        while self.running:
+            try:
+                message = self.transport.recv(timeout=1.0)
+                if message is not None:
+                    self.dispatch(*message)
+            except Exception as e:
+                logging.error(f"Market feed error: {e}")
+
+    def _symbol_for(self, data):
+        key = data.get('s') or data.get('channel') or data.get('market')
+        if key in self.books:
+            return key
+        return self.channels.get(key)
+
+    def dispatch(self, event, data):
+        symbol = self._symbol_for(data)
+        if symbol is None:
+            return
+        if event == 'depth-snapshot':
+            self.apply_snapshot(symbol, data)
+        elif event == 'depth-update':
+            self.apply_depth(symbol, data)
+        elif event == 'new-trade':
+            self.apply_trade(symbol, data)
+
+    def apply_snapshot(self, symbol, data):
+        with self.condition:
+            book = self.books.get(symbol)
+            if book is None:
+                book = self.books[symbol] = OrderBook(symbol)
+            book.apply_snapshot(data)
+            if data.get('last_traded_price') is not None:
+                self._set_price(symbol, float(data['last_traded_price']))
+            else:
+                self._touch(symbol)
+
+    def apply_depth(self, symbol, data):
+        with self.condition:
+            self.books[symbol].apply_delta(data)
+            self._touch(symbol)
+
+    def apply_trade(self, symbol, data):
+        price = float(data['p'])
+        with self.condition:
+            self._set_price(symbol, price)
+        timestamp = float(data['T']) / 1000 if data.get('T') else time.time()
+        quantity = float(data.get('q') or 0)
+        for callback in self.trade_callbacks:
+            try:
+                callback(symbol, timestamp, price, quantity)
+            except Exception as e:
+                logging.error(f"Market feed trade callback error: {e}")
+
+    def _set_price(self, symbol, price):
+        self.last_prices[symbol] = price
+        self._touch(symbol)
+        for callback in self.callbacks:
+            try:
+                callback(symbol, price)
+            except Exception as e:
+                logging.error(f"Market feed callback error: {e}")
+
+    def _touch(self, symbol):
+        self.updated_at[symbol] = time.monotonic()
+        self.sequence[symbol] = self.sequence.get(symbol, 0) + 1
+        self.version += 1
+        self.condition.notify_all()
+        for callback in self.update_callbacks:
+            try:
+                callback(symbol)
+            except Exception as e:
+                logging.error(f"Market feed update callback error: {e}")
+
+    def is_fresh(self, symbol, max_age):
+        updated_at = self.updated_at.get(symbol)
+        return (symbol in self.last_prices and updated_at is not None
+                and time.monotonic() - updated_at <= max_age)
+
+    def get_market_data(self, symbol):
+        # Same shape as bot.fetch_market_data: (last_price, OrderBook), the
+        # book copied so the caller can read it while the feed moves on
+        with self.condition:
+            return self.last_prices[symbol], self.books[symbol].copy()
+
+    def best_bid(self, symbol):
+        with self.condition:
+            return self.books[symbol].best_bid()
+
+    def best_ask(self, symbol):
+        with self.condition:
+            return self.books[symbol].best_ask()
+
+    def wait_for_update(self, symbol, since, timeout):
+        # Block until symbol's sequence moves past `since`; returns the new sequence.
+        # Several events arriving while the caller was busy collapse into one wake-up.
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.sequence.get(symbol, 0) <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.sequence.get(symbol, 0)
@@ -0,0 +1,39 @@
+# market_state.py
+from indicators import IndicatorSet
+
+class MarketState:
+    # Trading state for one market. One instance per enabled Config row
+    # replaces the old module-level sl_order_id / tsl_triggered /
+    # highest_price / lowest_price globals in bot.py.
+
+    def __init__(self, config):
+        self.symbol = config.symbol
+        self.config = config
+        self.entry_order_id = None
+        self.sl_order_id = None
+        self.tsl_triggered = False
+        self.unprotected = False  # Restored with a filled entry but no live stop loss
+        self.highest_price = None
+        self.lowest_price = None
+        self.feed_sequence = 0
+        self.last_tick_at = 0.0
+        self.in_session = None  # Unknown until the scheduler first checks the session
+        self.session_change_at = None  # UTC time in_session next flips
+        self.session_hours = None  # (session_start, session_end) session_change_at was computed for
+        self.indicators = IndicatorSet()
+
+    def update_extremes(self, last_price):
+        # Returns the high before this price was applied, for trailing decisions
+        previous_high = self.highest_price
+        if self.highest_price is None or last_price > self.highest_price:
+            self.highest_price = last_price
+        if self.lowest_price is None or last_price < self.lowest_price:
+            self.lowest_price = last_price
+        return previous_high
+
+    def reset_stop_loss(self):
+        self.entry_order_id = None
+        self.sl_order_id = None
+        self.highest_price = None
+        self.lowest_price = None
+        self.tsl_triggered = False
@@ -0,0 +1,235 @@
+# metrics.py
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from sub-millisecond bookkeeping to slow REST calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _CounterChild:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Metric:
+    # A named metric with optional labels. Each label combination gets one
+    # child holding preallocated counters, created on first use and reused
+    # for every later observation.
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            self.children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def _label_text(self, values, extra=''):
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self.children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self.children[()].inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_text(values)} {child.value}"]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.children[()].set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.children[()].observe(value)
+
+    def time(self):
+        return self.children[()].time()
+
+    def _render_child(self, values, child):
+        with child.lock:
+            counts = list(child.counts)
+            total, count = child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            labels = self._label_text(values, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values)} {total}")
+        lines.append(f"{self.name}_count{self._label_text(values)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+
+    def add_collector(self, collector):
+        # collector() runs before each scrape, to refresh gauges read from other components
+        self.collectors.append(collector)
+
+    def render(self):
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                logging.error(f"Error in metrics collector: {e}")
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics)
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Exchange API
+API_LATENCY = Histogram('coindcx_request_seconds', 'CoinDCX REST call latency', ['endpoint'])
+API_ERRORS = Counter('coindcx_request_errors_total', 'CoinDCX REST calls that raised or returned an HTTP error', ['endpoint'])
+API_QUEUE_WAIT = Histogram('coindcx_rate_limit_wait_seconds', 'Time spent queued in the request rate limiter', ['endpoint'])
+
+# Worker loop
+TICK_LATENCY = Histogram('bot_tick_seconds', 'Duration of one market tick', ['market'])
+LOOP_LATENCY = Histogram('bot_loop_seconds', 'Duration of one worker loop pass, excluding the idle wait')
+SIGNAL_TO_ORDER = Histogram('bot_signal_to_order_seconds', 'From tick start to the entry order being acknowledged', ['market'])
+SL_UPDATE_LATENCY = Histogram('bot_sl_update_seconds', 'Unprotected window of a trailing stop-loss move', ['market'])
+TICK_ERRORS = Counter('bot_tick_errors_total', 'Ticks that ended in an unexpected error', ['market'])
+RATE_LIMIT_QUEUED = Gauge('coindcx_rate_limit_queued', 'Requests waiting in the rate limiter')
+OPEN_ORDERS = Gauge('bot_open_orders', 'Orders the journal is tracking as open')
+LOG_DROPPED = Gauge('log_records_dropped', 'Log records dropped because the log queue was full')
+RISK_REJECTED = Counter('bot_risk_rejected_total', 'Orders blocked by the pre-trade balance and exposure check', ['market'])
+OWNED_MARKETS = Gauge('bot_owned_markets', 'Markets this worker holds the shard lease for')
+SHARD_LEADER = Gauge('bot_shard_leader', '1 while this worker holds the leader lease')
+TSL_COALESCED = Counter('bot_tsl_coalesced_total', 'Trailing stop moves superseded before they were sent')
+
+
+def observe_request(endpoint, started, failed):
+    API_LATENCY.labels(endpoint).observe(time.perf_counter() - started)
+    if failed:
+        API_ERRORS.labels(endpoint).inc()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+def start_http_server(port, host='0.0.0.0', registry=None):
+    # Serve /metrics from a daemon thread, for processes without a web app
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry or REGISTRY})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True)
+    thread.start()
+    logging.info(f"Serving metrics on {host}:{port}/metrics")
+    return server
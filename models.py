@@ -1,4 +1,6 @@
 # models.py
+from datetime import datetime
+
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
@@ -6,14 +8,65 @@ db = SQLAlchemy()
 
 class Config(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    symbol = db.Column(db.String(20), nullable=False, default='BTCINR')  # Updated default symbol for CoinDCX
+    symbol = db.Column(db.String(20), nullable=False, unique=True, default='BTCINR')  # Updated default symbol for CoinDCX
     session_start = db.Column(db.Time, nullable=False, default='08:00:00')
     session_end = db.Column(db.Time, nullable=False, default='05:00:00')
     sl_amount = db.Column(db.Float, nullable=False, default=25.0)  # Stop Loss amount in INR
     tsl_step = db.Column(db.Float, nullable=False, default=10.0)    # Trailing Stop Loss step in INR
     trade_quantity = db.Column(db.Float, nullable=False, default=1000.0)  # Trade quantity in INR
+    enabled = db.Column(db.Boolean, nullable=False, default=True)  # One row per traded market
 
 
 class BotStatus(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    running = db.Column(db.Boolean, nullable=False, default=False)
\ No newline at end of file
+    running = db.Column(db.Boolean, nullable=False, default=False)
+    version = db.Column(db.Integer, nullable=False, default=0)  # Bumped on every config/status edit
+
+
+class OrderRecord(db.Model):
+    # Journal of every order the worker placed or adopted; see order_journal.py
+    order_id = db.Column(db.String(64), primary_key=True)
+    market = db.Column(db.String(20), nullable=False)
+    role = db.Column(db.String(16), nullable=False, default='entry')  # entry, stop_loss or external
+    side = db.Column(db.String(4), nullable=False)
+    order_type = db.Column(db.String(16), nullable=False)
+    price = db.Column(db.Float, nullable=True)
+    stop_price = db.Column(db.Float, nullable=True)
+    quantity = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='new')  # new, open, partially_filled, filled or cancelled
+    filled_quantity = db.Column(db.Float, nullable=False, default=0.0)
+    avg_price = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_order_record_market_status', 'market', 'status'),)
+
+
+class PositionRecord(db.Model):
+    # Per-market stop-loss / trailing state that used to live in bot.py globals
+    market = db.Column(db.String(20), primary_key=True)
+    entry_order_id = db.Column(db.String(64), nullable=True)
+    sl_order_id = db.Column(db.String(64), nullable=True)
+    tsl_triggered = db.Column(db.Boolean, nullable=False, default=False)
+    highest_price = db.Column(db.Float, nullable=True)
+    lowest_price = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ShardWorker(db.Model):
+    # Live bot workers; a row whose heartbeat is older than the lease TTL is dead. See sharding.py
+    worker_id = db.Column(db.String(128), primary_key=True)
+    hostname = db.Column(db.String(128), nullable=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ShardLease(db.Model):
+    # One row per market, plus the leader lease. assigned_to is written by the
+    # leader; owner holds the lease until expires_at unless renewed.
+    name = db.Column(db.String(64), primary_key=True)
+    assigned_to = db.Column(db.String(128), nullable=True)
+    owner = db.Column(db.String(128), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    epoch = db.Column(db.Integer, nullable=False, default=0)  # Bumped each time the lease changes hands
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,162 @@
+# order_book.py
+import numpy as np
+
+
+class BookSide:
+    # One side of a book as two parallel float64 arrays sorted so the best
+    # level is last: bids by price ascending, asks by price descending (stored
+    # as negated keys, so both sides search the same way). Best price is an
+    # O(1) read, and inserts or removals near the touch, where almost all
+    # deltas land, shift only the few levels behind them.
+    __slots__ = ('sign', 'keys', 'sizes', 'count')
+
+    def __init__(self, sign, capacity=64):
+        self.sign = sign  # +1 for bids, -1 for asks
+        self.keys = np.empty(capacity)
+        self.sizes = np.empty(capacity)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, count):
+        if count <= len(self.keys):
+            return
+        capacity = max(count, 2 * len(self.keys))
+        keys, sizes = np.empty(capacity), np.empty(capacity)
+        keys[:self.count] = self.keys[:self.count]
+        sizes[:self.count] = self.sizes[:self.count]
+        self.keys, self.sizes = keys, sizes
+
+    def load(self, levels):
+        # levels: {price: size} as sent by the exchange (strings or numbers)
+        n = len(levels)
+        self._reserve(n)
+        keys = np.fromiter(map(float, levels.keys()), dtype=np.float64, count=n) * self.sign
+        sizes = np.fromiter(map(float, levels.values()), dtype=np.float64, count=n)
+        order = np.argsort(keys, kind='stable')
+        keep = sizes[order] > 0
+        self.count = int(keep.sum())
+        self.keys[:self.count] = keys[order][keep]
+        self.sizes[:self.count] = sizes[order][keep]
+
+    def set(self, price, size):
+        # Size 0 removes the level
+        key = float(price) * self.sign
+        size = float(size)
+        count = self.count
+        keys = self.keys
+        index = int(np.searchsorted(keys[:count], key))
+        exists = index < count and keys[index] == key
+        if size <= 0:
+            if exists:
+                keys[index:count - 1] = keys[index + 1:count]
+                self.sizes[index:count - 1] = self.sizes[index + 1:count]
+                self.count -= 1
+        elif exists:
+            self.sizes[index] = size
+        else:
+            self._reserve(count + 1)
+            keys, sizes = self.keys, self.sizes
+            keys[index + 1:count + 1] = keys[index:count]
+            sizes[index + 1:count + 1] = sizes[index:count]
+            keys[index] = key
+            sizes[index] = size
+            self.count += 1
+
+    def best(self):
+        return float(self.keys[self.count - 1] * self.sign) if self.count else None
+
+    def best_size(self):
+        return float(self.sizes[self.count - 1]) if self.count else None
+
+    def top(self, n):
+        # Best n levels, best first: (prices, sizes). Sizes are a view into the book.
+        start = max(self.count - n, 0)
+        return self.keys[start:self.count][::-1] * self.sign, self.sizes[start:self.count][::-1]
+
+    def depth_to(self, price):
+        # Total size resting at `price` or better
+        index = int(np.searchsorted(self.keys[:self.count], float(price) * self.sign))
+        return float(self.sizes[index:self.count].sum())
+
+    def levels(self):
+        return dict(zip((self.keys[:self.count] * self.sign).tolist(), self.sizes[:self.count].tolist()))
+
+    def copy(self):
+        side = BookSide(self.sign, max(self.count, 1))
+        side.keys[:self.count] = self.keys[:self.count]
+        side.sizes[:self.count] = self.sizes[:self.count]
+        side.count = self.count
+        return side
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.sizes.nbytes
+
+
+class OrderBook:
+    # Compact book for one market. A REST or stream snapshot is parsed once
+    # into sorted float arrays; depth deltas then update levels in place.
+
+    __slots__ = ('symbol', 'bids', 'asks')
+
+    def __init__(self, symbol, capacity=64):
+        self.symbol = symbol
+        self.bids = BookSide(1, capacity)
+        self.asks = BookSide(-1, capacity)
+
+    @classmethod
+    def from_snapshot(cls, symbol, data):
+        book = cls(symbol, max(len(data.get('bids', ())), len(data.get('asks', ())), 1))
+        book.apply_snapshot(data)
+        return book
+
+    def apply_snapshot(self, data):
+        self.bids.load(data.get('bids') or {})
+        self.asks.load(data.get('asks') or {})
+
+    def apply_delta(self, data):
+        # {'bids': {price: size}, 'asks': {...}}; a size of 0 deletes the level
+        for price, size in (data.get('bids') or {}).items():
+            self.bids.set(price, size)
+        for price, size in (data.get('asks') or {}).items():
+            self.asks.set(price, size)
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def mid(self):
+        if not self.bids.count or not self.asks.count:
+            return None
+        return (self.bids.best() + self.asks.best()) / 2
+
+    def spread(self):
+        if not self.bids.count or not self.asks.count:
+            return None
+        return self.asks.best() - self.bids.best()
+
+    def depth(self, side, price):
+        # Cumulative size on `side` ('buy'/'bids' or 'sell'/'asks') at `price` or better
+        return (self.bids if side in ('buy', 'bids') else self.asks).depth_to(price)
+
+    def top(self, n):
+        # Best n levels per side: {'bids': (prices, sizes), 'asks': (prices, sizes)}
+        return {'bids': self.bids.top(n), 'asks': self.asks.top(n)}
+
+    def to_dict(self):
+        return {'bids': self.bids.levels(), 'asks': self.asks.levels()}
+
+    def copy(self):
+        book = OrderBook.__new__(OrderBook)
+        book.symbol = self.symbol
+        book.bids = self.bids.copy()
+        book.asks = self.asks.copy()
+        return book
+
+    @property
+    def nbytes(self):
+        return self.bids.nbytes + self.asks.nbytes
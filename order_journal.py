@@ -0,0 +1,351 @@
+# order_journal.py
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from models import OrderRecord, PositionRecord
+
+NEW = 'new'  # Accepted by the exchange, not yet confirmed on the book
+OPEN = 'open'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (NEW, OPEN, PARTIALLY_FILLED)
+
+# Moves the order state machine accepts; anything else is a stale or
+# out-of-order report and is ignored
+TRANSITIONS = {
+    NEW: (OPEN, PARTIALLY_FILLED, FILLED, CANCELLED),
+    OPEN: (PARTIALLY_FILLED, FILLED, CANCELLED),
+    PARTIALLY_FILLED: (PARTIALLY_FILLED, FILLED, CANCELLED),
+    FILLED: (),
+    CANCELLED: (),
+}
+
+ROLE_ENTRY = 'entry'
+ROLE_STOP_LOSS = 'stop_loss'
+ROLE_EXTERNAL = 'external'  # Found open on the exchange but not placed by this journal
+
+# Order statuses that mean the order has fully executed
+FILLED_STATUSES = ('filled', 'executed')
+# Exchange order statuses mapped onto the state machine
+EXCHANGE_STATUSES = {
+    'init': NEW,
+    'open': OPEN,
+    'partially_filled': PARTIALLY_FILLED,
+    'filled': FILLED,
+    'executed': FILLED,
+    'cancelled': CANCELLED,
+    'canceled': CANCELLED,
+    'rejected': CANCELLED,
+    'partially_cancelled': CANCELLED,
+    'expired': CANCELLED,
+}
+
+ORDER_FIELDS = ('order_id', 'market', 'role', 'side', 'order_type', 'price', 'stop_price', 'quantity', 'status',
+                'filled_quantity', 'avg_price')
+POSITION_FIELDS = ('entry_order_id', 'sl_order_id', 'tsl_triggered', 'highest_price', 'lowest_price')
+
+
+def normalize_status(status):
+    # Map an exchange order status onto the state machine, None if unknown
+    return EXCHANGE_STATUSES.get(status)
+
+
+def exchange_order_id(order):
+    return order.get('order_id') or order.get('id')
+
+
+def parse_report(order):
+    # (status, filled quantity, average fill price) from an exchange order payload
+    filled = order.get('filled_quantity')
+    if filled is None and order.get('total_quantity') is not None and order.get('remaining_quantity') is not None:
+        filled = float(order['total_quantity']) - float(order['remaining_quantity'])
+    avg_price = order.get('avg_price')
+    return (normalize_status(order.get('status')),
+            float(filled) if filled is not None else None,
+            float(avg_price) if avg_price else None)
+
+
+class OrderJournal:
+    # Durable record of the orders this worker placed and of each market's
+    # stop-loss / trailing state. Every change is written through to the
+    # OrderRecord / PositionRecord tables and mirrored in memory, indexed by
+    # order ID and by market, so the hot loop answers "do I have an open
+    # order / SL?" without a REST call. Order status changes arrive through
+    # poll() (one bulk status request for every tracked order) and are
+    # published to on_update() listeners as they happen. With engine=None it
+    # is memory-only (used by the backtester).
+
+    def __init__(self, engine=None, extremes_flush_interval=5.0):
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine) if engine is not None else None
+        self.extremes_flush_interval = extremes_flush_interval
+        self.orders = {}
+        self.open_by_market = {}
+        self.positions = {}
+        self.flushed_at = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def start(self, markets=None):
+        # Load the journal tables (created by schema.upgrade_schema at startup).
+        # With a list of markets only those are loaded (sharded workers load
+        # each market as they take it over, see load_market).
+        if self.engine is None:
+            return
+        if markets is None or markets:
+            self._load(markets)
+
+    def _load(self, markets):
+        with self.Session() as session:
+            orders = session.query(OrderRecord).filter(OrderRecord.status.in_(ACTIVE_STATUSES))
+            positions = session.query(PositionRecord)
+            if markets is not None:
+                orders = orders.filter(OrderRecord.market.in_(markets))
+                positions = positions.filter(PositionRecord.market.in_(markets))
+            open_orders = orders.all()
+            positions = positions.all()
+            # Entry orders referenced by a position are needed to re-protect it
+            entry_ids = [p.entry_order_id for p in positions if p.entry_order_id]
+            referenced = session.query(OrderRecord).filter(OrderRecord.order_id.in_(entry_ids)).all() if entry_ids else []
+            with self.lock:
+                for record in open_orders + referenced:
+                    self._index({field: getattr(record, field) for field in ORDER_FIELDS})
+                for position in positions:
+                    self.positions[position.market] = {field: getattr(position, field) for field in POSITION_FIELDS}
+        logging.info(f"Order journal loaded: {len(open_orders)} open orders, {len(positions)} positions"
+                     + (f" for {', '.join(markets)}" if markets is not None else ''))
+
+    def load_market(self, market):
+        # Reload one market from the tables, e.g. after taking it over from another worker
+        self.forget_market(market)
+        if self.engine is not None:
+            self._load([market])
+
+    def forget_market(self, market):
+        # Drop a market this worker no longer manages from memory
+        with self.lock:
+            self.open_by_market.pop(market, None)
+            for order_id in [i for i, record in self.orders.items() if record['market'] == market]:
+                del self.orders[order_id]
+            self.positions.pop(market, None)
+            self.flushed_at.pop(market, None)
+
+    def _index(self, record):
+        self.orders[record['order_id']] = record
+        open_orders = self.open_by_market.setdefault(record['market'], {})
+        if record['status'] in ACTIVE_STATUSES:
+            open_orders[record['order_id']] = record
+        else:
+            open_orders.pop(record['order_id'], None)
+
+    def _write(self, model, values):
+        if self.Session is None:
+            return
+        try:
+            with self.Session() as session:
+                session.merge(model(updated_at=datetime.utcnow(), **values))
+                session.commit()
+        except Exception as e:
+            logging.error(f"Error writing {model.__name__} to the order journal: {e}")
+
+    # Orders
+
+    def on_update(self, callback):
+        # callback(record, previous_status) after every status or fill change
+        self.listeners.append(callback)
+
+    def _emit(self, record, previous_status):
+        for callback in self.listeners:
+            try:
+                callback(record, previous_status)
+            except Exception as e:
+                logging.error(f"Error in order update listener: {e}")
+
+    def record_order(self, order_id, market, role, side, order_type, price, quantity, stop_price=None, status=NEW):
+        record = {
+            'order_id': order_id,
+            'market': market,
+            'role': role,
+            'side': side,
+            'order_type': order_type,
+            'price': price,
+            'stop_price': stop_price,
+            'quantity': quantity,
+            'status': status,
+            'filled_quantity': 0.0,
+            'avg_price': None,
+        }
+        with self.lock:
+            self._index(record)
+        self._write(OrderRecord, record)
+        return record
+
+    def mark(self, order_id, status, filled_quantity=None, avg_price=None):
+        # Apply a status / fill report to the state machine
+        with self.lock:
+            record = self.orders.get(order_id)
+            if record is None or status is None:
+                return record
+            previous = record['status']
+            filled = record['filled_quantity'] if filled_quantity is None else filled_quantity
+            if status == FILLED and filled_quantity is None:
+                filled = record['quantity']
+            if status == previous and filled == record['filled_quantity']:
+                return record
+            if status != previous and status not in TRANSITIONS.get(previous, ()):
+                logging.warning(f"Ignoring {previous} -> {status} report for order {order_id}")
+                return record
+            record = dict(record, status=status, filled_quantity=filled, avg_price=avg_price or record['avg_price'])
+            self._index(record)
+        self._write(OrderRecord, record)
+        self._emit(record, previous)
+        return record
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def open_orders(self, market):
+        with self.lock:
+            return list(self.open_by_market.get(market, {}).values())
+
+    def has_open_orders(self, market):
+        return bool(self.open_by_market.get(market))
+
+    def tracked_ids(self):
+        with self.lock:
+            return [order_id for orders in self.open_by_market.values() for order_id in orders]
+
+    def markets_with_open_orders(self):
+        with self.lock:
+            return [market for market, orders in self.open_by_market.items() if orders]
+
+    def sync_open(self, market, exchange_orders):
+        # Adopt exchange orders the journal does not know and return the IDs
+        # the journal has open that the exchange no longer lists
+        listed = set()
+        for order in exchange_orders:
+            order_id = exchange_order_id(order)
+            listed.add(order_id)
+            if order_id not in self.orders or self.orders[order_id]['status'] not in ACTIVE_STATUSES:
+                self.adopt(market, order)
+        return [order_id for order_id in list(self.open_by_market.get(market, {})) if order_id not in listed]
+
+    def adopt(self, market, order):
+        order_id = exchange_order_id(order)
+        known = self.orders.get(order_id)
+        logging.warning(f"Adopting open order {order_id} on {market} into the order journal")
+        return self.record_order(
+            order_id,
+            market,
+            known['role'] if known else ROLE_EXTERNAL,
+            order.get('side'),
+            order.get('order_type'),
+            order.get('price') if order.get('price') is None else float(order['price']),
+            float(order.get('quantity') or order.get('total_quantity') or 0),
+            stop_price=float(order['stop_price']) if order.get('stop_price') else None,
+            status=normalize_status(order.get('status')) or OPEN,
+        )
+
+    def settle(self, client, order_id):
+        # Resolve an order that has left the exchange's open list. Stays open
+        # if its details cannot be fetched, so the next pass retries it.
+        try:
+            details = client.get_order_details(order_id=order_id)
+        except Exception as e:
+            logging.error(f"Error fetching order details for {order_id}: {e}")
+            return None
+        if not details:
+            return None
+        return self.mark(order_id, *parse_report(details))
+
+    def poll(self, client, order_ids=None):
+        # One bulk status request covering every tracked order (or just
+        # `order_ids`), in any market. Costs nothing while no orders are open.
+        order_ids = self.tracked_ids() if order_ids is None else list(order_ids)
+        if not order_ids:
+            return 0
+        reports = client.get_orders_status(order_ids)
+        if not isinstance(reports, list):
+            logging.error("Unexpected order status response: %s", reports)
+            return 0
+        for order in reports:
+            order_id = exchange_order_id(order)
+            if order_id in self.orders:
+                self.mark(order_id, *parse_report(order))
+        return len(order_ids)
+
+    # Positions
+
+    def restore(self, state):
+        # Seed a new MarketState from the journal after a restart
+        position = self.positions.get(state.symbol)
+        if position is None:
+            return
+        for field in POSITION_FIELDS:
+            setattr(state, field, position[field])
+        state.unprotected = self.is_unprotected(state.symbol)
+        logging.info(f"Restored {state.symbol} from the order journal: SL {state.sl_order_id}, "
+                     f"TSL triggered {state.tsl_triggered}, high {state.highest_price}")
+        if state.unprotected:
+            logging.warning(f"{state.symbol} has a filled entry {state.entry_order_id} without an open stop loss")
+
+    def is_unprotected(self, market):
+        position = self.positions.get(market)
+        if position is None or not position['entry_order_id']:
+            return False
+        entry = self.orders.get(position['entry_order_id'])
+        stop = self.orders.get(position['sl_order_id']) if position['sl_order_id'] else None
+        return (entry is not None and entry['status'] in (FILLED, CANCELLED) and (entry['filled_quantity'] or 0) > 0
+                and (stop is None or stop['status'] == CANCELLED))
+
+    def save_position(self, state, force=False):
+        # Order and SL changes are written immediately; a move in the price
+        # extremes alone is written at most every extremes_flush_interval
+        # unless forced (e.g. before handing the market to another worker)
+        values = {field: getattr(state, field) for field in POSITION_FIELDS}
+        previous = self.positions.get(state.symbol)
+        if previous == values:
+            return
+        now = time.monotonic()
+        extremes_only = previous is not None and all(
+            previous[field] == values[field] for field in ('entry_order_id', 'sl_order_id', 'tsl_triggered'))
+        if not force and extremes_only and now - self.flushed_at.get(state.symbol, 0.0) < self.extremes_flush_interval:
+            return
+        self.positions[state.symbol] = values
+        self.flushed_at[state.symbol] = now
+        self._write(PositionRecord, dict(values, market=state.symbol))
+
+    # Startup
+
+    def reconcile(self, client, markets):
+        # One pass against the exchange before trading: settle every order the
+        # journal believes is open with a single bulk status request, then adopt
+        # anything open on the exchange that the journal has never seen
+        try:
+            self.poll(client)
+        except Exception as e:
+            logging.error(f"Error reconciling order statuses: {e}")
+
+        for market in sorted(set(markets) | set(self.markets_with_open_orders())):
+            try:
+                exchange_orders = client.get_open_orders(market=market)
+            except Exception as e:
+                logging.error(f"Error fetching open orders for {market} during reconciliation: {e}")
+                continue
+            for order_id in self.sync_open(market, exchange_orders):
+                self.settle(client, order_id)
+
+        # A position whose stop loss filled is flat
+        for market, position in self.positions.items():
+            stop = self.orders.get(position['sl_order_id']) if position['sl_order_id'] else None
+            if stop is not None and stop['status'] == FILLED:
+                values = dict(position, entry_order_id=None, sl_order_id=None, tsl_triggered=False,
+                              highest_price=None, lowest_price=None)
+                self.positions[market] = values
+                self._write(PositionRecord, dict(values, market=market))
+        logging.info(f"Order journal reconciled: {sum(len(o) for o in self.open_by_market.values())} open orders")
@@ -0,0 +1,201 @@
+# portfolio.py
+import logging
+import threading
+import time
+
+from metrics import RISK_REJECTED
+from order_journal import CANCELLED, FILLED, PARTIALLY_FILLED
+
+QUOTE_CURRENCY = 'INR'
+
+
+def split_symbol(symbol, quote=QUOTE_CURRENCY):
+    # 'BTCINR' -> ('BTC', 'INR'), for markets the catalog has no currencies for
+    if symbol.endswith(quote):
+        return symbol[:-len(quote)], quote
+    return symbol, quote
+
+
+class Portfolio:
+    # Balances for the whole account, kept in memory so the pre-trade check
+    # never costs a request. One account_balance call refreshes every
+    # currency: every refresh_interval seconds, and soon after any fill or
+    # cancel reported by the order journal. Orders placed between refreshes
+    # are reserved locally so back-to-back entries cannot spend the same
+    # balance twice. While paused (set_active(False): bot stopped, or every
+    # market out of session) the background refresh sends nothing.
+
+    def __init__(self, client, market_catalog=None, refresh_interval=30.0, max_exposure=0.0, exposure_limits=None,
+                 settle_delay=0.5):
+        self.client = client
+        self.market_catalog = market_catalog
+        self.refresh_interval = refresh_interval
+        self.max_exposure = max_exposure  # Quote-currency cap per market; 0 disables
+        self.exposure_limits = dict(exposure_limits or {})  # Per-market overrides of max_exposure
+        self.settle_delay = settle_delay  # Let the exchange settle a fill before re-reading balances
+        self.balances = {}  # currency -> (available, locked) as last reported
+        self.reservations = []  # (reserved_at, currency, amount) spent since the last refresh
+        self.pending_buys = []  # (reserved_at, currency, quantity) bought since the last refresh, for exposure
+        self.refreshed_at = None
+        self.rejections = {}  # symbol -> last reason logged, so a standing rejection is logged once
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.active = threading.Event()
+        self.active.set()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.error(f"Error loading balances: {e}")
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='portfolio', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.active.set()
+        self.wake.set()
+
+    def set_active(self, active):
+        # Pause or resume the background refresh. Balances that went stale
+        # while paused are reloaded before the caller places anything.
+        if not active:
+            self.active.clear()
+            return
+        if self.active.is_set():
+            return
+        if self.stale():
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing balances: {e}")
+        self.active.set()
+
+    def _run(self):
+        while self.running:
+            self.active.wait()
+            if self.wake.wait(self.refresh_interval):
+                time.sleep(self.settle_delay)
+            self.wake.clear()
+            if not self.running:
+                return
+            if not self.active.is_set():
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing balances: {e}")
+
+    def refresh_pending(self):
+        # Refresh now if an order update has moved balances; for callers
+        # that run without the background thread (backtests)
+        if self.wake.is_set():
+            self.wake.clear()
+            self.refresh()
+
+    def refresh(self):
+        started = time.monotonic()
+        self.update(self.client.get_account_balance(), started)
+
+    def stale(self):
+        # For callers that refresh on their own schedule (the asyncio engine)
+        return self.refreshed_at is None or self.wake.is_set() or time.time() - self.refreshed_at >= self.refresh_interval
+
+    def update(self, response, started):
+        # Apply an account_balance response requested at monotonic time `started`
+        self.wake.clear()
+        if not isinstance(response, list):
+            raise ValueError(f"unexpected balance response: {response}")
+        balances = {}
+        for item in response:
+            available = item.get('available_balance', item.get('balance'))
+            balances[item['currency']] = (float(available or 0), float(item.get('locked_balance') or 0))
+        with self.lock:
+            self.balances = balances
+            # The exchange may not have seen orders placed while this call was in flight
+            self.reservations = [r for r in self.reservations if r[0] >= started]
+            self.pending_buys = [r for r in self.pending_buys if r[0] >= started]
+            self.refreshed_at = time.time()
+
+    def on_order_update(self, record, previous_status):
+        # OrderJournal listener: balances moved, refresh soon
+        if record['status'] in (FILLED, PARTIALLY_FILLED, CANCELLED):
+            self.wake.set()
+
+    def _currencies(self, symbol):
+        info = self.market_catalog.get(symbol) if self.market_catalog is not None else None
+        if info is not None and info.base_currency and info.quote_currency:
+            return info.base_currency, info.quote_currency
+        return split_symbol(symbol)
+
+    def available(self, currency):
+        with self.lock:
+            free = self.balances.get(currency, (0.0, 0.0))[0]
+            return free - sum(amount for _, c, amount in self.reservations if c == currency)
+
+    def holding(self, currency):
+        # Everything held, including what open orders have locked
+        with self.lock:
+            free, locked = self.balances.get(currency, (0.0, 0.0))
+            return free + locked
+
+    def check(self, symbol, side, price, quantity):
+        # Returns why the order must not be sent, or None
+        if self.refreshed_at is None:
+            return 'balances not loaded'
+        base, quote = self._currencies(symbol)
+        if side == 'buy':
+            if price is None:
+                return 'market buy without a reference price'
+            cost = price * quantity
+            free = self.available(quote)
+            if cost > free:
+                return f"needs {cost:.2f} {quote}, {free:.2f} available"
+            limit = self.exposure_limits.get(symbol, self.max_exposure)
+            if limit:
+                exposure = (self.holding(base) + self._pending(base)) * price + cost
+                if exposure > limit:
+                    return f"exposure {exposure:.2f} {quote} would exceed {limit:.2f}"
+        else:
+            free = self.available(base)
+            if quantity > free:
+                return f"needs {quantity} {base}, {free} available"
+        return None
+
+    def _pending(self, currency):
+        with self.lock:
+            return sum(quantity for _, c, quantity in self.pending_buys if c == currency)
+
+    def reserve(self, symbol, side, price, quantity):
+        # Book an accepted order against the cached balances until the next refresh
+        base, quote = self._currencies(symbol)
+        now = time.monotonic()
+        with self.lock:
+            if side == 'buy':
+                self.reservations.append((now, quote, (price or 0.0) * quantity))
+                self.pending_buys.append((now, base, quantity))
+            else:
+                self.reservations.append((now, base, quantity))
+
+    def allow(self, symbol, side, price, quantity):
+        error = self.check(symbol, side, price, quantity)
+        if error:
+            RISK_REJECTED.labels(symbol).inc()
+            if self.rejections.get(symbol) != error:
+                self.rejections[symbol] = error
+                logging.warning("Risk check blocked %s %s %s at %s: %s", side, quantity, symbol, price, error,
+                                extra={'market': symbol, 'side': side, 'price': price, 'quantity': quantity})
+            return False
+        self.rejections.pop(symbol, None)
+        return True
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'refreshed_at': self.refreshed_at,
+                'balances': {c: {'available': a, 'locked': l} for c, (a, l) in self.balances.items()},
+                'reservations': len(self.reservations) + len(self.pending_buys),
+            }
@@ -0,0 +1,178 @@
+# rate_limiter.py
+import asyncio
+import itertools
+import threading
+import time
+
+# Priority lanes, lowest value served first. Protective orders and cancels
+# must never queue behind market-data reads.
+PRIORITY_PROTECTIVE = 0
+PRIORITY_TRADING = 1
+PRIORITY_MARKET_DATA = 2
+
+LANE_NAMES = {
+    PRIORITY_PROTECTIVE: 'protective',
+    PRIORITY_TRADING: 'trading',
+    PRIORITY_MARKET_DATA: 'market_data',
+}
+
+# Requests per second and burst size, per endpoint and for the whole client
+DEFAULT_RATE = (10, 20)
+DEFAULT_ENDPOINT_LIMITS = {
+    'markets': (1, 2),
+    'markets_details': (1, 2),
+    'order_book': (5, 10),
+    'account_balance': (2, 4),
+    'open_orders': (5, 10),
+    'order_details': (5, 10),
+    'orders_status': (2, 4),
+    'place_order': (5, 10),
+    'cancel_order': (5, 10),
+    'cancel_orders': (2, 4),
+}
+
+
+class TokenBucket:
+    # Thread-safe token bucket: `rate` tokens per second, up to `capacity` banked
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, now, tokens=1):
+        # Seconds until `tokens` are available; caller must hold a lock
+        self._refill(now)
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        # Returns 0 when the tokens were taken, else seconds until they would be available
+        with self.lock:
+            delay = self.delay(time.monotonic(), tokens)
+            if delay <= 0:
+                self.tokens -= tokens
+            return delay
+
+    def acquire(self, tokens=1):
+        while True:
+            delay = self.try_acquire(tokens)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+
+class LaneStats:
+    __slots__ = ('requests', 'total_wait', 'max_wait')
+
+    def __init__(self):
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait):
+        self.requests += 1
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'avg_wait': self.total_wait / self.requests if self.requests else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+
+class RequestRateLimiter:
+    # Client-side request scheduler. A request needs one token from the global
+    # bucket and one from its endpoint's bucket. Waiters are served in
+    # (priority, arrival) order; a waiter whose endpoint is exhausted is
+    # skipped so it cannot hold up other endpoints, but the global budget is
+    # always reserved for the most urgent waiter that could use it.
+
+    def __init__(self, rate=DEFAULT_RATE, endpoint_limits=None):
+        self.bucket = TokenBucket(*rate)
+        limits = DEFAULT_ENDPOINT_LIMITS if endpoint_limits is None else endpoint_limits
+        self.endpoint_buckets = {name: TokenBucket(*limit) for name, limit in limits.items()}
+        self.waiters = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.lane_stats = {priority: LaneStats() for priority in LANE_NAMES}
+        self.endpoint_stats = {name: LaneStats() for name in self.endpoint_buckets}
+
+    def _grant(self, now):
+        # Hand out tokens to waiters in priority order; returns the shortest
+        # delay after which another grant could succeed
+        next_delay = None
+        for waiter in sorted(self.waiters):
+            if waiter[4]:
+                continue
+            endpoint_bucket = self.endpoint_buckets.get(waiter[2])
+            if endpoint_bucket is not None:
+                endpoint_delay = endpoint_bucket.delay(now)
+                if endpoint_delay > 0:
+                    next_delay = endpoint_delay if next_delay is None else min(next_delay, endpoint_delay)
+                    continue
+            global_delay = self.bucket.delay(now)
+            if global_delay > 0:
+                next_delay = global_delay if next_delay is None else min(next_delay, global_delay)
+                break
+            self.bucket.tokens -= 1
+            if endpoint_bucket is not None:
+                endpoint_bucket.tokens -= 1
+            waiter[4] = True
+        return next_delay
+
+    def _enter(self, endpoint, priority):
+        # [priority, sequence, endpoint, enqueued_at, granted]
+        waiter = [priority, next(self.counter), endpoint, time.monotonic(), False]
+        self.waiters.append(waiter)
+        return waiter
+
+    def _leave(self, waiter):
+        self.waiters.remove(waiter)
+        wait = time.monotonic() - waiter[3]
+        self.lane_stats.setdefault(waiter[0], LaneStats()).record(wait)
+        stats = self.endpoint_stats.get(waiter[2])
+        if stats is not None:
+            stats.record(wait)
+        # Tokens may now be free for the next waiter in line
+        self.condition.notify_all()
+        return wait
+
+    def acquire(self, endpoint, priority=PRIORITY_MARKET_DATA):
+        # Blocks until the request may be sent; returns the queueing delay in seconds
+        with self.condition:
+            waiter = self._enter(endpoint, priority)
+            while True:
+                next_delay = self._grant(time.monotonic())
+                if waiter[4]:
+                    return self._leave(waiter)
+                self.condition.wait(next_delay)
+
+    async def acquire_async(self, endpoint, priority=PRIORITY_MARKET_DATA):
+        # Event-loop variant of acquire(); shares the same queue and budgets
+        with self.condition:
+            waiter = self._enter(endpoint, priority)
+        while True:
+            with self.condition:
+                next_delay = self._grant(time.monotonic())
+                if waiter[4]:
+                    return self._leave(waiter)
+            await asyncio.sleep(min(next_delay or 0.01, 0.05))
+
+    def stats(self):
+        with self.condition:
+            return {
+                'queued': len(self.waiters),
+                'lanes': {LANE_NAMES.get(p, str(p)): s.as_dict() for p, s in self.lane_stats.items()},
+                'endpoints': {name: s.as_dict() for name, s in self.endpoint_stats.items()},
+            }
@@ -0,0 +1,198 @@
+# recorder.py
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Archive layout: {root}/{stream}/{symbol}/{YYYY-MM-DD}/{column}.f64
+# Each column is a raw little-endian float64 file that only ever grows, so a
+# day partition can be memory-mapped and read without parsing or copying.
+# Days are UTC. Missing values (e.g. an empty book side) are NaN.
+STREAMS = {
+    'ticks': ('ts', 'price', 'bid', 'ask', 'bid_size', 'ask_size'),
+    'trades': ('ts', 'price', 'quantity'),
+}
+DTYPE = np.dtype('<f8')
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _epoch(value):
+    # Epoch seconds from a number, datetime, date or 'YYYY-MM-DD[ HH:MM[:SS]]' (UTC)
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TickRecorder:
+    # Append-only recorder for what the bot sees. record_tick / record_trade
+    # only append a tuple to an in-memory buffer; a background thread swaps
+    # the buffer out every flush_interval and writes each (stream, symbol,
+    # day) group as one append per column file.
+
+    def __init__(self, root, flush_interval=1.0):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.buffers = {stream: [] for stream in STREAMS}
+        self.stopping = threading.Event()
+        self.thread = None
+        self.written = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='tick-recorder', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout=10)
+        self.thread = None
+        self.flush()
+
+    def record_tick(self, symbol, timestamp, price, bid=None, ask=None, bid_size=None, ask_size=None):
+        with self.lock:
+            self.buffers['ticks'].append((symbol, timestamp, price, bid, ask, bid_size, ask_size))
+
+    def record_book(self, symbol, timestamp, price, book):
+        # Last price plus the top of an order_book.OrderBook
+        self.record_tick(symbol, timestamp, price, book.best_bid(), book.best_ask(), book.bids.best_size(),
+                         book.asks.best_size())
+
+    def record_trade(self, symbol, timestamp, price, quantity):
+        with self.lock:
+            self.buffers['trades'].append((symbol, timestamp, price, quantity))
+
+    def _run(self):
+        while not self.stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error writing tick archive: {e}")
+
+    def flush(self):
+        with self.lock:
+            buffers = self.buffers
+            self.buffers = {stream: [] for stream in STREAMS}
+        for stream, rows in buffers.items():
+            if rows:
+                self._write(stream, rows)
+
+    def _write(self, stream, rows):
+        columns = STREAMS[stream]
+        symbols = np.array([row[0] for row in rows], dtype=object)
+        values = np.array([row[1:] for row in rows], dtype=DTYPE)  # None becomes NaN
+        days = np.array([_day(ts) for ts in values[:, 0]], dtype=object)
+        for symbol in np.unique(symbols):
+            for day in np.unique(days[symbols == symbol]):
+                selected = values[(symbols == symbol) & (days == day)]
+                directory = os.path.join(self.root, stream, symbol, day)
+                os.makedirs(directory, exist_ok=True)
+                for index, column in enumerate(columns):
+                    with open(os.path.join(directory, f"{column}.f64"), 'ab') as f:
+                        f.write(np.ascontiguousarray(selected[:, index]).tobytes())
+        self.written += len(rows)
+
+
+class TickArchive:
+    # Reader for a TickRecorder archive. read_day() memory-maps one partition
+    # (no copy); load() slices a time range out of those maps, copying only
+    # when the range spans several days.
+
+    def __init__(self, root):
+        self.root = root
+
+    def symbols(self, stream='ticks'):
+        path = os.path.join(self.root, stream)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def days(self, symbol, stream='ticks'):
+        path = os.path.join(self.root, stream, symbol)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def read_day(self, symbol, day, stream='ticks', columns=None):
+        # {column: read-only array}. A column cut short by a crash mid-flush
+        # is trimmed to the length every column reached.
+        columns = columns or STREAMS[stream]
+        directory = os.path.join(self.root, stream, symbol, day)
+        paths = {column: os.path.join(directory, f"{column}.f64") for column in STREAMS[stream]}
+        rows = min(os.path.getsize(path) // DTYPE.itemsize if os.path.exists(path) else 0 for path in paths.values())
+        if rows == 0:
+            return {column: np.empty(0, dtype=DTYPE) for column in columns}
+        return {column: np.memmap(paths[column], dtype=DTYPE, mode='r', shape=(rows,)) for column in columns}
+
+    def load(self, symbol, start=None, end=None, stream='ticks', columns=None):
+        # Rows with start <= ts < end; start / end as accepted by _epoch
+        start, end = _epoch(start), _epoch(end)
+        columns = list(columns or STREAMS[stream])
+        wanted = columns if 'ts' in columns else ['ts'] + columns
+        first = _day(start) if start is not None else None
+        last = _day(end - 1e-6) if end is not None else None
+        parts = []
+        for day in self.days(symbol, stream):
+            if (first is not None and day < first) or (last is not None and day > last):
+                continue
+            data = self.read_day(symbol, day, stream, wanted)
+            parts.append(self._slice(data, start, end))
+        if not parts:
+            return {column: np.empty(0, dtype=DTYPE) for column in columns}
+        if len(parts) == 1:
+            return {column: parts[0][column] for column in columns}
+        return {column: np.concatenate([part[column] for part in parts]) for column in columns}
+
+    @staticmethod
+    def _slice(data, start, end):
+        ts = data['ts']
+        if start is None and end is None:
+            return data
+        if len(ts) < 2 or np.all(ts[1:] >= ts[:-1]):
+            lo = int(np.searchsorted(ts, start, side='left')) if start is not None else 0
+            hi = int(np.searchsorted(ts, end, side='left')) if end is not None else len(ts)
+            return {column: values[lo:hi] for column, values in data.items()}
+        mask = np.ones(len(ts), dtype=bool)  # Exchange trade times can arrive out of order
+        if start is not None:
+            mask &= ts >= start
+        if end is not None:
+            mask &= ts < end
+        return {column: values[mask] for column, values in data.items()}
+
+    def series(self, symbol, start=None, end=None):
+        # (timestamps, prices, volumes) for backtest.run_backtest: trades when
+        # any were recorded, else polled last prices with zero volume
+        trades = self.load(symbol, start, end, stream='trades')
+        if len(trades['ts']):
+            order = np.argsort(trades['ts'], kind='stable')
+            return trades['ts'][order], trades['price'][order], trades['quantity'][order]
+        ticks = self.load(symbol, start, end, stream='ticks', columns=('ts', 'price'))
+        return np.asarray(ticks['ts']), np.asarray(ticks['price']), np.zeros(len(ticks['ts']))
+
+    def candles(self, symbol, start=None, end=None, interval=60):
+        # OHLCV bars of `interval` seconds, one per interval that saw a print
+        timestamps, prices, volumes = self.series(symbol, start, end)
+        if not len(timestamps):
+            empty = np.empty(0, dtype=DTYPE)
+            return {'ts': empty, 'open': empty, 'high': empty, 'low': empty, 'close': empty, 'volume': empty}
+        buckets = np.floor(timestamps / interval).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)]
+        return {
+            'ts': (buckets[starts] * interval).astype(DTYPE),
+            'open': prices[starts],
+            'high': np.maximum.reduceat(prices, starts),
+            'low': np.minimum.reduceat(prices, starts),
+            'close': prices[ends - 1],
+            'volume': np.add.reduceat(volumes, starts),
+        }
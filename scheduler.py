@@ -0,0 +1,128 @@
+# scheduler.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from market_state import MarketState
+from strategy import get_current_time, next_session_change
+
+
+def session_changes(states, current_time):
+    # Flip markets whose session opened or closed by current_time (UTC).
+    # Returns (opened, closed); a market checked for the first time, or whose
+    # session hours were edited, is reported in its current state.
+    opened, closed = [], []
+    for state in states:
+        hours = (state.config.session_start, state.config.session_end)
+        if hours == state.session_hours and current_time < state.session_change_at:
+            continue
+        in_session, state.session_change_at = next_session_change(current_time, state.config)
+        state.session_hours = hours
+        if in_session != state.in_session:
+            state.in_session = in_session
+            (opened if in_session else closed).append(state)
+    return opened, closed
+
+
+def next_session_change_in(states, current_time):
+    # Seconds until the earliest session open or close among `states`
+    changes = [state.session_change_at for state in states if state.session_change_at is not None]
+    if not changes:
+        return float('inf')
+    return max(0.0, (min(changes) - current_time).total_seconds())
+
+
+class MarketScheduler:
+    # Decides which markets tick next inside the single worker process.
+    # Markets are served round-robin: a market that just ticked goes to the
+    # back of the rotation, so a busy symbol cannot starve quiet ones of the
+    # shared API budget.
+    #
+    # Each market's next session open or close is computed once and kept on
+    # its MarketState. Out of session a market is never due, so it costs no
+    # requests until wait() wakes the loop at its next open.
+    #
+    # wait() blocks until the next due market or session change. signal()
+    # (config edits, lease changes) and the first stream update of an
+    # in-session market since its last tick wake it early.
+
+    def __init__(self, feed=None, poll_interval=60, min_tick_interval=1.0, on_added=None):
+        self.feed = feed
+        self.on_added = on_added  # Called with each new MarketState, e.g. to restore it from the journal
+        self.poll_interval = poll_interval
+        self.min_tick_interval = min_tick_interval
+        self.markets = OrderedDict()
+        self.wakeup = threading.Event()
+
+    def sync(self, configs):
+        # Add, refresh or drop markets to match the enabled Config rows
+        wanted = {config.symbol: config for config in configs}
+        for symbol in list(self.markets):
+            if symbol not in wanted:
+                logging.info(f"Market removed from schedule: {symbol}")
+                del self.markets[symbol]
+        for symbol, config in wanted.items():
+            if symbol in self.markets:
+                self.markets[symbol].config = config
+            else:
+                logging.info(f"Market added to schedule: {symbol}")
+                self.markets[symbol] = MarketState(config)
+                if self.on_added is not None:
+                    self.on_added(self.markets[symbol])
+        return list(self.markets.values())
+
+    def session_changes(self, current_time):
+        return session_changes(self.markets.values(), current_time)
+
+    def _has_update(self, state):
+        if self.feed is None:
+            return False
+        return self.feed.sequence.get(state.symbol, 0) > state.feed_sequence
+
+    def _next_due_in(self, state, now):
+        if not state.in_session:
+            return float('inf')
+        since_tick = now - state.last_tick_at
+        if self._has_update(state):
+            return max(0.0, self.min_tick_interval - since_tick)
+        return max(0.0, self.poll_interval - since_tick)
+
+    def due_markets(self):
+        now = time.monotonic()
+        return [state for state in self.markets.values() if self._next_due_in(state, now) <= 0]
+
+    def wake(self, symbol):
+        # Make a market due now, e.g. when one of its orders reported a fill
+        state = self.markets.get(symbol)
+        if state is not None:
+            state.last_tick_at = 0.0
+
+    def mark_ticked(self, state):
+        state.last_tick_at = time.monotonic()
+        if self.feed is not None:
+            state.feed_sequence = self.feed.sequence.get(state.symbol, 0)
+        self.markets.move_to_end(state.symbol)
+
+    def signal(self):
+        self.wakeup.set()
+
+    def feed_updated(self, symbol):
+        # MarketFeed.on_update listener. Later updates before the market
+        # ticks only matter once min_tick_interval has passed, which wait()
+        # already times.
+        state = self.markets.get(symbol)
+        if state is not None and state.in_session and self.feed.sequence.get(symbol, 0) == state.feed_sequence + 1:
+            self.wakeup.set()
+
+    def wait(self, max_wait=None):
+        # Sleep until the next market is due, a session opens or closes, or
+        # max_wait seconds pass (None: no limit)
+        now = time.monotonic()
+        timeout = min([next_session_change_in(self.markets.values(), get_current_time())] +
+                      [self._next_due_in(state, now) for state in self.markets.values()] +
+                      ([max_wait] if max_wait is not None else []))
+        if timeout <= 0:
+            return
+        if self.wakeup.wait(timeout if timeout != float('inf') else None):
+            self.wakeup.clear()
@@ -0,0 +1,69 @@
+# schema.py
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db
+
+
+def _literal(value):
+    # SQL literal for a column's scalar default, used as the server default of
+    # an added column so existing rows get a value
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _add_column(connection, table, column):
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(connection.dialect)}'
+    if default is not None:
+        ddl += f' DEFAULT {_literal(default)}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    connection.execute(text(ddl))
+    logging.info(f"Added column {table.name}.{column.name}")
+
+
+def _has_unique(inspector, table, column):
+    for constraint in inspector.get_unique_constraints(table.name):
+        if constraint['column_names'] == [column.name]:
+            return True
+    for index in inspector.get_indexes(table.name):
+        if index.get('unique') and index['column_names'] == [column.name]:
+            return True
+    return False
+
+
+def upgrade_schema(engine):
+    # Bring a database created by an older release up to the current models:
+    # create missing tables, add missing columns (with their defaults filled
+    # in for existing rows) and missing single-column unique constraints.
+    # Safe to run on every start of the web app and the worker; a fresh
+    # database just gets every table.
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            table.create(engine)
+            logging.info(f"Created table {table.name}")
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        with engine.begin() as connection:
+            for column in table.columns:
+                if column.name not in columns:
+                    _add_column(connection, table, column)
+        for column in table.columns:
+            if column.unique and not _has_unique(inspector, table, column):
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(text(
+                            f'CREATE UNIQUE INDEX uq_{table.name}_{column.name} ON {table.name} ({column.name})'
+                        ))
+                    logging.info(f"Added unique index on {table.name}.{column.name}")
+                except SQLAlchemyError as e:
+                    # Existing duplicates; they must be merged by hand before the constraint can be added
+                    logging.error(f"Cannot make {table.name}.{column.name} unique: {e}")
@@ -0,0 +1,249 @@
+# sharding.py
+import atexit
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import ShardLease, ShardWorker
+
+LEADER_LEASE = '__leader__'
+
+
+def assign_markets(markets, workers, current):
+    # Spread markets evenly over live workers, moving as few as possible: a
+    # market stays with its current worker while that worker is under quota
+    if not workers:
+        return {}
+    workers = sorted(workers)
+    quota = math.ceil(len(markets) / len(workers))
+    load = {worker: 0 for worker in workers}
+    assignment = {}
+    for market in sorted(markets):
+        worker = current.get(market)
+        if worker in load and load[worker] < quota:
+            assignment[market] = worker
+            load[worker] += 1
+    for market in sorted(markets):
+        if market not in assignment:
+            worker = min(workers, key=lambda w: (load[w], w))
+            assignment[market] = worker
+            load[worker] += 1
+    return assignment
+
+
+class ShardCoordinator:
+    # Splits the enabled markets across every running bot worker using two
+    # tables (models.ShardWorker / ShardLease) that behave the same on
+    # Postgres and SQLite.
+    #
+    # Every heartbeat_interval each worker records a heartbeat, competes for
+    # the leader lease, and renews or takes the market leases assigned to it.
+    # The leader assigns markets to workers with a live heartbeat, so a dead
+    # worker's markets move once its heartbeat is lease_ttl old, and a new
+    # worker gets a share on the next beat.
+    #
+    # A lease is taken with a compare-and-swap UPDATE that only succeeds when
+    # the row is free, expired or already ours, so at most one worker holds a
+    # market. A worker stops treating a market as its own heartbeat_interval
+    # before its lease expires; clocks may disagree by less than that. A
+    # market assigned elsewhere is first dropped locally (owns() turns False)
+    # and its lease is kept until the trading loop acknowledges, with
+    # ack_released(), that it has let go of every market it took through
+    # claim_owned(); it is released on the next beat after that.
+
+    def __init__(self, engine, markets_source, worker_id=None, lease_ttl=15.0, heartbeat_interval=5.0):
+        self.engine = engine
+        self.markets_source = markets_source  # Callable returning the symbols to shard
+        self.hostname = socket.gethostname()
+        self.worker_id = worker_id or f"{os.getenv('DYNO') or self.hostname}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.owned = {}  # market -> monotonic deadline after which we stop trusting the lease
+        self.releasing = set()
+        self.in_use = set()  # Markets the trading loop claimed and has not acknowledged releasing
+        self.listeners = []  # Called after a beat that changed the owned or releasing markets
+        self.leader_until = 0.0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.beat()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='shard-coordinator', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        logging.info(f"Shard worker {self.worker_id} started")
+
+    def stop(self):
+        # Hand everything back so other workers need not wait for the leases to expire
+        if not self.running:
+            return
+        self.running = False
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.heartbeat_interval * 2)
+        with self.lock:
+            self.owned.clear()
+            self.leader_until = 0.0
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(update(ShardLease).where(ShardLease.owner == self.worker_id)
+                             .values(owner=None, expires_at=None, updated_at=datetime.utcnow()))
+                conn.execute(delete(ShardWorker).where(ShardWorker.worker_id == self.worker_id))
+        except Exception as e:
+            logging.error(f"Error releasing shard leases: {e}")
+
+    def _run(self):
+        while not self.stopped.wait(self.heartbeat_interval):
+            try:
+                self.beat()
+            except Exception as e:
+                logging.error(f"Shard heartbeat failed: {e}")
+
+    # Read by the trading loop
+
+    def owns(self, market):
+        with self.lock:
+            deadline = self.owned.get(market)
+            return deadline is not None and time.monotonic() < deadline and market not in self.releasing
+
+    def _live(self):
+        now = time.monotonic()
+        return sorted(m for m, deadline in self.owned.items() if now < deadline and m not in self.releasing)
+
+    def owned_markets(self):
+        with self.lock:
+            return self._live()
+
+    def claim_owned(self):
+        # owned_markets(), each recorded as in use by the trading loop until
+        # it calls ack_released()
+        with self.lock:
+            owned = self._live()
+            self.in_use.update(owned)
+            return owned
+
+    def on_change(self, callback):
+        self.listeners.append(callback)
+
+    def ack_released(self, market):
+        # The trading loop no longer touches `market`; its lease may go
+        with self.lock:
+            self.in_use.discard(market)
+
+    @property
+    def is_leader(self):
+        return time.monotonic() < self.leader_until
+
+    # Heartbeat
+
+    def beat(self):
+        started = time.monotonic()
+        now = datetime.utcnow()
+        self._heartbeat(now)
+        if self._acquire(LEADER_LEASE, now):
+            self.leader_until = started + self.lease_ttl - self.heartbeat_interval
+            self._rebalance(now)
+        else:
+            self.leader_until = 0.0
+        self._sync_leases(now, started)
+
+    def _heartbeat(self, now):
+        with self.engine.begin() as conn:
+            result = conn.execute(update(ShardWorker).where(ShardWorker.worker_id == self.worker_id)
+                                  .values(heartbeat_at=now))
+            if result.rowcount == 0:
+                conn.execute(ShardWorker.__table__.insert().values(
+                    worker_id=self.worker_id, hostname=self.hostname, started_at=now, heartbeat_at=now))
+
+    def _acquire(self, name, now):
+        # Take or renew a lease; True when we hold it until now + lease_ttl
+        expires = now + timedelta(seconds=self.lease_ttl)
+        me = self.worker_id
+        statement = (
+            update(ShardLease)
+            .where(ShardLease.name == name,
+                   or_(ShardLease.owner == me, ShardLease.owner.is_(None), ShardLease.expires_at < now))
+            .values(owner=me, expires_at=expires, updated_at=now,
+                    epoch=case((ShardLease.owner == me, ShardLease.epoch), else_=ShardLease.epoch + 1))
+        )
+        with self.engine.begin() as conn:
+            if conn.execute(statement).rowcount == 1:
+                return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(ShardLease.__table__.insert().values(
+                    name=name, owner=me, expires_at=expires, epoch=1, updated_at=now))
+            return True
+        except IntegrityError:
+            return False  # Exists and is held by someone else
+
+    def _release(self, name, now):
+        with self.engine.begin() as conn:
+            conn.execute(update(ShardLease).where(ShardLease.name == name, ShardLease.owner == self.worker_id)
+                         .values(owner=None, expires_at=None, updated_at=now))
+
+    def _rebalance(self, now):
+        markets = set(self.markets_source())
+        alive_since = now - timedelta(seconds=self.lease_ttl)
+        with self.engine.begin() as conn:
+            conn.execute(delete(ShardWorker).where(ShardWorker.heartbeat_at < alive_since))
+            workers = [row.worker_id for row in conn.execute(select(ShardWorker.worker_id))]
+            rows = {row.name: row for row in conn.execute(select(ShardLease).where(ShardLease.name != LEADER_LEASE))}
+            assignment = assign_markets(markets, workers, {name: row.assigned_to for name, row in rows.items()})
+            for market, worker in assignment.items():
+                row = rows.get(market)
+                if row is None:
+                    conn.execute(ShardLease.__table__.insert().values(name=market, assigned_to=worker, epoch=0,
+                                                                      updated_at=now))
+                elif row.assigned_to != worker:
+                    logging.info(f"Assigning {market} to worker {worker} (was {row.assigned_to})")
+                    conn.execute(update(ShardLease).where(ShardLease.name == market)
+                                 .values(assigned_to=worker, updated_at=now))
+            for market, row in rows.items():
+                if market not in markets and row.assigned_to is not None:
+                    conn.execute(update(ShardLease).where(ShardLease.name == market)
+                                 .values(assigned_to=None, updated_at=now))
+
+    def _sync_leases(self, now, started):
+        deadline = started + self.lease_ttl - self.heartbeat_interval
+        with self.engine.connect() as conn:
+            rows = list(conn.execute(select(ShardLease.name, ShardLease.assigned_to, ShardLease.owner)
+                                     .where(ShardLease.name != LEADER_LEASE)))
+        with self.lock:
+            in_use = set(self.in_use)
+        held, dropping = {}, set()
+        for name, assigned_to, owner in rows:
+            if assigned_to == self.worker_id:
+                if self._acquire(name, now):
+                    held[name] = deadline
+                    if name not in self.owned:
+                        logging.info(f"Took over {name}")
+            elif owner == self.worker_id:
+                if name not in in_use:
+                    self._release(name, now)
+                    logging.info(f"Released {name}")
+                elif self._acquire(name, now):
+                    # Keep the lease until the trading loop has let go
+                    held[name] = deadline
+                    dropping.add(name)
+        with self.lock:
+            changed = set(held) != set(self.owned) or dropping != self.releasing
+            self.owned = held
+            self.releasing = dropping
+        if changed:
+            for callback in self.listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Error in shard listener: {e}")
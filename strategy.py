@@ -0,0 +1,107 @@
+# strategy.py
+# Pure strategy helpers shared by the blocking worker (bot.py) and the asyncio
+# engine (async_bot.py). Nothing in here talks to the exchange or the database.
+from datetime import datetime, timedelta
+
+# Example Strategy: Simple Price Threshold
+BUY_THRESHOLD = 1000  # Example value; adjust as needed
+SELL_THRESHOLD = 2000  # Example value; adjust as needed
+BUFFER_AMOUNT = 0.5  # Gap between stop price and limit price of the SL order
+ATR_STOP_MULTIPLIER = 0  # When > 0, SL distance is at least this many ATRs
+VWAP_ENTRY_FILTER = False  # When True, only buy below VWAP and sell above it
+
+
+def entry_signal(last_price, open_orders, vwap=None):
+    # Only enter when nothing is resting on the book for this market
+    if open_orders:
+        return None
+    if last_price <= BUY_THRESHOLD:
+        if VWAP_ENTRY_FILTER and vwap is not None and last_price > vwap:
+            return None
+        return 'buy', BUY_THRESHOLD
+    if last_price >= SELL_THRESHOLD:
+        if VWAP_ENTRY_FILTER and vwap is not None and last_price < vwap:
+            return None
+        return 'sell', SELL_THRESHOLD
+    return None
+
+
+def stop_distance(sl_amount, atr=None):
+    # Configured SL amount, widened to ATR_STOP_MULTIPLIER x ATR on volatile markets
+    if ATR_STOP_MULTIPLIER > 0 and atr is not None:
+        return max(sl_amount, ATR_STOP_MULTIPLIER * atr)
+    return sl_amount
+
+
+def entry_quantity(amount, price, market_info=None):
+    # Config.trade_quantity is an INR amount; convert it to an order quantity
+    # at `price`, rounded down to the market's step when the catalog knows it
+    if not price:
+        return 0.0
+    quantity = amount / price
+    return market_info.round_quantity(quantity) if market_info is not None else quantity
+
+
+def stop_loss_prices(entry_price, side, sl_amount, buffer_amount=BUFFER_AMOUNT):
+    if side == 'buy':
+        # For buy positions, SL is below the entry price
+        stop_price = entry_price - sl_amount
+        limit_price = stop_price - buffer_amount  # Buffer below stop price
+        sl_side = 'sell'
+    else:
+        # For sell positions, SL is above the entry price
+        stop_price = entry_price + sl_amount
+        limit_price = stop_price + buffer_amount  # Buffer above stop price
+        sl_side = 'buy'
+    return stop_price, limit_price, sl_side
+
+
+def supports_trailing(symbol):
+    return symbol.startswith('BTC') or symbol.startswith('ETH')
+
+
+def get_current_time():
+    return datetime.utcnow()
+
+
+def _seconds_of_day(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def session_length(config):
+    # Sessions run from session_start to session_end, crossing midnight when
+    # the end is earlier in the day; equal times mean a 24 hour session
+    seconds = (_seconds_of_day(config.session_end) - _seconds_of_day(config.session_start)) % 86400
+    return timedelta(seconds=seconds or 86400)
+
+
+def session_window(current_time, config):
+    # (start, end) of the session in progress at current_time, else of the next one
+    start = datetime.combine(current_time.date(), config.session_start)
+    if start > current_time:
+        start -= timedelta(days=1)
+    end = start + session_length(config)
+    if current_time >= end:
+        start += timedelta(days=1)
+        end += timedelta(days=1)
+    return start, end
+
+
+def is_within_session(current_time, config):
+    start, end = session_window(current_time, config)
+    return start <= current_time < end
+
+
+def next_session_change(current_time, config):
+    # (in_session, when that stops being true): the close of the session in
+    # progress, or the next open
+    start, end = session_window(current_time, config)
+    if start <= current_time:
+        return True, end
+    return False, start
+
+
+def in_session_mask(seconds_of_day, config):
+    # Vectorised is_within_session for an array of UTC seconds since midnight
+    start = _seconds_of_day(config.session_start)
+    return (seconds_of_day - start) % 86400 < session_length(config).total_seconds()
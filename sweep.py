@@ -0,0 +1,200 @@
+# sweep.py
+import argparse
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import INITIAL_CASH, BacktestConfig, ReplayIndicators, combined_summary, load_ticks, run_backtest
+from strategy import BUFFER_AMOUNT
+
+# Config fields a sweep can vary, with the value used when a spec omits them
+DEFAULTS = {
+    'sl_amount': 25.0,
+    'buffer_amount': BUFFER_AMOUNT,
+    'session_start': '08:00',
+    'session_end': '05:00',
+}
+RANK_KEYS = ('pnl', 'max_drawdown', 'pnl_to_drawdown')
+# Rows per market in the shared block: timestamps, prices, volumes, ATR, VWAP
+ROWS = 5
+
+# Per-worker views onto the parent's shared block, set by _attach
+_shared = None
+_markets = None
+_settings = None
+
+
+class SharedMarketData:
+    # Every market's tick arrays and precomputed indicators packed into one
+    # shared memory block. Workers map it read-only instead of receiving a
+    # pickled copy with each task.
+
+    def __init__(self, data, indicator_interval=60):
+        self.layout = []
+        total = sum(len(prices) for _, prices, _ in data.values())
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, total * ROWS * 8))
+        block = np.ndarray((ROWS, total), dtype=np.float64, buffer=self.shm.buf)
+        offset = 0
+        for symbol, (timestamps, prices, volumes) in data.items():
+            n = len(prices)
+            indicators = ReplayIndicators.compute(timestamps, prices, volumes, interval=indicator_interval)
+            block[:, offset:offset + n] = (timestamps, prices, volumes, indicators.atr_values, indicators.vwap_values)
+            self.layout.append((symbol, offset, n))
+            offset += n
+        self.total = total
+        del block  # Drop the export so close() can release the buffer
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name, total, layout, settings):
+    global _shared, _markets, _settings
+    # Per-order INFO logs from thousands of simulations would swamp the run
+    logging.getLogger().setLevel(logging.WARNING)
+    _shared = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((ROWS, total), dtype=np.float64, buffer=_shared.buf)
+    block.flags.writeable = False
+    _markets = {symbol: block[:, offset:offset + n] for symbol, offset, n in layout}
+    _settings = settings
+
+
+def _parse_time(value):
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def evaluate(params):
+    # Run one parameter set over every market and return a results row
+    config = BacktestConfig(session_start=_parse_time(params['session_start']),
+                            session_end=_parse_time(params['session_end']),
+                            sl_amount=params['sl_amount'],
+                            trade_quantity=_settings['trade_quantity'])
+    results = []
+    for symbol, (timestamps, prices, volumes, atr, vwap) in _markets.items():
+        results.append(run_backtest(symbol, timestamps, prices, volumes, config.for_symbol(symbol),
+                                    fee_rate=_settings['fee_rate'], buffer_amount=params['buffer_amount'],
+                                    indicators=ReplayIndicators(atr, vwap), initial_cash=_settings['initial_cash']))
+    total = combined_summary(results)
+    row = dict(params)
+    row.update(total)
+    row['pnl_to_drawdown'] = total['pnl'] / total['max_drawdown'] if total['max_drawdown'] > 0 else float('inf')
+    return row
+
+
+def parse_spec(spec):
+    # name=a,b,c      explicit values
+    # name=lo:hi:step inclusive range for a grid
+    # name=lo:hi      uniform range, only valid with --samples
+    name, _, values = spec.partition('=')
+    if name not in DEFAULTS:
+        raise ValueError(f"Unknown parameter {name!r}; expected one of {', '.join(DEFAULTS)}")
+    if name.startswith('session_'):
+        choices = values.split(',')
+        for value in choices:
+            _parse_time(value)
+        return name, choices
+    if ':' in values:
+        parts = [float(v) for v in values.split(':')]
+        if len(parts) == 3:
+            low, high, step = parts
+            return name, [round(v, 10) for v in np.arange(low, high + step / 2, step)]
+        return name, tuple(parts)
+    return name, [float(v) for v in values.split(',')]
+
+
+def build_combinations(specs, samples=None, seed=None):
+    if samples is None:
+        for name, values in specs.items():
+            if isinstance(values, tuple):
+                raise ValueError(f"{name}: a lo:hi range needs a step for grid search, or use --samples")
+        names = list(specs)
+        for values in itertools.product(*(specs[name] for name in names)):
+            params = dict(DEFAULTS)
+            params.update(zip(names, values))
+            yield params
+        return
+
+    rng = random.Random(seed)
+    for _ in range(samples):
+        params = dict(DEFAULTS)
+        for name, values in specs.items():
+            params[name] = rng.uniform(*values) if isinstance(values, tuple) else rng.choice(values)
+        yield params
+
+
+def run_sweep(data, combinations, workers=None, fee_rate=0.0, trade_quantity=1000.0, indicator_interval=60,
+              initial_cash=INITIAL_CASH):
+    workers = workers or os.cpu_count() or 1
+    shared = SharedMarketData(data, indicator_interval=indicator_interval)
+    settings = {'fee_rate': fee_rate, 'trade_quantity': trade_quantity, 'initial_cash': initial_cash}
+    try:
+        chunksize = max(1, len(combinations) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shared.name, shared.total, shared.layout, settings)) as pool:
+            return list(pool.map(evaluate, combinations, chunksize=chunksize))
+    finally:
+        shared.close()
+
+
+def rank(rows, key='pnl'):
+    frame = pd.DataFrame(rows)
+    ascending = key == 'max_drawdown'
+    frame = frame.sort_values(key, ascending=ascending, kind='stable').reset_index(drop=True)
+    frame.insert(0, 'rank', np.arange(1, len(frame) + 1))
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search strategy parameters over recorded market data.')
+    parser.add_argument('paths', nargs='+', help='CSV or Parquet files accepted by backtest.py')
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=VALUES',
+                        help='sl_amount=10,25,50 | sl_amount=10:100:5 | sl_amount=10:100 (random) | session_start=07:00,08:00')
+    parser.add_argument('--samples', type=int, help='Random search with this many draws instead of the full grid')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    parser.add_argument('--trade-quantity', type=float, default=1000.0, help='INR per entry')
+    parser.add_argument('--initial-cash', type=float, default=INITIAL_CASH, help='Simulated INR balance per market')
+    parser.add_argument('--fee-rate', type=float, default=0.0)
+    parser.add_argument('--indicator-interval', type=int, default=60)
+    parser.add_argument('--rank-by', choices=RANK_KEYS, default='pnl')
+    parser.add_argument('--out', default='sweep_results.csv')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    specs = dict(parse_spec(spec) for spec in args.param)
+    combinations = list(build_combinations(specs, samples=args.samples, seed=args.seed))
+
+    data = {}
+    for path in args.paths:
+        data.update(load_ticks(path))
+    ticks = sum(len(prices) for _, prices, _ in data.values())
+    logging.info(f"Sweeping {len(combinations)} parameter sets over {len(data)} markets ({ticks} ticks)")
+
+    started = time.time()
+    rows = run_sweep(data, combinations, workers=args.workers, fee_rate=args.fee_rate,
+                     trade_quantity=args.trade_quantity, indicator_interval=args.indicator_interval,
+                     initial_cash=args.initial_cash)
+    logging.info(f"Finished in {time.time() - started:.1f}s")
+
+    ranked = rank(rows, args.rank_by)
+    ranked.to_csv(args.out, index=False)
+    logging.info(f"Wrote {len(ranked)} results to {args.out}")
+    print(ranked.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
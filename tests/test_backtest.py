@@ -0,0 +1,47 @@
+# tests/test_backtest.py
+import numpy as np
+import pytest
+
+import backtest
+
+
+def _series(seed, n=20000, step=30.0, volatility=1.0):
+    rng = np.random.default_rng(seed)
+    timestamps = 1.7e9 + np.arange(n) * step
+    prices = 1000 + np.cumsum(rng.normal(0, volatility, n))
+    return timestamps, prices, rng.random(n)
+
+
+def _full_replay(monkeypatch, *args):
+    # Visit every tick: the next event is always the next tick
+    with monkeypatch.context() as patch:
+        patch.setattr(backtest, '_next_event', lambda prices, start, end, low, high: start)
+        return backtest.run_backtest(*args)
+
+
+@pytest.mark.parametrize('seed, volatility, sl_amount', [(0, 1.0, 25.0), (3, 1.0, 25.0), (1, 4.0, 25.0), (2, 20.0, 5.0)])
+def test_skipping_matches_full_replay(monkeypatch, seed, volatility, sl_amount):
+    timestamps, prices, volumes = _series(seed, volatility=volatility)
+    config = backtest.BacktestConfig(symbol='BTCINR', sl_amount=sl_amount)
+    skipping = backtest.run_backtest('BTCINR', timestamps, prices, volumes, config)
+    full = _full_replay(monkeypatch, 'BTCINR', timestamps, prices, volumes, config)
+    assert skipping.fills == full.fills
+    assert skipping.events < full.events
+
+
+
+@pytest.mark.parametrize('level, initial_cash', [(2100, backtest.INITIAL_CASH), (900, 0.0)])
+def test_entries_the_balance_cannot_fund_are_not_events(monkeypatch, level, initial_cash):
+    # A year of minutes beyond one entry threshold with nothing to enter
+    # with (no coin to sell, no cash to buy): only session boundaries are visited
+    n = 365 * 1440
+    timestamps = 1.7e9 + np.arange(n) * 60.0
+    prices = level + 50 * np.sin(np.arange(n) / 500)
+    config = backtest.BacktestConfig(symbol='BTCINR')
+    result = backtest.run_backtest('BTCINR', timestamps, prices, np.ones(n), config, initial_cash=initial_cash)
+    assert result.fills == []
+    assert result.events <= 3 * 365
+
+    full = _full_replay(monkeypatch, 'BTCINR', timestamps[:20000], prices[:20000], np.ones(20000), config,
+                        0.0, 60, backtest.BUFFER_AMOUNT, None, initial_cash)
+    assert full.fills == []
@@ -0,0 +1,82 @@
+import pytest
+
+from coindcx_client import CoinDCXClient
+from fake_exchange import FakeCoinDCX
+
+
+class FailingFirst(FakeCoinDCX):
+    # Answers the first `failures[endpoint]` requests to an endpoint with an error
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = {}
+
+    def handle(self, endpoint, params):
+        with self.lock:
+            failing = self.failures.get(endpoint, 0) > 0
+            if failing:
+                self.failures[endpoint] -= 1
+                self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if failing:
+            return 500, {'status': 'error', 'message': 'injected failure'}
+        return super().handle(endpoint, params)
+
+
+@pytest.fixture
+def market():
+    fakes = []
+
+    def start(failures=None):
+        fake = FailingFirst(prices={'BTCINR': 1000.0})
+        fake.start()
+        fakes.append(fake)
+        client = CoinDCXClient('key', 'secret', base_url=fake.base_url, max_retries=0)
+        stop = client.place_order('BTCINR', 'sell', 'stop-limit', 979.5, 1.0, stop_price=980.0)['data']['order_id']
+        fake.failures = dict(failures or {})
+        return fake, client, stop
+
+    yield start
+    for fake in fakes:
+        fake.stop()
+
+
+def _replace(client, stop):
+    return client.cancel_replace(stop, 'BTCINR', 'sell', 'stop-limit', 989.5, 1.0, stop_price=990.0)
+
+
+def _status(fake, order_id):
+    return fake.exchange.orders[order_id]['status']
+
+
+def test_cancel_and_place_both_succeed(market):
+    fake, client, stop = market()
+    cancel_response, place_response = _replace(client, stop)
+    assert cancel_response['status'] == 'success'
+    assert _status(fake, stop) == 'cancelled'
+    assert _status(fake, place_response['data']['order_id']) == 'open'
+
+
+def test_replacement_rejected_is_placed_again_after_the_cancel(market):
+    fake, client, stop = market({'place_order': 1})
+    cancel_response, place_response = _replace(client, stop)
+    assert cancel_response['status'] == 'success'
+    assert place_response['status'] == 'success'
+    assert _status(fake, stop) == 'cancelled'
+    assert _status(fake, place_response['data']['order_id']) == 'open'
+    assert fake.stats()['requests']['place_order'] == 3  # Original stop, rejected replacement, retry
+
+
+def test_replacement_withdrawn_when_the_cancel_fails(market):
+    fake, client, stop = market({'cancel_order': 1})
+    cancel_response, place_response = _replace(client, stop)
+    assert cancel_response['status'] == 'error'
+    assert place_response['status'] == 'error' and place_response['withdrawn']
+    # The old stop still covers the position, and only it
+    assert _status(fake, stop) == 'open'
+    assert _status(fake, place_response['data']['order_id']) == 'cancelled'
+
+
+def test_replacement_left_open_is_reported_when_it_cannot_be_withdrawn(market):
+    fake, client, stop = market({'cancel_order': 2})
+    cancel_response, place_response = _replace(client, stop)
+    assert place_response['status'] == 'error' and not place_response['withdrawn']
+    assert _status(fake, place_response['data']['order_id']) == 'open'
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+import requests
+
+import fake_exchange
+from coindcx_client import CoinDCXClient
+from fake_exchange import FakeCoinDCX
+
+
+def _client(fake, **kwargs):
+    kwargs.setdefault('backoff_factor', 0)
+    return CoinDCXClient('key', 'secret', base_url=fake.base_url, **kwargs)
+
+
+def test_requests_share_one_keep_alive_connection(monkeypatch):
+    connections = []
+    setup = fake_exchange._FakeHandler.setup
+    monkeypatch.setattr(fake_exchange._FakeHandler, 'setup', lambda handler: (connections.append(1), setup(handler)))
+    with FakeCoinDCX(prices={'BTCINR': 1000.0}) as fake:
+        client = _client(fake)
+        for _ in range(5):
+            client.get_order_book('BTCINR')
+        client.place_order('BTCINR', 'buy', 'limit', 900.0, 1.0)
+        client.close()
+    assert len(connections) == 1
+
+
+def test_failed_get_is_retried_until_it_succeeds():
+    with FakeCoinDCX(prices={'BTCINR': 1000.0}, endpoint_errors={'order_book': 0.5}, error_status=503, seed=1) as fake:
+        client = _client(fake, max_retries=10)
+        for _ in range(10):
+            assert client.get_order_book('BTCINR')['last_traded_price'] == '1000.0'
+        stats = fake.stats()
+    assert stats['errors']['order_book'] > 0
+    assert stats['requests']['order_book'] == 10 + stats['errors']['order_book']
+
+
+def test_failed_post_is_not_replayed():
+    with FakeCoinDCX(prices={'BTCINR': 1000.0}, endpoint_errors={'place_order': 1.0}, error_status=503) as fake:
+        client = _client(fake, max_retries=3)
+        response = client.place_order('BTCINR', 'buy', 'limit', 900.0, 1.0)
+        stats = fake.stats()
+    assert response['status'] == 'error'
+    assert stats['requests']['place_order'] == 1
+
+
+def test_slow_response_raises_read_timeout():
+    with FakeCoinDCX(prices={'BTCINR': 1000.0}, endpoint_latency={'order_book': 0.5, 'place_order': 0.5}) as fake:
+        client = _client(fake, read_timeout=0.1)
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.get_order_book('BTCINR')
+
+        # A timed-out order may still have been placed, so it is not sent again
+        retrying = _client(fake, read_timeout=0.1, max_retries=3)
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            retrying.place_order('BTCINR', 'buy', 'limit', 900.0, 1.0)
+        time.sleep(0.6)  # The server finishes the request the client gave up on
+        assert fake.stats()['requests']['place_order'] == 1
@@ -0,0 +1,32 @@
+import logging
+
+from coindcx_client import CoinDCXClient
+from fake_exchange import FakeCoinDCX
+from market_catalog import MarketCatalog
+
+
+def test_catalog_loads_trading_rules_from_markets_details():
+    with FakeCoinDCX(prices={'BTCINR': 1000.0, 'ETHINR': 500.0}) as fake:
+        client = CoinDCXClient('key', 'secret', base_url=fake.base_url)
+        assert client.get_markets() == ['BTCINR', 'ETHINR']  # Names only, as the real API answers
+        catalog = MarketCatalog(client)
+        catalog.refresh()
+
+    assert catalog.active_symbols() == ['BTCINR', 'ETHINR']
+    info = catalog.get('BTCINR')
+    assert (info.base_currency, info.quote_currency, info.pair) == ('BTC', 'INR', 'I-BTC_INR')
+    assert info.round_price(1000.004) == 1000.0
+    assert info.round_quantity(1.23456789) == 1.234567
+
+
+class NamesOnly:
+    def get_markets_details(self):
+        return ['BTCINR', 'ETHINR']
+
+
+def test_empty_catalog_is_logged(caplog):
+    catalog = MarketCatalog(NamesOnly())
+    with caplog.at_level(logging.ERROR):
+        catalog.refresh()
+    assert catalog.active_symbols() == []
+    assert 'Market catalog is empty' in caplog.text
@@ -0,0 +1,45 @@
+import threading
+
+from market_feed import FakeTransport, MarketFeed
+
+CHANNEL = 'B-BTC_INR'
+
+
+class SnapshotClient:
+    def get_order_book(self, market):
+        return {
+            'bids': {'100.0': '1.0', '99.0': '2.0'},
+            'asks': {'101.0': '1.0', '102.0': '3.0'},
+            'last_traded_price': '100.5',
+        }
+
+
+def test_snapshot_then_deltas_and_trades():
+    transport = FakeTransport()
+    feed = MarketFeed(transport, client=SnapshotClient())
+    trades = []
+    traded = threading.Event()
+    feed.on_trade(lambda *trade: (trades.append(trade), traded.set()))
+    feed.start()
+    try:
+        # Seeded from one REST snapshot, then listening on the market's channel
+        feed.subscribe('BTCINR', CHANNEL)
+        assert transport.channels == {CHANNEL}
+        last_price, seeded = feed.get_market_data('BTCINR')
+        assert last_price == 100.5
+        assert (seeded.best_bid(), seeded.best_ask()) == (100.0, 101.0)
+        sequence = feed.sequence['BTCINR']
+
+        # A zero size removes the level; new levels are inserted in order
+        transport.push('depth-update', {'s': CHANNEL, 'bids': {'100.0': '0', '100.5': '4.0'}, 'asks': {'101.0': '0'}})
+        sequence = feed.wait_for_update('BTCINR', sequence, timeout=2)
+        assert (feed.best_bid('BTCINR'), feed.best_ask('BTCINR')) == (100.5, 102.0)
+        assert (seeded.best_bid(), seeded.best_ask()) == (100.0, 101.0)  # Copies do not move with the feed
+
+        transport.push('new-trade', {'s': CHANNEL, 'p': '101.5', 'q': '0.2', 'T': 1700000000000})
+        assert traded.wait(timeout=2)  # Trade callbacks run after the price is published
+        assert feed.get_market_data('BTCINR')[0] == 101.5
+        assert trades == [('BTCINR', 1700000000.0, 101.5, 0.2)]
+        assert feed.is_fresh('BTCINR', max_age=30)
+    finally:
+        feed.stop()
@@ -0,0 +1,32 @@
+import time
+
+from portfolio import Portfolio
+
+
+class BalanceClient:
+    def __init__(self):
+        self.calls = 0
+
+    def get_account_balance(self):
+        self.calls += 1
+        return [{'currency': 'INR', 'balance': '5000', 'locked_balance': '0'}]
+
+
+def test_paused_portfolio_sends_no_requests():
+    client = BalanceClient()
+    portfolio = Portfolio(client, refresh_interval=0.05, settle_delay=0)
+    portfolio.start()
+    try:
+        portfolio.set_active(False)
+        time.sleep(0.1)  # Let a refresh already under way finish
+        calls = client.calls
+        portfolio.wake.set()  # A fill reported while paused
+        time.sleep(0.3)
+        assert client.calls == calls
+
+        # Resuming reloads the stale balances before anything is checked against them
+        portfolio.set_active(True)
+        assert client.calls == calls + 1
+        assert portfolio.available('INR') == 5000.0
+    finally:
+        portfolio.stop()
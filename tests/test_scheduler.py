@@ -0,0 +1,50 @@
+import threading
+import time
+from datetime import timedelta
+
+from backtest import BacktestConfig
+from market_feed import FakeTransport, MarketFeed
+from scheduler import MarketScheduler
+from strategy import get_current_time
+
+
+def _scheduler(feed=None):
+    # One market in session for the next hour, just ticked
+    scheduler = MarketScheduler(feed=feed, poll_interval=60, min_tick_interval=0.05)
+    state = scheduler.sync([BacktestConfig(symbol='BTCINR')])[0]
+    state.in_session = True
+    state.session_hours = (state.config.session_start, state.config.session_end)
+    state.session_change_at = get_current_time() + timedelta(hours=1)
+    scheduler.mark_ticked(state)
+    return scheduler, state
+
+
+def test_wait_blocks_until_signalled():
+    scheduler, _ = _scheduler()
+    threading.Timer(0.2, scheduler.signal).start()
+    started = time.monotonic()
+    scheduler.wait()
+    assert 0.15 < time.monotonic() - started < 2
+
+
+def test_first_stream_update_of_an_in_session_market_wakes_the_loop():
+    feed = MarketFeed(FakeTransport())
+    scheduler, state = _scheduler(feed)
+    feed.subscribe('BTCINR')
+    feed.on_update(scheduler.feed_updated)
+    feed.apply_trade('BTCINR', {'p': '1000'})
+    assert scheduler.wakeup.is_set()
+    scheduler.wait()
+    # Later updates do not wake it again; it is due min_tick_interval after its last tick
+    feed.apply_trade('BTCINR', {'p': '1001'})
+    assert not scheduler.wakeup.is_set()
+    started = time.monotonic()
+    scheduler.wait()
+    assert scheduler.due_markets() == [state]
+    assert time.monotonic() - started < 1
+
+    # Out of session, stream updates leave the loop asleep
+    scheduler.mark_ticked(state)
+    state.in_session = False
+    feed.apply_trade('BTCINR', {'p': '1002'})
+    assert not scheduler.wakeup.is_set()
@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, inspect, text
+
+from config_cache import ConfigCache
+from schema import upgrade_schema
+
+# config and bot_status as created by the first release, before markets could
+# be enabled per row and before status edits were versioned
+BASELINE = [
+    'CREATE TABLE config (id INTEGER PRIMARY KEY, symbol VARCHAR(20) NOT NULL, session_start TIME NOT NULL, '
+    'session_end TIME NOT NULL, sl_amount FLOAT NOT NULL, tsl_step FLOAT NOT NULL, trade_quantity FLOAT NOT NULL)',
+    'CREATE TABLE bot_status (id INTEGER PRIMARY KEY, running BOOLEAN NOT NULL)',
+    "INSERT INTO config VALUES (1, 'BTCINR', '08:00:00.000000', '05:00:00.000000', 25.0, 10.0, 1000.0)",
+    'INSERT INTO bot_status VALUES (1, 1)',
+]
+
+
+def test_upgrades_baseline_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE:
+            connection.execute(text(statement))
+
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # Nothing left to do the second time
+
+    inspector = inspect(engine)
+    assert {'order_record', 'position_record', 'shard_worker', 'shard_lease'} <= set(inspector.get_table_names())
+    assert any(index['unique'] and index['column_names'] == ['symbol'] for index in inspector.get_indexes('config'))
+
+    cache = ConfigCache(engine)
+    cache.reload()
+    configs, status = cache.get()
+    assert [(config.symbol, config.enabled) for config in configs] == [('BTCINR', True)]
+    assert status.running and status.version == 0
@@ -0,0 +1,74 @@
+# tests/test_sharding.py
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from models import ShardLease, ShardWorker
+from sharding import ShardCoordinator
+
+MARKETS = ['BTCINR', 'ETHINR', 'SOLINR', 'XRPINR']
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shard.db'}")
+    ShardWorker.__table__.create(engine)
+    ShardLease.__table__.create(engine)
+    return engine
+
+
+def _worker(engine, worker_id, lease_ttl=30.0):
+    # Driven by calling beat() directly instead of the heartbeat thread
+    return ShardCoordinator(engine, lambda: MARKETS, worker_id=worker_id, lease_ttl=lease_ttl, heartbeat_interval=0.1)
+
+
+def _owners(workers, market):
+    return [worker.worker_id for worker in workers if worker.owns(market)]
+
+
+def test_markets_are_split_between_workers(engine):
+    first, second = _worker(engine, 'w1'), _worker(engine, 'w2')
+    for worker in (first, second, first, second):
+        worker.beat()
+    assert first.is_leader and not second.is_leader
+    assert len(first.owned_markets()) == len(second.owned_markets()) == 2
+    for market in MARKETS:
+        assert len(_owners((first, second), market)) == 1
+
+
+def test_lease_is_released_only_after_the_loop_lets_go(engine):
+    first = _worker(engine, 'w1')
+    first.beat()
+    assert first.claim_owned() == MARKETS  # The trading loop now manages every market
+
+    second = _worker(engine, 'w2')
+    second.beat()
+    first.beat()  # Leader hands half of the markets to w2
+    second.beat()
+    moved = [market for market in MARKETS if not first.owns(market)]
+    assert len(moved) == 2
+    assert second.owned_markets() == []  # Still leased to w1 until it acknowledges
+
+    for market in moved:
+        first.ack_released(market)
+    first.beat()
+    second.beat()
+    assert second.owned_markets() == moved
+    for market in MARKETS:
+        assert len(_owners((first, second), market)) == 1
+
+
+def test_markets_move_when_a_worker_stops_heartbeating(engine):
+    crashed = _worker(engine, 'w1', lease_ttl=0.3)
+    crashed.beat()
+    crashed.claim_owned()
+    survivor = _worker(engine, 'w2', lease_ttl=0.3)
+    survivor.beat()
+    assert survivor.owned_markets() == []
+
+    time.sleep(0.4)  # w1's heartbeat and leases expire
+    survivor.beat()
+    assert survivor.is_leader
+    assert survivor.owned_markets() == MARKETS
+    assert crashed.owned_markets() == []
@@ -0,0 +1,107 @@
+# tests/test_trader.py
+from datetime import time as dtime
+
+from backtest import BacktestConfig, SimulatedExchange
+from market_state import MarketState
+from order_journal import ACTIVE_STATUSES, CANCELLED, ROLE_STOP_LOSS
+from trader import TradingEngine
+
+
+def _engine(price):
+    exchange = SimulatedExchange()
+    exchange.set_market_price('BTCINR', 0.0, price)
+    engine = TradingEngine(exchange)
+    state = MarketState(BacktestConfig(symbol='BTCINR', session_start=dtime(8, 0), session_end=dtime(5, 0)))
+    return exchange, engine, state
+
+
+def test_session_close_keeps_the_stop_loss_of_an_open_position():
+    exchange, engine, state = _engine(990.0)
+    engine.tick(state, 990.0)  # Entry fills on arrival
+    engine.poll_orders()
+    engine.tick(state, 990.0)  # Stop loss follows the fill
+    sl_order_id = state.sl_order_id
+    assert engine.journal.get(sl_order_id)['role'] == ROLE_STOP_LOSS
+
+    engine.close_session([state])
+
+    assert engine.journal.get(sl_order_id)['status'] in ACTIVE_STATUSES
+    assert exchange.orders[sl_order_id]['status'] == 'open'
+    assert state.sl_order_id == sl_order_id
+    assert not state.unprotected
+
+
+def test_session_close_cancels_resting_entries_and_protects_partial_fills():
+    exchange, engine, state = _engine(1200.0)
+    entry_id = engine.place_order('BTCINR', 'buy', 'limit', 1000.0, 1.0)
+    state.entry_order_id = entry_id
+    exchange.orders[entry_id]['filled_quantity'] = 0.4  # Part of it traded before the close
+    exchange.orders[entry_id]['avg_price'] = 1000.0
+
+    engine.close_session([state])
+
+    entry = engine.journal.get(entry_id)
+    assert entry['status'] == CANCELLED
+    assert entry['filled_quantity'] == 0.4
+    stop = engine.journal.get(state.sl_order_id)
+    assert stop['role'] == ROLE_STOP_LOSS
+    assert stop['quantity'] == 0.4
+    assert state.symbol not in engine.order_events
+
+
+def test_entries_are_sized_from_the_inr_amount():
+    exchange, engine, state = _engine(990.0)
+    state.config.trade_quantity = 5000.0
+    engine.tick(state, 990.0)
+    entry = engine.journal.get(state.entry_order_id)
+    assert entry['price'] == 1000.0
+    assert entry['quantity'] == 5.0
+
+
+def test_sell_position_stop_trails_new_lows_only():
+    exchange, engine, state = _engine(2010.0)
+    engine.tick(state, 2010.0)  # Sell entry at 2000 fills on arrival, at 2010
+    engine.poll_orders()
+    engine.tick(state, 2010.0)  # Buy stop above the fill
+    sl_order_id = state.sl_order_id
+    stop = engine.journal.get(sl_order_id)
+    assert (stop['side'], stop['stop_price']) == ('buy', 2035.0)
+
+    # A new high must not move a short's stop
+    exchange.set_market_price('BTCINR', 1.0, 2015.0)
+    engine.poll_orders()
+    engine.tick(state, 2015.0)
+    assert state.sl_order_id == sl_order_id
+    assert exchange.orders[sl_order_id]['status'] == 'open'
+
+    # A new low moves it down, still a buy stop above the market
+    exchange.set_market_price('BTCINR', 2.0, 1990.0)
+    engine.poll_orders()
+    engine.tick(state, 1990.0)
+    assert exchange.orders[sl_order_id]['status'] == 'cancelled'
+    stop = engine.journal.get(state.sl_order_id)
+    assert (stop['side'], stop['stop_price']) == ('buy', 2015.0)
+    assert exchange.orders[state.sl_order_id]['status'] == 'open'
+
+
+def test_partial_fill_is_protected_and_the_stop_grows_with_the_fill():
+    exchange, engine, state = _engine(1200.0)
+    entry_id = engine.place_order('BTCINR', 'buy', 'limit', 1000.0, 1.0)
+    state.entry_order_id = entry_id
+    order = exchange.orders[entry_id]
+
+    order.update(status='partially_filled', filled_quantity=0.4, avg_price=1000.0)
+    engine.poll_orders()
+    engine.tick(state, 1200.0)
+    first_stop = engine.journal.get(state.sl_order_id)
+    assert (first_stop['side'], first_stop['quantity'], first_stop['stop_price']) == ('sell', 0.4, 975.0)
+
+    order.update(status='filled', filled_quantity=1.0)
+    exchange.open_orders['BTCINR'].remove(order)
+    engine.poll_orders()
+    engine.tick(state, 1200.0)
+    assert exchange.orders[first_stop['order_id']]['status'] == 'cancelled'
+    stop = engine.journal.get(state.sl_order_id)
+    assert (stop['side'], stop['quantity'], stop['stop_price']) == ('sell', 1.0, 975.0)
+    assert exchange.orders[stop['order_id']]['status'] == 'open'
+    assert not state.unprotected
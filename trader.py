@@ -0,0 +1,443 @@
+# trader.py
+import logging
+import time
+
+from metrics import SIGNAL_TO_ORDER
+from order_journal import (
+    OrderJournal,
+    ACTIVE_STATUSES,
+    CANCELLED,
+    FILLED,
+    ROLE_ENTRY,
+    ROLE_STOP_LOSS,
+)
+from rate_limiter import PRIORITY_PROTECTIVE, PRIORITY_TRADING
+from strategy import entry_quantity, entry_signal, stop_loss_prices, stop_distance, supports_trailing, BUFFER_AMOUNT
+from trailing_stop import TrailingStopManager
+
+
+class TradingEngine:
+    # Order handling and per-tick strategy for one worker, independent of where
+    # prices come from. bot.py drives it with live data and the CoinDCX client;
+    # backtest.py drives it with recorded data and a simulated exchange.
+    # Open orders and SL state are read from the order journal. Order status
+    # comes from poll_orders(), one bulk request per interval for all markets,
+    # and reaches the strategy as fill events handled at the top of tick().
+
+    def __init__(self, client, market_catalog=None, buffer_amount=BUFFER_AMOUNT, journal=None, order_poll_interval=0.0,
+                 background_trailing=False, portfolio=None, coordinator=None):
+        self.client = client
+        self.market_catalog = market_catalog
+        self.buffer_amount = buffer_amount
+        self.journal = journal if journal is not None else OrderJournal()
+        self.order_poll_interval = order_poll_interval
+        self.polled_at = float('-inf')
+        self.order_events = {}
+        self.journal.on_update(self._order_updated)
+        self.trailing = TrailingStopManager(self, background=background_trailing)
+        # With a Portfolio, entries are checked against cached balances before
+        # they are sent
+        self.portfolio = portfolio
+        if portfolio is not None:
+            self.journal.on_update(portfolio.on_order_update)
+        # With a sharding.ShardCoordinator, no order is sent for a market this
+        # worker does not currently own
+        self.coordinator = coordinator
+
+    def _owns(self, market):
+        if self.coordinator is None or self.coordinator.owns(market):
+            return True
+        logging.warning("Not sending order for %s: market is owned by another worker", market, extra={'market': market})
+        return False
+
+    def _round_quantity(self, market, quantity):
+        info = self.market_catalog.get(market) if self.market_catalog is not None else None
+        return info.round_quantity(quantity) if info is not None else quantity
+
+    def _round_order(self, market, side, order_type, price, quantity, stop_price):
+        # Round to the market's tick size / quantity step and reject orders the exchange would
+        info = self.market_catalog.get(market) if self.market_catalog is not None else None
+        if info is None:
+            return price, quantity, stop_price
+        price = info.round_price(price)
+        stop_price = info.round_price(stop_price)
+        quantity = info.round_quantity(quantity)
+        error = info.validate(price, quantity)
+        if error:
+            logging.error("Rejected %s %s order for %s: %s", side, order_type, market, error,
+                          extra={'market': market, 'side': side, 'price': price, 'quantity': quantity})
+            return None
+        return price, quantity, stop_price
+
+    def place_order(self, market, side, order_type, price, quantity, stop_price=None, priority=PRIORITY_TRADING,
+                    role=ROLE_ENTRY):
+        try:
+            if not self._owns(market):
+                return None
+            rounded = self._round_order(market, side, order_type, price, quantity, stop_price)
+            if rounded is None:
+                return None
+            price, quantity, stop_price = rounded
+            # Protective orders are never held back; they only reduce what we hold
+            if self.portfolio is not None and role == ROLE_ENTRY and not self.portfolio.allow(market, side, price, quantity):
+                return None
+            response = self.client.place_order(
+                market=market,
+                side=side,
+                order_type=order_type,
+                price=price,
+                quantity=quantity,
+                stop_price=stop_price,
+                priority=priority
+            )
+            if response.get('status') == 'success':
+                order_id = response.get('data', {}).get('order_id')
+                logging.info("Placed %s %s order: %s at price %s, quantity %s", side, order_type, order_id, price, quantity,
+                             extra={'order_id': order_id, 'market': market, 'side': side, 'price': price,
+                                    'quantity': quantity, 'role': role})
+                self.journal.record_order(order_id, market, role, side, order_type, price, quantity, stop_price=stop_price)
+                if self.portfolio is not None:
+                    self.portfolio.reserve(market, side, price, quantity)
+                return order_id
+            else:
+                logging.error("Failed to place order: %s", response, extra={'market': market, 'side': side, 'price': price})
+                return None
+        except Exception as e:
+            logging.error("Error placing order: %s", e, extra={'market': market, 'side': side, 'price': price})
+            return None
+
+    def cancel_order(self, order_id):
+        try:
+            response = self.client.cancel_order(order_id=order_id)
+            if response.get('status') == 'success':
+                logging.info("Cancelled order: %s", order_id, extra={'order_id': order_id})
+                self.journal.mark(order_id, CANCELLED)
+                return True
+            else:
+                logging.error("Failed to cancel order %s: %s", order_id, response, extra={'order_id': order_id})
+                return False
+        except Exception as e:
+            logging.error("Error cancelling order %s: %s", order_id, e, extra={'order_id': order_id})
+            return False
+
+    def replace_stop_loss(self, config, sl_order_id, entry_price, side, quantity, buffer_amount, atr=None):
+        # Move a stop loss with one pipelined cancel-replace. Falls back to
+        # set_stop_loss_with_buffer if the old stop is gone but the new one
+        # could not be placed. Returns the live SL order ID, or None if the
+        # old stop could not be cancelled (it may have filled).
+        stop_price, limit_price, sl_side = stop_loss_prices(entry_price, side, stop_distance(config.sl_amount, atr), buffer_amount)
+        cancelled, order_id = self._replace_stop(config.symbol, sl_order_id, sl_side, limit_price, quantity, stop_price)
+        if cancelled and order_id is None:
+            return self.set_stop_loss_with_buffer(config, entry_price, side, quantity, buffer_amount, atr=atr)
+        return order_id
+
+    def resize_stop_loss(self, state, stop, quantity, fill_price, side):
+        # Cover a grown fill: same stop and limit price, new quantity, in one
+        # pipelined cancel-replace. Returns the live SL order ID; the old one
+        # if it could not be cancelled (it may have filled).
+        cancelled, order_id = self._replace_stop(state.symbol, stop['order_id'], stop['side'], stop['price'], quantity,
+                                                 stop['stop_price'])
+        if not cancelled:
+            return stop['order_id']
+        if order_id is None:
+            order_id = self.set_stop_loss_with_buffer(state.config, fill_price, side, quantity,
+                                                      buffer_amount=self.buffer_amount, atr=state.indicators.atr.value)
+        return order_id
+
+    def _replace_stop(self, market, sl_order_id, sl_side, limit_price, quantity, stop_price):
+        # Returns (cancelled, new order ID or None)
+        try:
+            if not self._owns(market):
+                return False, None
+            rounded = self._round_order(market, sl_side, 'stop-limit', limit_price, quantity, stop_price)
+            if rounded is None:
+                return False, None
+            limit_price, quantity, stop_price = rounded
+            cancel_response, place_response = self.client.cancel_replace(
+                sl_order_id,
+                market=market,
+                side=sl_side,
+                order_type='stop-limit',
+                price=limit_price,
+                quantity=quantity,
+                stop_price=stop_price,
+                priority=PRIORITY_PROTECTIVE
+            )
+        except Exception as e:
+            logging.error("Error replacing stop loss %s: %s", sl_order_id, e, extra={'order_id': sl_order_id, 'market': market})
+            return False, None
+
+        if cancel_response.get('status') != 'success':
+            logging.error("Failed to cancel stop loss %s for replacement: %s / %s", sl_order_id, cancel_response, place_response,
+                          extra={'order_id': sl_order_id, 'market': market})
+            return False, None
+        logging.info("Cancelled order: %s", sl_order_id, extra={'order_id': sl_order_id, 'market': market})
+        self.journal.mark(sl_order_id, CANCELLED)
+        if place_response.get('status') == 'success':
+            order_id = place_response.get('data', {}).get('order_id')
+            logging.info("Stop Limit order placed: Order ID = %s, Stop Price = %s, Limit Price = %s", order_id, stop_price,
+                         limit_price, extra={'order_id': order_id, 'market': market, 'stop_price': stop_price,
+                                             'price': limit_price})
+            self.journal.record_order(order_id, market, ROLE_STOP_LOSS, sl_side, 'stop-limit', limit_price, quantity,
+                                      stop_price=stop_price)
+            return True, order_id
+        logging.warning("Replacement stop loss rejected: %s. Placing it again.", place_response, extra={'market': market})
+        return True, None
+
+    def set_stop_loss_with_buffer(self, config, entry_price, side, quantity, buffer_amount, atr=None):
+        try:
+            stop_price, limit_price, sl_side = stop_loss_prices(entry_price, side, stop_distance(config.sl_amount, atr), buffer_amount)
+
+            # Attempt to place Stop Limit order
+            order_id = self.place_order(
+                market=config.symbol,
+                side=sl_side,
+                order_type='stop-limit',
+                price=limit_price,
+                quantity=quantity,
+                stop_price=stop_price,
+                priority=PRIORITY_PROTECTIVE,
+                role=ROLE_STOP_LOSS
+            )
+
+            if order_id:
+                logging.info("Stop Limit order placed: Order ID = %s, Stop Price = %s, Limit Price = %s", order_id, stop_price,
+                             limit_price, extra={'order_id': order_id, 'market': config.symbol, 'stop_price': stop_price,
+                                                 'price': limit_price})
+                return order_id
+            else:
+                logging.warning("Failed to place Stop Limit order. Retrying once.")
+                # Retry once
+                order_id = self.place_order(
+                    market=config.symbol,
+                    side=sl_side,
+                    order_type='stop-limit',
+                    price=limit_price,
+                    quantity=quantity,
+                    stop_price=stop_price,
+                    priority=PRIORITY_PROTECTIVE,
+                    role=ROLE_STOP_LOSS
+                )
+                if order_id:
+                    logging.info("Stop Limit order placed on retry: Order ID = %s, Stop Price = %s, Limit Price = %s", order_id,
+                                 stop_price, limit_price, extra={'order_id': order_id, 'market': config.symbol,
+                                                                 'stop_price': stop_price, 'price': limit_price})
+                    return order_id
+                else:
+                    logging.warning("Failed to place Stop Limit order on retry. Placing Stop Market order.")
+                    # Place Stop Market order as fallback
+                    order_id = self.place_order(
+                        market=config.symbol,
+                        side=sl_side,
+                        order_type='market',
+                        price=None,  # Market order doesn't require price
+                        quantity=quantity,
+                        priority=PRIORITY_PROTECTIVE,
+                        role=ROLE_STOP_LOSS
+                    )
+                    if order_id:
+                        logging.info("Stop Market order placed: Order ID = %s", order_id,
+                                     extra={'order_id': order_id, 'market': config.symbol})
+                        return order_id
+                    else:
+                        logging.error("Failed to place Stop Market order.")
+                        return None
+        except Exception as e:
+            logging.error("Error setting stop-loss with buffer: %s", e, extra={'market': config.symbol})
+            return None
+
+    def poll_orders(self, now=None):
+        # One bulk status request for every tracked order across all markets,
+        # at most once per order_poll_interval; fills surface as events
+        now = time.monotonic() if now is None else now
+        if now - self.polled_at < self.order_poll_interval:
+            return
+        self.polled_at = now
+        try:
+            self.journal.poll(self.client)
+        except Exception as e:
+            logging.error("Error polling order statuses: %s", e)
+
+    def next_poll_in(self, now=None):
+        # Seconds until poll_orders() would send its next request; inf while no order is tracked
+        if not self.journal.tracked_ids():
+            return float('inf')
+        now = time.monotonic() if now is None else now
+        return max(0.0, self.polled_at + self.order_poll_interval - now)
+
+    def _order_updated(self, record, previous_status):
+        # Journal listener: queue the event for the market's next tick
+        self.order_events.setdefault(record['market'], []).append(record)
+
+    def release_market(self, state):
+        # Stop managing a market handed to another worker: let any stop-loss
+        # move in flight finish, persist its SL state and drop anything still
+        # queued for it
+        self.trailing.finish(state.symbol)
+        self.order_events.pop(state.symbol, None)
+        self.trailing.collect(state)
+        self.journal.save_position(state, force=True)
+        self.journal.forget_market(state.symbol)
+
+    def handle_order_events(self, state):
+        for record in self.order_events.pop(state.symbol, ()):
+            order_id = record['order_id']
+            status = record['status']
+            filled = record['filled_quantity'] or 0
+            if order_id == state.entry_order_id:
+                if filled > 0:
+                    self.cover_fill(state, record)
+                elif status == CANCELLED and filled == 0:
+                    state.entry_order_id = None
+            elif order_id == state.sl_order_id and status == FILLED:
+                logging.info("Stop loss order executed: %s", order_id, extra={'order_id': order_id, 'market': state.symbol})
+                entry = self.journal.get(state.entry_order_id) if state.entry_order_id else None
+                if entry is not None and entry['status'] in ACTIVE_STATUSES:
+                    # Stopped out while the rest of the entry still rests; later
+                    # fills would have no stop loss
+                    self.cancel_order(entry['order_id'])
+                state.reset_stop_loss()  # Reset after execution
+
+    def cover_fill(self, state, record):
+        # Protect exactly what the entry has bought or sold so far, from the
+        # actual fill price: the first fill places the stop loss, later
+        # partial fills grow it to the filled quantity
+        order_id = record['order_id']
+        filled = record['filled_quantity']
+        fill_price = record['avg_price'] or record['price']
+        logging.info("Entry order %s %s: %s of %s at %s", order_id, record['status'], filled, record['quantity'], fill_price,
+                     extra={'order_id': order_id, 'market': state.symbol, 'filled_quantity': filled, 'price': fill_price})
+        if state.sl_order_id is None:
+            state.sl_order_id = self.set_stop_loss_with_buffer(state.config, fill_price, record['side'], filled,
+                                                               buffer_amount=self.buffer_amount,
+                                                               atr=state.indicators.atr.value)
+            state.tsl_triggered = False  # Reset TSL trigger
+            state.unprotected = state.sl_order_id is None
+            return
+        stop = self.journal.get(state.sl_order_id)
+        if stop is None or stop['quantity'] >= self._round_quantity(state.symbol, filled):
+            return
+        # Let a trailing move in flight land first so the resize replaces the live stop
+        self.trailing.finish(state.symbol)
+        self.trailing.collect(state)
+        stop = self.journal.get(state.sl_order_id) if state.sl_order_id else None
+        if stop is None:
+            return  # The move lost the stop; protect() re-places it for the filled quantity
+        state.sl_order_id = self.resize_stop_loss(state, stop, filled, fill_price, record['side'])
+        state.unprotected = state.sl_order_id is None
+
+    def position_side(self, state):
+        # Side of the entry the stop loss protects: the opposite of the
+        # journaled SL, else the journaled entry's side
+        stop = self.journal.get(state.sl_order_id) if state.sl_order_id else None
+        if stop is not None:
+            return 'buy' if stop['side'] == 'sell' else 'sell'
+        entry = self.journal.get(state.entry_order_id) if state.entry_order_id else None
+        return entry['side'] if entry is not None else None
+
+    def protect(self, state):
+        # Re-place the stop loss of a restored position whose SL is gone
+        entry = self.journal.get(state.entry_order_id)
+        state.unprotected = False
+        if entry is None:
+            return
+        logging.warning("Re-protecting %s: placing stop loss for entry %s", state.symbol, entry['order_id'],
+                        extra={'order_id': entry['order_id'], 'market': state.symbol})
+        state.sl_order_id = self.set_stop_loss_with_buffer(state.config, entry['avg_price'] or entry['price'], entry['side'],
+                                                           entry['filled_quantity'] or entry['quantity'],
+                                                           buffer_amount=self.buffer_amount, atr=state.indicators.atr.value)
+        state.tsl_triggered = False
+        state.unprotected = state.sl_order_id is None
+
+    def tick(self, state, last_price):
+        config = state.config
+        SYMBOL = config.symbol
+        TRADE_QUANTITY = config.trade_quantity  # In INR
+        info = self.market_catalog.get(SYMBOL) if self.market_catalog is not None else None
+        tick_started = time.perf_counter()
+
+        # Initialize highest and lowest price trackers
+        previous_low = state.lowest_price
+        previous_high = state.update_extremes(last_price)
+
+        # Fills reported since the last tick: place the SL for a filled entry, reset after a stop-out
+        self.handle_order_events(state)
+        self.trailing.collect(state)
+        if state.unprotected:
+            self.protect(state)
+        open_orders = self.journal.open_orders(SYMBOL)
+
+        # Example: Place Buy or Sell Order
+        # The stop loss follows once the entry reports a fill
+        signal = entry_signal(last_price, open_orders, vwap=state.indicators.vwap.value)
+        if signal:
+            side, entry_price = signal
+            quantity = entry_quantity(TRADE_QUANTITY, entry_price, info)
+            order_id = self.place_order(
+                market=SYMBOL,
+                side=side,
+                order_type='limit',
+                price=entry_price,
+                quantity=quantity
+            )
+            if order_id:
+                SIGNAL_TO_ORDER.labels(SYMBOL).observe(time.perf_counter() - tick_started)
+                state.entry_order_id = order_id
+                state.sl_order_id = None
+                state.tsl_triggered = False  # Reset TSL trigger
+
+        # Implement Trailing Stop Loss Logic
+        # (This is a simplified example; adapt based on actual strategy)
+        if state.sl_order_id and not state.tsl_triggered:
+            if supports_trailing(config.symbol):
+                # Buy positions: move the SL up as price makes a new high.
+                # Sell positions: move it down as price makes a new low.
+                side = self.position_side(state)
+                if ((side == 'buy' and previous_high is not None and last_price > previous_high)
+                        or (side == 'sell' and previous_low is not None and last_price < previous_low)):
+                    stop = self.journal.get(state.sl_order_id)
+                    quantity = stop['quantity'] if stop else entry_quantity(TRADE_QUANTITY, last_price, info)
+                    # Cancel-replace the SL at the new level; applied here or on a later tick
+                    self.trailing.trail(state, last_price, side, quantity)
+
+        self.journal.save_position(state)
+
+    def cancel_orders(self, order_ids, confirm=False):
+        # One bulk request; falls back to cancelling one by one if it fails.
+        # With confirm, final statuses are read back in one status request, so
+        # fills that beat the cancel are recorded rather than lost.
+        try:
+            response = self.client.cancel_orders(order_ids)
+            # The exchange answers a bulk cancel with {'status': 200, 'message': 'success'}
+            if response.get('status') in ('success', 200):
+                logging.info("Cancelled %d orders: %s", len(order_ids), order_ids)
+                if confirm and self._confirm(order_ids):
+                    return True
+                for order_id in order_ids:
+                    self.journal.mark(order_id, CANCELLED)
+                return True
+            logging.error("Bulk cancel of %s failed: %s", order_ids, response)
+        except Exception as e:
+            logging.error("Error cancelling orders %s: %s", order_ids, e)
+        return all([self.cancel_order(order_id) for order_id in order_ids])
+
+    def _confirm(self, order_ids):
+        try:
+            self.journal.poll(self.client, order_ids)
+            return True
+        except Exception as e:
+            logging.error("Error confirming cancelled orders %s: %s", order_ids, e)
+            return False
+
+    def close_session(self, states):
+        # Session closed for these markets: their resting entries go in a
+        # single bulk cancel. Stop losses stay on the book to protect open
+        # positions until the next session.
+        order_ids = [order['order_id'] for state in states for order in self.journal.open_orders(state.symbol)
+                     if order['role'] != ROLE_STOP_LOSS]
+        if order_ids:
+            self.cancel_orders(order_ids, confirm=True)
+        for state in states:
+            # An entry partly filled before the close still gets its stop loss
+            self.handle_order_events(state)
+            self.journal.save_position(state)
@@ -0,0 +1,157 @@
+# trailing_stop.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import SL_UPDATE_LATENCY, TSL_COALESCED
+from order_journal import CANCELLED
+
+
+class TrailingStopManager:
+    # Moves stop-loss orders for the trailing logic in TradingEngine.tick.
+    # Each move is one pipelined cancel-replace (TradingEngine.replace_stop_loss).
+    #
+    # With background=True moves run on a small thread pool so the tick loop
+    # never waits on them. A request for a market whose previous move is still
+    # in flight replaces any request already queued behind it, so only the
+    # latest stop level is sent. Results are applied to the MarketState by
+    # collect() on the market's next tick. With background=False (backtests)
+    # moves run inline and apply immediately.
+    #
+    # The unprotected window of each move (old stop withdrawn until the new one
+    # is acknowledged) is recorded per market; see stats().
+
+    def __init__(self, engine, background=False, max_workers=4):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tsl') if background else None
+        self.lock = threading.Lock()
+        self.settled = threading.Condition(self.lock)  # Notified when a market has no move in flight
+        self.pending = {}
+        self.in_flight = set()
+        self.results = {}
+        self.windows = {}
+        self.coalesced = 0
+
+    def trail(self, state, entry_price, side, quantity):
+        request = {
+            'market': state.symbol,
+            'config': state.config,
+            'sl_order_id': state.sl_order_id,
+            'entry_price': entry_price,
+            'side': side,
+            'quantity': quantity,
+            'atr': state.indicators.atr.value,
+        }
+        if self.executor is None:
+            self._apply(state, self._replace(request))
+            return
+        with self.lock:
+            if state.symbol in self.pending:
+                self.coalesced += 1
+                TSL_COALESCED.inc()
+            self.pending[state.symbol] = request
+            if state.symbol in self.in_flight:
+                return
+            self.in_flight.add(state.symbol)
+        self.executor.submit(self._drain, state.symbol)
+
+    def _drain(self, market):
+        current_id = None
+        while True:
+            with self.lock:
+                request = self.pending.pop(market, None)
+                if request is None:
+                    self.in_flight.discard(market)
+                    self.settled.notify_all()
+                    return
+            if current_id is not None:
+                # Queued behind a move that already replaced the stop it names
+                request['sl_order_id'] = current_id
+            try:
+                result = self._replace(request)
+            except Exception as e:
+                logging.error("Error trailing stop loss for %s: %s", market, e, extra={'market': market})
+                result = None
+            with self.lock:
+                if result is not None:
+                    self.results[market] = result
+                if result is None or result['sl_order_id'] is None:
+                    # Nothing left to move; drop anything queued
+                    self.pending.pop(market, None)
+                    self.in_flight.discard(market)
+                    self.settled.notify_all()
+                    return
+            current_id = result['sl_order_id']
+
+    def _replace(self, request):
+        started = time.monotonic()
+        new_order_id = self.engine.replace_stop_loss(
+            request['config'],
+            request['sl_order_id'],
+            request['entry_price'],
+            request['side'],
+            request['quantity'],
+            buffer_amount=self.engine.buffer_amount,
+            atr=request['atr'],
+        )
+        window = time.monotonic() - started
+        old = self.engine.journal.get(request['sl_order_id'])
+        cancelled = old is not None and old['status'] == CANCELLED
+        if cancelled:
+            self._record_window(request['market'], window)
+            logging.info("Trailing stop for %s moved in %.0f ms", request['market'], window * 1000,
+                         extra={'market': request['market'], 'order_id': new_order_id, 'latency_ms': window * 1000})
+        return {'replaced_id': request['sl_order_id'], 'sl_order_id': new_order_id, 'cancelled': cancelled}
+
+    def _record_window(self, market, window):
+        SL_UPDATE_LATENCY.labels(market).observe(window)
+        with self.lock:
+            stats = self.windows.setdefault(market, {'moves': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['moves'] += 1
+            stats['total'] += window
+            stats['max'] = max(stats['max'], window)
+            stats['last'] = window
+
+    def finish(self, market):
+        # Drop moves queued for `market` and wait for the one in flight, whose
+        # result collect() then applies. Each move is bounded by the client's
+        # request timeouts.
+        with self.lock:
+            self.pending.pop(market, None)
+            self.settled.wait_for(lambda: market not in self.in_flight)
+
+    def collect(self, state):
+        with self.lock:
+            result = self.results.pop(state.symbol, None)
+        if result is not None:
+            self._apply(state, result)
+
+    def _apply(self, state, result):
+        if result['sl_order_id'] is not None:
+            state.sl_order_id = result['sl_order_id']
+            state.tsl_triggered = True
+            logging.info("Trailing Stop Loss updated for %s: New SL Order ID = %s", state.symbol, state.sl_order_id,
+                         extra={'market': state.symbol, 'order_id': state.sl_order_id})
+        elif result['cancelled'] and state.sl_order_id == result['replaced_id']:
+            # Old stop withdrawn and nothing replaced it
+            logging.error("%s lost its stop loss while trailing; re-protecting", state.symbol, extra={'market': state.symbol})
+            state.sl_order_id = None
+            state.unprotected = True
+
+    def stats(self):
+        with self.lock:
+            markets = {
+                market: {
+                    'moves': s['moves'],
+                    'unprotected_last_ms': s['last'] * 1000,
+                    'unprotected_max_ms': s['max'] * 1000,
+                    'unprotected_avg_ms': s['total'] / s['moves'] * 1000,
+                }
+                for market, s in self.windows.items()
+            }
+            return {'coalesced': self.coalesced, 'in_flight': len(self.in_flight), 'markets': markets}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)